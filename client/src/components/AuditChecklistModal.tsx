@@ -6,7 +6,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
 import { Progress } from '@/components/ui/progress';
-import { useAuditItems, useUpdateAuditItem } from '@/hooks/use-api';
+import { useAuditEvents, useAuditItems, useUpdateAuditItem } from '@/hooks/use-api';
 import { useToast } from '@/hooks/use-toast';
 import { Camera, CheckCircle, Clock, Star } from 'lucide-react';
 
@@ -19,6 +19,7 @@ interface AuditChecklistModalProps {
 
 export function AuditChecklistModal({ isOpen, onOpenChange, auditId, propertyName }: AuditChecklistModalProps) {
   const { data: auditItems = [], isLoading } = useAuditItems(auditId);
+  useAuditEvents({ audit_id: auditId }, isOpen && !!auditId);
   const updateAuditItem = useUpdateAuditItem();
   const { toast } = useToast();
   const [selectedItem, setSelectedItem] = useState<any>(null);
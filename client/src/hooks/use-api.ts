@@ -1,11 +1,37 @@
+import { useEffect } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { apiRequest } from '@/lib/queryClient';
 
 // Audit Items hooks
+// The first fetch loads the checklist; refetches send back the server's
+// X-Sync-Token as updated_since and merge in only the changed and deleted
+// items, so an unchanged audit costs an empty delta.
+const itemSyncTokens = new Map<number, string>();
+
+async function syncAuditItems(auditId: number, cached: any[] | undefined) {
+  const since = cached && itemSyncTokens.get(auditId);
+  const query = since ? `?updated_since=${encodeURIComponent(since)}` : '';
+  const response = await fetch(`/api/audits/${auditId}/items${query}`);
+  if (!response.ok) {
+    throw new Error((await response.text()) || `HTTP error! status: ${response.status}`);
+  }
+  const token = response.headers.get('X-Sync-Token');
+  if (token) itemSyncTokens.set(auditId, token);
+  const body = await response.json();
+  if (!since) return body;
+  if (body.full) return body.items;
+
+  const deleted = new Set<number>(body.deleted_ids);
+  let items = cached!.filter((item) => !deleted.has(item.id));
+  for (const item of body.items) items = upsertById(items, item)!;
+  return items.sort((a, b) => a.id - b.id);
+}
+
 export function useAuditItems(auditId: number) {
+  const queryClient = useQueryClient();
   return useQuery({
     queryKey: ['audit-items', auditId],
-    queryFn: () => apiRequest(`/audits/${auditId}/items`),
+    queryFn: () => syncAuditItems(auditId, queryClient.getQueryData(['audit-items', auditId])),
     enabled: !!auditId,
   });
 }
@@ -34,10 +60,29 @@ export function useProperties() {
 }
 
 // Audits hooks
+// GET /audits/ is keyset-paginated: follow X-Next-Cursor until the last page
+const AUDIT_PAGE_SIZE = 1000;
+
+async function fetchAllAudits() {
+  const audits: any[] = [];
+  let cursor: string | null = null;
+  do {
+    const params = new URLSearchParams({ limit: String(AUDIT_PAGE_SIZE) });
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`/api/audits/?${params}`);
+    if (!response.ok) {
+      throw new Error((await response.text()) || `HTTP error! status: ${response.status}`);
+    }
+    audits.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return audits;
+}
+
 export function useAudits() {
   return useQuery({
     queryKey: ['audits'],
-    queryFn: () => apiRequest('/audits/'),
+    queryFn: fetchAllAudits,
   });
 }
 
@@ -47,4 +92,69 @@ export function useHotelGroups() {
     queryKey: ['hotel-groups'],
     queryFn: () => apiRequest('/hotel-groups/'),
   });
-}
\ No newline at end of file
+}
+
+// Live audit changes (server-sent events from /api/events/audits). Changed
+// audits and items are patched into the cached lists instead of refetching
+// them; a reset event means some were missed, so the lists are refetched.
+type AuditEventFilters = {
+  audit_id?: number;
+  property_id?: number;
+  auditor_id?: number;
+  reviewer_id?: number;
+};
+
+function upsertById(list: any[] | undefined, row: any) {
+  if (!list) return list;
+  const index = list.findIndex((entry) => entry.id === row.id);
+  if (index === -1) return [row, ...list];
+  const next = list.slice();
+  next[index] = { ...next[index], ...row };
+  return next;
+}
+
+export function useAuditEvents(filters: AuditEventFilters = {}, enabled = true) {
+  const queryClient = useQueryClient();
+  const { audit_id, property_id, auditor_id, reviewer_id } = filters;
+
+  useEffect(() => {
+    if (!enabled) return;
+    const params = new URLSearchParams();
+    Object.entries({ audit_id, property_id, auditor_id, reviewer_id }).forEach(([key, value]) => {
+      if (value !== undefined) params.set(key, String(value));
+    });
+    // EventSource reconnects by itself and resumes with Last-Event-ID
+    const source = new EventSource(`/api/events/audits?${params}`);
+
+    const onAudit = (event: MessageEvent) => {
+      const audit = JSON.parse(event.data);
+      queryClient.setQueryData(['audits'], (audits: any[] | undefined) => upsertById(audits, audit));
+    };
+    const onItem = (event: MessageEvent) => {
+      const item = JSON.parse(event.data);
+      queryClient.setQueryData(['audit-items', item.audit_id], (items: any[] | undefined) => upsertById(items, item));
+    };
+    const onItemDeleted = (event: MessageEvent) => {
+      const { id, audit_id: changedAudit } = JSON.parse(event.data);
+      queryClient.setQueryData(['audit-items', changedAudit], (items: any[] | undefined) =>
+        items?.filter((entry) => entry.id !== id));
+    };
+    const onItems = (event: MessageEvent) => {
+      const { audit_id: changedAudit } = JSON.parse(event.data);
+      queryClient.invalidateQueries({ queryKey: ['audit-items', changedAudit] });
+    };
+    const onReset = () => {
+      queryClient.invalidateQueries({ queryKey: ['audits'] });
+      queryClient.invalidateQueries({ queryKey: ['audit-items'] });
+    };
+
+    source.addEventListener('audit.created', onAudit);
+    source.addEventListener('audit.updated', onAudit);
+    source.addEventListener('audit_item.created', onItem);
+    source.addEventListener('audit_item.updated', onItem);
+    source.addEventListener('audit_item.deleted', onItemDeleted);
+    source.addEventListener('audit_items.created', onItems);
+    source.addEventListener('reset', onReset);
+    return () => source.close();
+  }, [queryClient, enabled, audit_id, property_id, auditor_id, reviewer_id]);
+}
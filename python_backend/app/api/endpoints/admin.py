@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from app.api.endpoints.auth import get_current_user
+from app.core.config import settings
+from app.core.diagnostics import profile_token, profiles, slow_queries
+
+def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
+    return current_user
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.post("/profile-token")
+async def create_profile_token():
+    """Mint a token; send it as X-Profile on a request to profile that request"""
+    return {
+        "header": "X-Profile",
+        "token": profile_token(settings.PROFILE_TOKEN_TTL_SECONDS),
+        "expires_in": settings.PROFILE_TOKEN_TTL_SECONDS,
+    }
+
+@router.get("/profiles")
+async def list_profiles():
+    """Recent request profiles, newest first (without their stacks)"""
+    return [{key: value for key, value in profile.items() if key != "folded"} for profile in profiles.entries()]
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """One profile as collapsed stacks, for flamegraph.pl, speedscope or inferno"""
+    profile = profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(
+        profile["folded"],
+        headers={"Content-Disposition": f'inline; filename="profile-{profile_id}.folded"'},
+    )
+
+@router.get("/slow-queries")
+async def list_slow_queries():
+    """Statements slower than SLOW_QUERY_MS, newest first"""
+    return slow_queries.entries()
@@ -1,42 +1,192 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from datetime import datetime
-from app.core.database import get_db
-from app.models.models import Audit, AuditItem
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import json
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
+from app.models.models import Audit, AuditItem, Job, JobTask
 from app.schemas.schemas import (
     PhotoAnalysisRequest, PhotoAnalysisResponse,
+    BatchPhotoAnalysisRequest, JobResponse,
     ReportGenerationRequest, ReportGenerationResponse,
     ScoreSuggestionRequest, ScoreSuggestionResponse
 )
-from app.services.gemini_service import gemini_service
+from app.services.gemini_service import decode_image_data, gemini_service
+from app.services.image_processing import image_processor
+from app.services.job_queue import job_queue, load_job_progress
+from app.services.photo_analysis import PHOTO_ANALYSIS, item_context
+from app.services.photo_storage import PhotoTooLargeError, map_file, photo_store
+from app.services.report_render import REPORT_FORMATS
+from app.services.report_service import REPORT, report_key, report_store
 
 router = APIRouter()
 
 @router.post("/analyze-photo", response_model=PhotoAnalysisResponse)
 async def analyze_photo(
     request: PhotoAnalysisRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Analyze a photo using Gemini Vision AI"""
+    """Analyze a photo using Gemini Vision AI.
+
+    Pass ``photo_id`` from ``POST /photos`` to analyse a stored photo
+    straight from disk instead of sending it as base64 ``image_data``.
+    """
+    if not request.photo_id and not request.image_data:
+        raise HTTPException(status_code=400, detail="Provide photo_id or image_data")
+    if request.photo_id and not _photo_exists(request.photo_id):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    
     try:
-        analysis = await gemini_service.analyze_audit_photo(
-            request.image_data,
-            request.context
-        )
+        photo_id = request.photo_id
+        if photo_id is None and gemini_service.backend:
+            photo_id = (await photo_store.save_bytes(decode_image_data(request.image_data))).photo_id
+        
+        if photo_id:
+            # Downsized, re-encoded copy, rendered once per photo
+            path, image_hash = await image_processor.prepare_for_analysis(photo_id)
+            with map_file(path) as image:
+                analysis = await gemini_service.analyze_audit_photo(image, request.context, image_hash)
+        else:
+            analysis = await gemini_service.analyze_audit_photo(request.image_data, request.context)
         
         return PhotoAnalysisResponse(
             analysis=analysis,
             suggested_score=analysis.get("suggested_score", 3),
             confidence=0.85
         )
+    except PhotoTooLargeError:
+        raise HTTPException(status_code=413, detail="Photo too large")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid image data: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to analyze photo: {str(e)}")
 
+@router.post("/analyze-photos:batch", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def analyze_photos_batch(
+    request: BatchPhotoAnalysisRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Queue every photo of an audit for analysis and return the job.
+
+    Poll ``GET /ai/jobs/{id}`` or subscribe to ``/ai/jobs/{id}/events`` for
+    progress; results are written to each item's ai_score/ai_feedback.
+    """
+    if not gemini_service.backend:
+        raise HTTPException(status_code=503, detail="AI analysis unavailable - no API key")
+    
+    if await db.scalar(select(Audit.id).where(Audit.id == request.audit_id)) is None:
+        raise HTTPException(status_code=404, detail="Audit not found")
+    
+    items = {
+        row.id: row
+        for row in await db.execute(
+            select(AuditItem.id, AuditItem.category, AuditItem.item_name, AuditItem.description, AuditItem.photo_url)
+            .where(AuditItem.audit_id == request.audit_id)
+        )
+    }
+    
+    if request.photos is not None:
+        unknown = sorted({photo.audit_item_id for photo in request.photos} - items.keys())
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Items not in audit {request.audit_id}: {unknown}")
+        if any(not photo.photo_id and not photo.image_data for photo in request.photos):
+            raise HTTPException(status_code=400, detail="Each photo needs photo_id or image_data")
+        missing = [photo.photo_id for photo in request.photos if photo.photo_id and not _photo_exists(photo.photo_id)]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Photos not found: {missing}")
+        tasks = []
+        try:
+            for photo in request.photos:
+                item = items[photo.audit_item_id]
+                # Inline photos are stored up front so the queue carries ids, not base64
+                photo_id = photo.photo_id or (await photo_store.save_bytes(decode_image_data(photo.image_data))).photo_id
+                tasks.append((item.id, {"photo_id": photo_id, "context": item_context(item.category, item.item_name, item.description)}))
+        except PhotoTooLargeError:
+            raise HTTPException(status_code=413, detail="Photo too large")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid image data: {e}")
+    else:
+        tasks = [
+            (item.id, {"photo_url": item.photo_url, "context": item_context(item.category, item.item_name, item.description)})
+            for item in items.values()
+            if item.photo_url
+        ]
+    
+    if not tasks:
+        raise HTTPException(status_code=400, detail="No photos to analyze")
+    
+    job = await job_queue.enqueue(db, PHOTO_ANALYSIS, tasks, audit_id=request.audit_id)
+    return await load_job_progress(db, job.id)
+
+def _photo_exists(photo_id: str) -> bool:
+    try:
+        return photo_store.exists(photo_id)
+    except ValueError:
+        return False
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Job progress with the results of every finished task so far"""
+    progress = await load_job_progress(db, job_id)
+    
+    if not progress:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return progress
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def _job_events(job_id: int):
+    """Server-sent progress events carrying newly finished results"""
+    seen = set()
+    finished_since = None
+    last_counts = None
+    
+    while True:
+        # A fresh session per poll: a long-lived one would pin an old snapshot
+        async with AsyncSessionLocal() as db:
+            progress = await load_job_progress(db, job_id, finished_since)
+        
+        if progress is None:
+            yield _sse("error", {"detail": "Job not found"})
+            return
+        
+        new_results = [result for result in progress["results"] if result["task_id"] not in seen]
+        seen.update(result["task_id"] for result in new_results)
+        if new_results:
+            finished_since = max(result["finished_at"] for result in new_results)
+        progress["results"] = new_results
+        
+        counts = (progress["status"], progress["completed"], progress["failed"])
+        if new_results or counts != last_counts:
+            last_counts = counts
+            yield _sse("progress", progress)
+        else:
+            yield ": keep-alive\n\n"
+        
+        if progress["status"] == "completed":
+            yield _sse("done", {key: value for key, value in progress.items() if key != "results"})
+            return
+        
+        await job_queue.wait_for_progress(settings.JOB_POLL_INTERVAL_SECONDS)
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: int):
+    """Stream job progress as server-sent events until the job completes"""
+    return StreamingResponse(
+        _job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/suggest-score", response_model=ScoreSuggestionResponse)
 async def suggest_score(
     request: ScoreSuggestionRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get AI-suggested score for an audit item"""
     try:
@@ -57,23 +207,41 @@ async def suggest_score(
 @router.post("/generate-report", response_model=ReportGenerationResponse)
 async def generate_report(
     request: ReportGenerationRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Generate comprehensive audit report"""
-    # Get audit with all related data
-    audit = db.query(Audit).filter(Audit.id == request.audit_id).first()
+    """Generate an audit report as PDF, HTML or CSV.
+
+    A report of an unchanged audit is served from the artifact store at once
+    (``status: generated``). Otherwise the report is built by a background
+    job and this returns 202 with its ``job_id``: poll ``GET /ai/jobs/{id}``
+    or subscribe to ``/ai/jobs/{id}/events``; the task result carries the
+    final ``report_url``.
+    """
+    fmt = (request.format or "pdf").lower()
+    if fmt not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(REPORT_FORMATS)}")
+    
+    audit = await db.get(Audit, request.audit_id)
     
     if not audit:
         raise HTTPException(status_code=404, detail="Audit not found")
     
-    try:
-        # For demo purposes, return a mock report URL
-        report_url = f"/reports/audit_{request.audit_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        
-        return ReportGenerationResponse(
-            report_url=report_url,
-            status="generated"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate report: {str(e)}")
\ No newline at end of file
+    key = await report_key(db, audit, fmt)
+    report_url = report_store.url(audit.id, key, fmt)
+    if report_store.exists(audit.id, key, fmt):
+        return ReportGenerationResponse(report_url=report_url, status="generated", format=fmt)
+    
+    # Requests for the same audit state share one unfinished job
+    payload = {"audit_id": audit.id, "format": fmt, "key": key}
+    job_id = await db.scalar(
+        select(Job.id)
+        .join(JobTask, JobTask.job_id == Job.id)
+        .where(Job.audit_id == audit.id, Job.kind == REPORT, Job.status != "completed", JobTask.payload == json.dumps(payload))
+        .limit(1)
+    )
+    if job_id is None:
+        job_id = (await job_queue.enqueue(db, REPORT, [(None, payload)], audit_id=audit.id)).id
+    
+    response.status_code = status.HTTP_202_ACCEPTED
+    return ReportGenerationResponse(report_url=report_url, status="queued", format=fmt, job_id=job_id)
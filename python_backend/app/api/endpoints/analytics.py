@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.schemas.schemas import AnalyticsRebuildResponse, AnalyticsRow
+from app.services.analytics_service import load_rollups, rebuild_analytics
+from typing import List, Optional
+
+router = APIRouter()
+
+MONTH_PATTERN = r"^\d{4}-\d{2}$"
+
+# Every endpoint reads the rollup tables only; see analytics_service
+
+def _filters(
+    hotel_group_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    month_from: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="YYYY-MM, inclusive"),
+    month_to: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="YYYY-MM, inclusive"),
+) -> dict:
+    return {"hotel_group_id": hotel_group_id, "property_id": property_id, "month_from": month_from, "month_to": month_to}
+
+@router.get("/summary", response_model=AnalyticsRow, response_model_exclude_none=True)
+async def get_summary(filters: dict = Depends(_filters), db: AsyncSession = Depends(get_db)):
+    """Portfolio totals: audits, average score, compliance zones and item compliance"""
+    return (await load_rollups(db, [], **filters))[0]
+
+@router.get("/hotel-groups", response_model=List[AnalyticsRow], response_model_exclude_none=True)
+async def get_hotel_group_analytics(filters: dict = Depends(_filters), db: AsyncSession = Depends(get_db)):
+    return await load_rollups(db, ["hotel_group_id"], **filters)
+
+@router.get("/properties", response_model=List[AnalyticsRow], response_model_exclude_none=True)
+async def get_property_analytics(filters: dict = Depends(_filters), db: AsyncSession = Depends(get_db)):
+    return await load_rollups(db, ["hotel_group_id", "property_id"], **filters)
+
+@router.get("/categories", response_model=List[AnalyticsRow], response_model_exclude_none=True)
+async def get_category_analytics(filters: dict = Depends(_filters), db: AsyncSession = Depends(get_db)):
+    """Item scores and compliance per checklist category"""
+    return await load_rollups(db, ["category"], **filters)
+
+@router.get("/trend", response_model=List[AnalyticsRow], response_model_exclude_none=True)
+async def get_monthly_trend(
+    category: Optional[str] = None,
+    filters: dict = Depends(_filters),
+    db: AsyncSession = Depends(get_db)
+):
+    """Month-by-month measures, optionally for one category"""
+    return await load_rollups(db, ["month"], category=category, **filters)
+
+@router.post("/rebuild", response_model=AnalyticsRebuildResponse)
+async def rebuild(db: AsyncSession = Depends(get_db)):
+    """Recompute the rollups from every audit (after a bulk import, say)"""
+    return {"audits": await rebuild_analytics(db)}
@@ -1,86 +1,152 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from app.core.database import get_db
-from app.models.models import Audit, AuditItem, Property, User, HotelGroup
-from app.schemas.schemas import AuditCreate, AuditResponse, AuditItemCreate, AuditItemResponse
-from typing import List, Optional
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, insert, or_, select, update
+from app.core.cache import etag_matches, json_response
+from app.core.config import settings
+from app.core.database import async_engine, get_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from app.models.models import Audit, AuditItem, JobTask, Property, User, HotelGroup
+from app.schemas.schemas import (
+    AuditCreate, AuditResponse, AuditDetailResponse,
+    AuditItemCreate, AuditItemResponse, AuditItemBulkEntry, AuditItemBulkResponse, AuditItemChangesResponse,
+    AuditScoreResponse, AuditRescoreResponse
+)
+from app.services.analytics_service import refresh_audit_analytics
+from app.services.audit_service import (
+    AUDIT_LIST_COLUMNS, as_utc_naive, current_item_list_etag, item_list_etag, load_audit_detail,
+    load_item_changes, record_item_tombstone, serialize_audit, serialize_audit_item,
+)
+from app.services.change_feed import change_feed, record_audit_changes, record_item_change
+# app.services.scoring (NumPy) is imported where it is used, off the startup path
+from typing import List, Optional, Union
+from datetime import datetime, timedelta
+import json
 
 router = APIRouter()
 
+STREAM_BATCH_SIZE = 500
+
+# Serializers for the endpoints that return their own (ETag-ed) responses
+AUDIT_LIST = TypeAdapter(List[AuditResponse])
+AUDIT_DETAIL = TypeAdapter(AuditDetailResponse)
+AUDIT_ITEM_LIST = TypeAdapter(List[AuditItemResponse])
+AUDIT_ITEM_CHANGES = TypeAdapter(AuditItemChangesResponse)
+
+def _dump(adapter: TypeAdapter, payload) -> bytes:
+    return adapter.dump_json(adapter.validate_python(payload))
+
+def _audit_list_query(
+    status: Optional[str],
+    auditor_id: Optional[int],
+    reviewer_id: Optional[int],
+    property_id: Optional[int],
+    cursor: Optional[str],
+    updated_since: Optional[datetime] = None,
+):
+    """Build the projected, keyset-ordered audit list SELECT"""
+    query = select(*AUDIT_LIST_COLUMNS).join(Property).join(HotelGroup)
+    
+    if status:
+        query = query.where(Audit.status == status)
+    if auditor_id:
+        query = query.where(Audit.auditor_id == auditor_id)
+    if reviewer_id:
+        query = query.where(Audit.reviewer_id == reviewer_id)
+    if property_id:
+        query = query.where(Audit.property_id == property_id)
+    if updated_since:
+        query = query.where(Audit.updated_at > updated_since - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS))
+    
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                Audit.created_at < created_at,
+                and_(Audit.created_at == created_at, Audit.id < last_id),
+            )
+        )
+    
+    created_at = Audit.created_at
+    if updated_since:
+        # A delta is a few rows: find them through ix_audits_updated_at and
+        # sort those, rather than walk every audit in created_at order (an
+        # expression keeps the planner from ordering by the created_at index;
+        # unlike a unary +, COALESCE works on PostgreSQL timestamps too)
+        created_at = func.coalesce(Audit.created_at, Audit.created_at)
+    return query.order_by(created_at.desc(), Audit.id.desc())
+
+async def _stream_audits_ndjson(query):
+    """Yield one JSON line per audit from a server-side cursor"""
+    async with async_engine.connect() as connection:
+        result = await connection.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for row in result:
+            yield json.dumps(dict(row._mapping), default=_json_default) + "\n"
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
 @router.get("/", response_model=List[AuditResponse])
 async def get_audits(
+    request: Request,
     status: Optional[str] = None,
     auditor_id: Optional[int] = None,
     reviewer_id: Optional[int] = None,
     property_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    updated_since: Optional[datetime] = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(Audit).join(Property).join(HotelGroup)
+    """List audits newest first, one keyset page at a time.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch
+    the next page. With ``stream=true`` every matching row after the cursor
+    (up to ``limit``, if given) is streamed as NDJSON instead.
+
+    With ``updated_since`` only audits changed since then (less
+    SYNC_OVERLAP_SECONDS) are listed; pass the ``X-Sync-Token`` header of
+    the first page as ``updated_since`` next time. Pages carry an ETag and
+    answer a matching If-None-Match with a 304.
+    """
+    sync_token = datetime.utcnow()
+    if updated_since is not None:
+        updated_since = as_utc_naive(updated_since)
+    query = _audit_list_query(status, auditor_id, reviewer_id, property_id, cursor, updated_since)
     
-    if status:
-        query = query.filter(Audit.status == status)
-    if auditor_id:
-        query = query.filter(Audit.auditor_id == auditor_id)
-    if reviewer_id:
-        query = query.filter(Audit.reviewer_id == reviewer_id)
-    if property_id:
-        query = query.filter(Audit.property_id == property_id)
-    
-    audits = query.order_by(Audit.created_at.desc()).all()
-    
-    result = []
-    for audit in audits:
-        result.append({
-            "id": audit.id,
-            "property_id": audit.property_id,
-            "auditor_id": audit.auditor_id,
-            "reviewer_id": audit.reviewer_id,
-            "status": audit.status,
-            "overall_score": audit.overall_score,
-            "created_at": audit.created_at,
-            "updated_at": audit.updated_at,
-            "scheduled_date": audit.scheduled_date,
-            "completed_date": audit.completed_date
-        })
-    
-    return result
-
-@router.get("/{audit_id}", response_model=AuditResponse)
-async def get_audit(audit_id: int, db: Session = Depends(get_db)):
-    audit = db.query(Audit).filter(Audit.id == audit_id).first()
+    if stream:
+        if limit:
+            query = query.limit(limit)
+        return StreamingResponse(_stream_audits_ndjson(query), media_type="application/x-ndjson")
+    
+    page_size = limit or DEFAULT_PAGE_SIZE
+    rows = (await db.execute(query.limit(page_size + 1))).all()
+    
+    headers = {"X-Sync-Token": sync_token.isoformat()}
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    
+    return json_response(request, _dump(AUDIT_LIST, [dict(row._mapping) for row in rows]), headers=headers)
+
+@router.get("/{audit_id}", response_model=AuditDetailResponse)
+async def get_audit(audit_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    audit = await load_audit_detail(db, audit_id)
     
     if not audit:
         raise HTTPException(status_code=404, detail="Audit not found")
     
-    return {
-        "id": audit.id,
-        "property_id": audit.property_id,
-        "property_name": audit.property.name,
-        "property_location": audit.property.location,
-        "hotel_group_name": audit.hotel_group.name,
-        "auditor_id": audit.auditor_id,
-        "auditor_name": audit.auditor.name if audit.auditor else None,
-        "reviewer_id": audit.reviewer_id,
-        "reviewer_name": audit.reviewer.name if audit.reviewer else None,
-        "status": audit.status,
-        "overall_score": audit.overall_score,
-        "cleanliness_score": audit.cleanliness_score,
-        "branding_score": audit.branding_score,
-        "operational_score": audit.operational_score,
-        "compliance_zone": audit.compliance_zone,
-        "findings": audit.findings,
-        "action_plan": audit.action_plan,
-        "submitted_at": audit.submitted_at,
-        "reviewed_at": audit.reviewed_at,
-        "created_at": audit.created_at
-    }
+    return json_response(request, _dump(AUDIT_DETAIL, serialize_audit(audit)))
 
-@router.post("/", response_model=AuditResponse)
-async def create_audit(audit_data: AuditCreate, db: Session = Depends(get_db)):
+@router.post("/", response_model=AuditDetailResponse)
+async def create_audit(audit_data: AuditCreate, db: AsyncSession = Depends(get_db)):
     # Check if property exists
-    property_obj = db.query(Property).filter(Property.id == audit_data.property_id).first()
+    property_obj = await db.get(Property, audit_data.property_id)
     if not property_obj:
         raise HTTPException(status_code=404, detail="Property not found")
     
@@ -88,42 +154,22 @@ async def create_audit(audit_data: AuditCreate, db: Session = Depends(get_db)):
         property_id=audit_data.property_id,
         auditor_id=audit_data.auditor_id,
         reviewer_id=audit_data.reviewer_id,
-        hotel_group_id=property_obj.hotel_group_id,
-        sop=audit_data.sop,
-        sop_files=audit_data.sop_files,
+        scheduled_date=audit_data.scheduled_date,
         status="scheduled"
     )
     
     db.add(audit)
-    db.commit()
-    db.refresh(audit)
+    await db.flush()
+    await refresh_audit_analytics(db, [audit.id])
+    await record_audit_changes(db, "audit.created", [audit.id])
+    await db.commit()
+    change_feed.notify()
     
-    return {
-        "id": audit.id,
-        "property_id": audit.property_id,
-        "property_name": audit.property.name,
-        "property_location": audit.property.location,
-        "hotel_group_name": audit.hotel_group.name,
-        "auditor_id": audit.auditor_id,
-        "auditor_name": audit.auditor.name if audit.auditor else None,
-        "reviewer_id": audit.reviewer_id,
-        "reviewer_name": audit.reviewer.name if audit.reviewer else None,
-        "status": audit.status,
-        "overall_score": audit.overall_score,
-        "cleanliness_score": audit.cleanliness_score,
-        "branding_score": audit.branding_score,
-        "operational_score": audit.operational_score,
-        "compliance_zone": audit.compliance_zone,
-        "findings": audit.findings,
-        "action_plan": audit.action_plan,
-        "submitted_at": audit.submitted_at,
-        "reviewed_at": audit.reviewed_at,
-        "created_at": audit.created_at
-    }
+    return serialize_audit(await load_audit_detail(db, audit.id))
 
-@router.put("/{audit_id}", response_model=AuditResponse)
-async def update_audit(audit_id: int, audit_updates: dict, db: Session = Depends(get_db)):
-    audit = db.query(Audit).filter(Audit.id == audit_id).first()
+@router.put("/{audit_id}", response_model=AuditDetailResponse)
+async def update_audit(audit_id: int, audit_updates: dict, db: AsyncSession = Depends(get_db)):
+    audit = await load_audit_detail(db, audit_id)
     
     if not audit:
         raise HTTPException(status_code=404, detail="Audit not found")
@@ -138,87 +184,154 @@ async def update_audit(audit_id: int, audit_updates: dict, db: Session = Depends
     elif audit_updates.get('status') == 'reviewed':
         audit.reviewed_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(audit)
+    await db.flush()
+    await refresh_audit_analytics(db, [audit_id])
+    await record_audit_changes(db, "audit.updated", [audit_id])
+    await db.commit()
+    change_feed.notify()
     
+    return serialize_audit(await load_audit_detail(db, audit_id))
+
+@router.get("/{audit_id}/items", response_model=Union[List[AuditItemResponse], AuditItemChangesResponse])
+async def get_audit_items(
+    audit_id: int,
+    request: Request,
+    updated_since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Items of an audit, or with ``updated_since`` only what changed since.
+
+    Pass the ``X-Sync-Token`` header back as ``updated_since`` next time;
+    the delta lists the items changed since (less SYNC_OVERLAP_SECONDS)
+    and the ids of deleted ones. The full list carries an ETag built from
+    the item count and latest change, which is checked against
+    If-None-Match from the index alone, before any item is loaded.
+    """
+    # The time of this read, not the latest updated_at: a delta then only
+    # repeats rows written within the overlap before it
+    headers = {"X-Sync-Token": datetime.utcnow().isoformat()}
+    
+    if updated_since is not None:
+        changes = await load_item_changes(db, audit_id, as_utc_naive(updated_since))
+        return Response(content=_dump(AUDIT_ITEM_CHANGES, changes), media_type="application/json", headers=headers)
+    
+    if request.headers.get("if-none-match"):
+        etag = await current_item_list_etag(db, audit_id)
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={**headers, "ETag": etag, "Cache-Control": "private, no-cache"})
+    
+    items = (await db.scalars(select(AuditItem).where(AuditItem.audit_id == audit_id))).all()
+    etag = item_list_etag(audit_id, len(items), max((item.updated_at for item in items), default=None))
+    return json_response(request, _dump(AUDIT_ITEM_LIST, [serialize_audit_item(item) for item in items]), etag, headers)
+
+@router.get("/{audit_id}/score", response_model=AuditScoreResponse)
+async def get_audit_score(audit_id: int, db: AsyncSession = Depends(get_db)):
+    """Weighted category and overall scores from the shared audit checklist.
+
+    Items are matched to the checklist by item id or label; checklist items
+    the audit has not scored count as zero.
+    """
+    if await db.scalar(select(Audit.id).where(Audit.id == audit_id)) is None:
+        raise HTTPException(status_code=404, detail="Audit not found")
+    
+    from app.services.scoring import score_audits
+    result = await score_audits(db, [audit_id])
+    checklist = result.checklist
+    matched = int(result.matched[0])
     return {
-        "id": audit.id,
-        "property_id": audit.property_id,
-        "property_name": audit.property.name,
-        "property_location": audit.property.location,
-        "hotel_group_name": audit.hotel_group.name,
-        "auditor_id": audit.auditor_id,
-        "auditor_name": audit.auditor.name if audit.auditor else None,
-        "reviewer_id": audit.reviewer_id,
-        "reviewer_name": audit.reviewer.name if audit.reviewer else None,
-        "status": audit.status,
-        "overall_score": audit.overall_score,
-        "cleanliness_score": audit.cleanliness_score,
-        "branding_score": audit.branding_score,
-        "operational_score": audit.operational_score,
-        "compliance_zone": audit.compliance_zone,
-        "findings": audit.findings,
-        "action_plan": audit.action_plan,
-        "submitted_at": audit.submitted_at,
-        "reviewed_at": audit.reviewed_at,
-        "created_at": audit.created_at
+        "audit_id": audit_id,
+        "overall_score": round(float(result.overall[0]), 2) if matched else None,
+        "compliance_zone": str(result.zones[0]) if matched else None,
+        "matched_items": matched,
+        "unmatched_items": int(result.unmatched[0]),
+        "categories": [
+            {"id": category_id, "name": name, "weight": float(weight), "score": round(float(score), 2)}
+            for category_id, name, weight, score in zip(
+                checklist.category_ids, checklist.category_names, checklist.category_weights, result.category_scores[0]
+            )
+        ] if matched else [],
     }
 
-@router.get("/{audit_id}/items", response_model=List[AuditItemResponse])
-async def get_audit_items(audit_id: int, db: Session = Depends(get_db)):
-    items = db.query(AuditItem).filter(AuditItem.audit_id == audit_id).all()
-    
-    result = []
-    for item in items:
-        result.append({
-            "id": item.id,
-            "audit_id": item.audit_id,
-            "category": item.category,
-            "item": item.item,
-            "score": item.score,
-            "comments": item.comments,
-            "ai_analysis": item.ai_analysis,
-            "photos": item.photos,
-            "status": item.status
-        })
-    
-    return result
+@router.post("/rescore", response_model=AuditRescoreResponse)
+async def rescore_all_audits(db: AsyncSession = Depends(get_db)):
+    """Recompute overall_score for every checklist audit, e.g. after a weight change"""
+    from app.services.scoring import rescore_audits
+    scored, changed = await rescore_audits(db)
+    await refresh_audit_analytics(db, changed)
+    await record_audit_changes(db, "audit.updated", changed)
+    await db.commit()
+    change_feed.notify()
+    
+    return {"scored": scored, "changed": len(changed)}
 
 @router.post("/{audit_id}/items", response_model=AuditItemResponse)
-async def create_audit_item(audit_id: int, item_data: AuditItemCreate, db: Session = Depends(get_db)):
+async def create_audit_item(audit_id: int, item_data: AuditItemCreate, db: AsyncSession = Depends(get_db)):
     # Check if audit exists
-    audit = db.query(Audit).filter(Audit.id == audit_id).first()
+    audit = await db.get(Audit, audit_id)
     if not audit:
         raise HTTPException(status_code=404, detail="Audit not found")
     
     item = AuditItem(
         audit_id=audit_id,
         category=item_data.category,
-        item=item_data.item,
-        score=item_data.score,
-        comments=item_data.comments,
-        photos=item_data.photos
+        item_name=item_data.item_name,
+        description=item_data.description
     )
     
     db.add(item)
-    db.commit()
-    db.refresh(item)
+    await db.flush()
+    from app.services.scoring import rescore_audits
+    _, rescored = await rescore_audits(db, [audit_id])
+    await refresh_audit_analytics(db, [audit_id])
+    await db.refresh(item)
+    payload = serialize_audit_item(item)
+    await record_item_change(db, "audit_item.created", audit_id, payload)
+    await record_audit_changes(db, "audit.updated", rescored)
+    await db.commit()
+    change_feed.notify()
     
-    return {
-        "id": item.id,
-        "audit_id": item.audit_id,
-        "category": item.category,
-        "item": item.item,
-        "score": item.score,
-        "comments": item.comments,
-        "ai_analysis": item.ai_analysis,
-        "photos": item.photos,
-        "status": item.status
-    }
+    return payload
+
+@router.post("/{audit_id}/items:bulk", response_model=AuditItemBulkResponse, status_code=status.HTTP_201_CREATED)
+async def create_audit_items_bulk(
+    audit_id: int,
+    items: List[AuditItemBulkEntry],
+    db: AsyncSession = Depends(get_db)
+):
+    """Insert a whole checklist of items in one statement and one transaction"""
+    if await db.scalar(select(Audit.id).where(Audit.id == audit_id)) is None:
+        raise HTTPException(status_code=404, detail="Audit not found")
+    
+    if not items:
+        return {"audit_id": audit_id, "created": 0, "ids": []}
+    
+    now = datetime.utcnow()
+    rows = [
+        {**item.model_dump(), "audit_id": audit_id, "created_at": now, "updated_at": now}
+        for item in items
+    ]
+    
+    try:
+        # Batched multi-row INSERT ... RETURNING; ids come from one statement so
+        # they are allocated in parameter order even if returned unordered
+        ids = sorted((await db.scalars(insert(AuditItem).returning(AuditItem.id), rows)).all())
+        from app.services.scoring import rescore_audits
+        _, rescored = await rescore_audits(db, [audit_id])
+        await refresh_audit_analytics(db, [audit_id])
+        # One event for the batch; clients refetch the audit's items
+        await record_item_change(db, "audit_items.created", audit_id, {"audit_id": audit_id, "ids": ids})
+        await record_audit_changes(db, "audit.updated", rescored)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    change_feed.notify()
+    
+    return {"audit_id": audit_id, "created": len(ids), "ids": ids}
 
 @router.put("/items/{item_id}", response_model=AuditItemResponse)
-async def update_audit_item(item_id: int, item_updates: dict, db: Session = Depends(get_db)):
-    item = db.query(AuditItem).filter(AuditItem.id == item_id).first()
+async def update_audit_item(item_id: int, item_updates: dict, db: AsyncSession = Depends(get_db)):
+    item = await db.get(AuditItem, item_id)
     
     if not item:
         raise HTTPException(status_code=404, detail="Audit item not found")
@@ -228,17 +341,39 @@ async def update_audit_item(item_id: int, item_updates: dict, db: Session = Depe
         if hasattr(item, field) and value is not None:
             setattr(item, field, value)
     
-    db.commit()
-    db.refresh(item)
+    await db.flush()
+    from app.services.scoring import rescore_audits
+    _, rescored = await rescore_audits(db, [item.audit_id])
+    await refresh_audit_analytics(db, [item.audit_id])
+    await db.refresh(item)
+    payload = serialize_audit_item(item)
+    await record_item_change(db, "audit_item.updated", item.audit_id, payload)
+    await record_audit_changes(db, "audit.updated", rescored)
+    await db.commit()
+    change_feed.notify()
     
-    return {
-        "id": item.id,
-        "audit_id": item.audit_id,
-        "category": item.category,
-        "item": item.item,
-        "score": item.score,
-        "comments": item.comments,
-        "ai_analysis": item.ai_analysis,
-        "photos": item.photos,
-        "status": item.status
-    }
\ No newline at end of file
+    return payload
+
+@router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_audit_item(item_id: int, db: AsyncSession = Depends(get_db)):
+    """Delete an item; clients syncing with updated_since get its id in deleted_ids"""
+    item = await db.get(AuditItem, item_id)
+    
+    if not item:
+        raise HTTPException(status_code=404, detail="Audit item not found")
+    
+    audit_id = item.audit_id
+    # Queued analyses must not write into a later item given the same id
+    await db.execute(update(JobTask).where(JobTask.audit_item_id == item_id).values(audit_item_id=None))
+    await record_item_tombstone(db, item)
+    await db.delete(item)
+    await db.flush()
+    from app.services.scoring import rescore_audits
+    _, rescored = await rescore_audits(db, [audit_id])
+    await refresh_audit_analytics(db, [audit_id])
+    await record_item_change(db, "audit_item.deleted", audit_id, {"id": item_id, "audit_id": audit_id})
+    await record_audit_changes(db, "audit.updated", rescored)
+    await db.commit()
+    change_feed.notify()
+    
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,80 +1,111 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.models.models import User
 from app.schemas.schemas import UserCreate, UserLogin, UserResponse, Token
-from app.core.security import verify_password, get_password_hash, create_access_token
-from datetime import timedelta
-import hashlib
+from app.core.security import (
+    InvalidTokenError, create_access_token, login_rate_limiter, password_hasher, token_verifier
+)
+from typing import Optional
 
 router = APIRouter()
 
-def get_password_hash_simple(password: str) -> str:
-    """Simple password hashing for demo purposes"""
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def verify_password_simple(plain_password: str, hashed_password: str) -> bool:
-    """Simple password verification for demo purposes"""
-    return get_password_hash_simple(plain_password) == hashed_password
+bearer_scheme = HTTPBearer(auto_error=False)
 
 @router.post("/login", response_model=dict)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
+    # Counted before the (awaited) password check, so concurrent guesses
+    # are limited too; a failure simply leaves the attempt counted
+    retry_after = await login_rate_limiter.reserve(user_data.username)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
     # Check if user exists
-    user = db.query(User).filter(User.username == user_data.username).first()
+    user = await db.scalar(select(User).where(User.username == user_data.username))
     
-    if not user:
+    # Verify password (unknown users still pay for a dummy verify so timing
+    # does not reveal which usernames exist)
+    valid, new_hash = await password_hasher.verify_and_update(
+        user_data.password, user.password if user else None
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
     
-    # Verify password
-    if not verify_password_simple(user_data.password, user.password):
+    await login_rate_limiter.reset(user_data.username)
+    
+    # Upgrade legacy SHA-256 hashes now that we know the plaintext
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
+    
+    user_payload = {
+        "id": user.id,
+        "username": user.username,
+        "role": user.role,
+        "name": user.name,
+        "email": user.email
+    }
+    
+    return {
+        "user": user_payload,
+        "access_token": create_access_token({
+            "sub": str(user.id), "ver": user.token_version, **user_payload
+        }),
+        "token_type": "bearer",
+        "message": "Login successful"
+    }
+
+async def _verify_bearer(credentials: Optional[HTTPAuthorizationCredentials]) -> dict:
+    if credentials is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid credentials"
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
         )
-    
+    try:
+        return await token_verifier.verify(credentials.credentials)
+    except InvalidTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> dict:
+    """Dependency for the authenticated user, read from the signed token (no DB lookup once its version is cached)"""
+    claims = await _verify_bearer(credentials)
     return {
-        "user": {
-            "id": user.id,
-            "username": user.username,
-            "role": user.role,
-            "name": user.name,
-            "email": user.email
-        },
-        "message": "Login successful"
+        "id": int(claims["sub"]),
+        "username": claims["username"],
+        "role": claims["role"],
+        "name": claims["name"],
+        "email": claims["email"]
     }
 
 @router.post("/logout")
-async def logout():
+async def logout(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    """End the session; this revokes every token of the user, on all devices and workers"""
+    if credentials is not None:
+        try:
+            claims = await token_verifier.verify(credentials.credentials)
+        except InvalidTokenError:
+            pass
+        else:
+            await token_verifier.revoke_user(db, int(claims["sub"]))
     return {"message": "Logout successful"}
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user():
-    # For demo purposes, return a mock user
-    return {
-        "id": 1,
-        "username": "demo_user",
-        "role": "admin",
-        "name": "Demo User",
-        "email": "demo@hotel.com"
-    }
-
-def get_current_user():
-    """Dependency for getting current user (simplified for demo)"""
-    return {
-        "id": 1,
-        "username": "demo_user", 
-        "role": "admin",
-        "name": "Demo User",
-        "email": "demo@hotel.com"
-    }
-    # In a real app, this would verify the JWT token
-    return {
-        "id": 1,
-        "username": "admin",
-        "role": "admin",
-        "name": "System Administrator",
-        "email": "admin@hotel-audit.com"
-    }
\ No newline at end of file
+async def read_current_user(current_user: dict = Depends(get_current_user)):
+    return current_user
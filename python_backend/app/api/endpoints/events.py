@@ -0,0 +1,41 @@
+from typing import Optional
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from app.services.change_feed import change_feed
+
+router = APIRouter()
+
+@router.get("/audits")
+async def audit_events(
+    audit_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    auditor_id: Optional[int] = None,
+    reviewer_id: Optional[int] = None,
+    last_event_id: Optional[int] = Query(None, description="Resume after this event (EventSource sends Last-Event-ID itself)"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Stream audit and audit item changes as server-sent events.
+
+    Events: ``audit.created`` / ``audit.updated`` carry the audit as
+    ``GET /audits/`` lists it, ``audit_item.created`` / ``audit_item.updated``
+    the item, ``audit_item.deleted`` its id and audit id,
+    ``audit_items.created`` the audit id and new item ids. Filters
+    combine with AND. The stream opens with ``ready``; ``reset`` means events
+    were missed and the lists should be refetched.
+    """
+    filters = {
+        key: value
+        for key, value in (
+            ("audit_id", audit_id), ("property_id", property_id),
+            ("auditor_id", auditor_id), ("reviewer_id", reviewer_id),
+        )
+        if value is not None
+    }
+    if last_event_id_header is not None and last_event_id_header.strip().isdigit():
+        last_event_id = int(last_event_id_header)
+
+    return StreamingResponse(
+        change_feed.stream(filters, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
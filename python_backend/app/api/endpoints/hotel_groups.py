@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import cached_response, response_cache
 from app.core.database import get_db
 from app.models.models import HotelGroup
 from app.schemas.schemas import HotelGroupCreate, HotelGroupResponse
@@ -7,28 +9,12 @@ from typing import List
 
 router = APIRouter()
 
-@router.get("/", response_model=List[HotelGroupResponse])
-async def get_hotel_groups(db: Session = Depends(get_db)):
-    hotel_groups = db.query(HotelGroup).order_by(HotelGroup.name).all()
-    
-    result = []
-    for group in hotel_groups:
-        result.append({
-            "id": group.id,
-            "name": group.name,
-            "description": group.description,
-            "created_at": group.created_at
-        })
-    
-    return result
+LIST_CACHE = "hotel_groups:list"
 
-@router.get("/{group_id}", response_model=HotelGroupResponse)
-async def get_hotel_group(group_id: int, db: Session = Depends(get_db)):
-    group = db.query(HotelGroup).filter(HotelGroup.id == group_id).first()
-    
-    if not group:
-        raise HTTPException(status_code=404, detail="Hotel group not found")
-    
+def _detail_cache(group_id: int) -> str:
+    return f"hotel_groups:{group_id}"
+
+def serialize_hotel_group(group: HotelGroup) -> dict:
     return {
         "id": group.id,
         "name": group.name,
@@ -36,8 +22,28 @@ async def get_hotel_group(group_id: int, db: Session = Depends(get_db)):
         "created_at": group.created_at
     }
 
+@router.get("/", response_model=List[HotelGroupResponse])
+async def get_hotel_groups(request: Request, db: AsyncSession = Depends(get_db)):
+    async def load():
+        hotel_groups = (await db.scalars(select(HotelGroup).order_by(HotelGroup.name))).all()
+        return [serialize_hotel_group(group) for group in hotel_groups]
+    
+    return await cached_response(request, LIST_CACHE, "", load)
+
+@router.get("/{group_id}", response_model=HotelGroupResponse)
+async def get_hotel_group(group_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    async def load():
+        group = await db.get(HotelGroup, group_id)
+        
+        if not group:
+            raise HTTPException(status_code=404, detail="Hotel group not found")
+        
+        return serialize_hotel_group(group)
+    
+    return await cached_response(request, _detail_cache(group_id), "", load)
+
 @router.post("/", response_model=HotelGroupResponse, status_code=status.HTTP_201_CREATED)
-async def create_hotel_group(group_data: HotelGroupCreate, db: Session = Depends(get_db)):
+async def create_hotel_group(group_data: HotelGroupCreate, db: AsyncSession = Depends(get_db)):
     # Create new hotel group
     new_group = HotelGroup(
         name=group_data.name,
@@ -45,12 +51,8 @@ async def create_hotel_group(group_data: HotelGroupCreate, db: Session = Depends
     )
     
     db.add(new_group)
-    db.commit()
-    db.refresh(new_group)
+    await db.commit()
+    await db.refresh(new_group)
+    response_cache.invalidate(LIST_CACHE)
     
-    return {
-        "id": new_group.id,
-        "name": new_group.name,
-        "description": new_group.description,
-        "created_at": new_group.created_at
-    }
\ No newline at end of file
+    return serialize_hotel_group(new_group)
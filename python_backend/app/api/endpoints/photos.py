@@ -0,0 +1,159 @@
+from typing import AsyncIterator, Dict, List, Optional
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from app.core.cache import etag_matches
+from app.core.config import settings
+from app.schemas.schemas import PhotoUploadResponse
+from app.services.image_processing import UnsupportedImageError, image_processor
+from app.services.photo_storage import PhotoTooLargeError, photo_store
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+router = APIRouter()
+
+UPLOAD_FIELD = "file"
+
+async def _multipart_file_chunks(request: Request, field: str) -> AsyncIterator[bytes]:
+    """Yield the bytes of one multipart/form-data file field as they arrive"""
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise HTTPException(status_code=400, detail="Missing multipart boundary")
+    
+    state = {"field": b"", "value": b"", "headers": {}, "in_file": False, "found": False}
+    pieces: List[bytes] = []
+    
+    def on_part_begin():
+        state["headers"] = {}
+        state["in_file"] = False
+    
+    def on_header_field(data, start, end):
+        state["field"] += data[start:end]
+    
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+    
+    def on_header_end():
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"] = state["value"] = b""
+    
+    def on_headers_finished():
+        _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        state["in_file"] = not state["found"] and options.get(b"name") == field.encode()
+        state["found"] = state["found"] or state["in_file"]
+    
+    def on_part_data(data, start, end):
+        if state["in_file"]:
+            pieces.append(bytes(data[start:end]))
+    
+    def on_part_end():
+        state["in_file"] = False
+    
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    
+    async for chunk in request.stream():
+        parser.write(chunk)
+        for piece in pieces:
+            yield piece
+        pieces.clear()
+    parser.finalize()
+    
+    if not state["found"]:
+        raise HTTPException(status_code=400, detail=f"Missing '{field}' file field")
+
+@router.post("/", response_model=PhotoUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_photo(request: Request, background_tasks: BackgroundTasks):
+    """Store a photo by content hash, streaming it straight to disk.
+
+    Send either ``multipart/form-data`` with a ``file`` field or the raw image
+    as the request body. Uploading an identical photo again returns the
+    existing ``photo_id`` with ``deduplicated`` set.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > photo_store.max_bytes + 64 * 1024:
+        raise HTTPException(status_code=413, detail="Photo too large")
+    
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        chunks = _multipart_file_chunks(request, UPLOAD_FIELD)
+    else:
+        chunks = request.stream()
+    
+    try:
+        photo = await photo_store.save_stream(chunks)
+    except PhotoTooLargeError:
+        raise HTTPException(status_code=413, detail="Photo too large")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not photo.deduplicated:
+        background_tasks.add_task(image_processor.warm, photo.photo_id)
+    
+    return {
+        "photo_id": photo.photo_id,
+        "size": photo.size,
+        "mime_type": photo.mime_type,
+        "deduplicated": photo.deduplicated,
+        "url": f"/api/photos/{photo.photo_id}",
+    }
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+def _immutable_file(request: Request, path: str, etag: str, media_type: str) -> Response:
+    # Content-addressed, so a given URL never changes
+    headers: Dict[str, str] = {"ETag": etag, "Cache-Control": IMMUTABLE}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+@router.get("/{photo_id}/thumbnail")
+async def get_photo_thumbnail(photo_id: str, request: Request, size: Optional[int] = None):
+    """JPEG thumbnail, rendered on first request and cached on disk"""
+    size = size or settings.IMAGE_THUMBNAIL_DEFAULT_SIZE
+    if size not in image_processor.thumbnail_sizes:
+        raise HTTPException(status_code=400, detail=f"size must be one of {image_processor.thumbnail_sizes}")
+    
+    # A revalidation only skips rendering, not the check that the photo exists
+    try:
+        exists = photo_store.exists(photo_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid photo id")
+    if not exists:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    
+    etag = f'"{photo_id}-t{size}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": IMMUTABLE})
+    
+    try:
+        path = await image_processor.thumbnail(photo_id, size)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid photo id")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    except UnsupportedImageError:
+        raise HTTPException(status_code=415, detail="Unsupported image format")
+    
+    return _immutable_file(request, path, etag, "image/jpeg")
+
+@router.get("/{photo_id}")
+async def get_photo(photo_id: str, request: Request):
+    try:
+        path = photo_store.path(photo_id)
+        mime_type = photo_store.mime_type(photo_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid photo id")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    
+    return _immutable_file(request, path, f'"{photo_id}"', mime_type)
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import cached_response, response_cache
 from app.core.database import get_db
 from app.models.models import Property, HotelGroup
 from app.schemas.schemas import PropertyCreate, PropertyResponse
@@ -7,40 +9,12 @@ from typing import List, Optional
 
 router = APIRouter()
 
-@router.get("/", response_model=List[PropertyResponse])
-async def get_properties(
-    hotel_group_id: Optional[int] = None,
-    db: Session = Depends(get_db)
-):
-    query = db.query(Property)
-    
-    if hotel_group_id:
-        query = query.filter(Property.hotel_group_id == hotel_group_id)
-    
-    properties = query.order_by(Property.name).all()
-    
-    result = []
-    for prop in properties:
-        result.append({
-            "id": prop.id,
-            "name": prop.name,
-            "location": prop.location,
-            "hotel_group_id": prop.hotel_group_id,
-            "manager_name": prop.manager_name,
-            "manager_email": prop.manager_email,
-            "phone": prop.phone,
-            "created_at": prop.created_at
-        })
-    
-    return result
+LIST_CACHE = "properties:list"
 
-@router.get("/{property_id}", response_model=PropertyResponse)
-async def get_property(property_id: int, db: Session = Depends(get_db)):
-    prop = db.query(Property).filter(Property.id == property_id).first()
-    
-    if not prop:
-        raise HTTPException(status_code=404, detail="Property not found")
-    
+def _detail_cache(property_id: int) -> str:
+    return f"properties:{property_id}"
+
+def serialize_property(prop: Property) -> dict:
     return {
         "id": prop.id,
         "name": prop.name,
@@ -52,10 +26,39 @@ async def get_property(property_id: int, db: Session = Depends(get_db)):
         "created_at": prop.created_at
     }
 
+@router.get("/", response_model=List[PropertyResponse])
+async def get_properties(
+    request: Request,
+    hotel_group_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    async def load():
+        query = select(Property)
+        
+        if hotel_group_id:
+            query = query.where(Property.hotel_group_id == hotel_group_id)
+        
+        properties = (await db.scalars(query.order_by(Property.name))).all()
+        return [serialize_property(prop) for prop in properties]
+    
+    return await cached_response(request, LIST_CACHE, f"hotel_group_id={hotel_group_id}", load)
+
+@router.get("/{property_id}", response_model=PropertyResponse)
+async def get_property(property_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    async def load():
+        prop = await db.get(Property, property_id)
+        
+        if not prop:
+            raise HTTPException(status_code=404, detail="Property not found")
+        
+        return serialize_property(prop)
+    
+    return await cached_response(request, _detail_cache(property_id), "", load)
+
 @router.post("/", response_model=PropertyResponse, status_code=status.HTTP_201_CREATED)
-async def create_property(property_data: PropertyCreate, db: Session = Depends(get_db)):
+async def create_property(property_data: PropertyCreate, db: AsyncSession = Depends(get_db)):
     # Check if hotel group exists
-    hotel_group = db.query(HotelGroup).filter(HotelGroup.id == property_data.hotel_group_id).first()
+    hotel_group = await db.get(HotelGroup, property_data.hotel_group_id)
     if not hotel_group:
         raise HTTPException(status_code=404, detail="Hotel group not found")
     
@@ -70,16 +73,8 @@ async def create_property(property_data: PropertyCreate, db: Session = Depends(g
     )
     
     db.add(new_property)
-    db.commit()
-    db.refresh(new_property)
+    await db.commit()
+    await db.refresh(new_property)
+    response_cache.invalidate(LIST_CACHE)
     
-    return {
-        "id": new_property.id,
-        "name": new_property.name,
-        "location": new_property.location,
-        "hotel_group_id": new_property.hotel_group_id,
-        "manager_name": new_property.manager_name,
-        "manager_email": new_property.manager_email,
-        "phone": new_property.phone,
-        "created_at": new_property.created_at
-    }
\ No newline at end of file
+    return serialize_property(new_property)
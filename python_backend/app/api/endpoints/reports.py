@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from app.core.cache import etag_matches
+from app.services.report_render import REPORT_FORMATS
+from app.services.report_service import report_store
+
+router = APIRouter()
+
+# A report URL embeds the key of the audit state it was built from, so it
+# never changes; reports are not public, so only the browser may cache them
+IMMUTABLE_PRIVATE = "private, max-age=31536000, immutable"
+
+@router.get("/{audit_id}/{filename}")
+async def get_report(audit_id: int, filename: str, request: Request):
+    """Download a report built by ``POST /ai/generate-report``"""
+    found = report_store.find(audit_id, filename)
+    
+    if not found:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    path, fmt = found
+    etag = f'"{filename}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_PRIVATE}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(
+        path,
+        media_type=REPORT_FORMATS[fmt],
+        filename=f"audit_{audit_id}_report.{fmt}",
+        headers=headers,
+    )
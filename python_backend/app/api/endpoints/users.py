@@ -1,49 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import cached_response, response_cache
 from app.core.database import get_db
+from app.core.security import password_hasher, token_verifier
 from app.models.models import User
 from app.schemas.schemas import UserCreate, UserResponse
 from typing import List, Optional
-import hashlib
 
 router = APIRouter()
 
-def get_password_hash_simple(password: str) -> str:
-    """Simple password hashing for demo purposes"""
-    return hashlib.sha256(password.encode()).hexdigest()
+LIST_CACHE = "users:list"
 
-@router.get("/", response_model=List[UserResponse])
-async def get_users(
-    role: Optional[str] = None,
-    db: Session = Depends(get_db)
-):
-    query = db.query(User)
-    
-    if role:
-        query = query.filter(User.role == role)
-    
-    users = query.order_by(User.name).all()
-    
-    result = []
-    for user in users:
-        result.append({
-            "id": user.id,
-            "username": user.username,
-            "role": user.role,
-            "name": user.name,
-            "email": user.email,
-            "created_at": user.created_at
-        })
-    
-    return result
+def _detail_cache(user_id: int) -> str:
+    return f"users:{user_id}"
 
-@router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
+def serialize_user(user: User) -> dict:
     return {
         "id": user.id,
         "username": user.username,
@@ -53,42 +25,65 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
         "created_at": user.created_at
     }
 
+@router.get("/", response_model=List[UserResponse])
+async def get_users(
+    request: Request,
+    role: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    async def load():
+        query = select(User)
+        
+        if role:
+            query = query.where(User.role == role)
+        
+        users = (await db.scalars(query.order_by(User.name))).all()
+        return [serialize_user(user) for user in users]
+    
+    return await cached_response(request, LIST_CACHE, f"role={role}", load)
+
+@router.get("/{user_id}", response_model=UserResponse)
+async def get_user(user_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    async def load():
+        user = await db.get(User, user_id)
+        
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        return serialize_user(user)
+    
+    return await cached_response(request, _detail_cache(user_id), "", load)
+
 @router.post("/", response_model=UserResponse)
-async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if username already exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    existing_user = await db.scalar(select(User).where(User.username == user_data.username))
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already exists")
     
     # Check if email already exists
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
+    existing_email = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_email:
         raise HTTPException(status_code=400, detail="Email already exists")
     
     user = User(
         username=user_data.username,
-        password=get_password_hash_simple(user_data.password),
+        password=await password_hasher.hash(user_data.password),
         role=user_data.role,
         name=user_data.name,
         email=user_data.email
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    response_cache.invalidate(LIST_CACHE)
     
-    return {
-        "id": user.id,
-        "username": user.username,
-        "role": user.role,
-        "name": user.name,
-        "email": user.email,
-        "created_at": user.created_at
-    }
+    return serialize_user(user)
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(user_id: int, user_updates: dict, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def update_user(user_id: int, user_updates: dict, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -96,18 +91,14 @@ async def update_user(user_id: int, user_updates: dict, db: Session = Depends(ge
     # Update fields
     for field, value in user_updates.items():
         if field == "password" and value:
-            setattr(user, field, get_password_hash_simple(value))
+            setattr(user, field, await password_hasher.hash(value))
         elif hasattr(user, field) and value is not None:
             setattr(user, field, value)
     
-    db.commit()
-    db.refresh(user)
+    # Tokens embed the role, name and email, and a new password must end
+    # existing sessions: revoke the user's tokens (this commits the update)
+    await token_verifier.revoke_user(db, user_id)
+    await db.refresh(user)
+    response_cache.invalidate(LIST_CACHE, _detail_cache(user_id))
     
-    return {
-        "id": user.id,
-        "username": user.username,
-        "role": user.role,
-        "name": user.name,
-        "email": user.email,
-        "created_at": user.created_at
-    }
\ No newline at end of file
+    return serialize_user(user)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import auth, properties, audits, ai, users, hotel_groups
+from app.api.endpoints import auth, properties, audits, ai, users, hotel_groups, photos, reports, analytics, admin, events
 
 api_router = APIRouter()
 
@@ -9,3 +9,8 @@ api_router.include_router(hotel_groups.router, prefix="/hotel-groups", tags=["ho
 api_router.include_router(properties.router, prefix="/properties", tags=["properties"])
 api_router.include_router(audits.router, prefix="/audits", tags=["audits"])
 api_router.include_router(ai.router, prefix="/ai", tags=["ai"])
+api_router.include_router(photos.router, prefix="/photos", tags=["photos"])
+api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
@@ -0,0 +1,224 @@
+"""
+In-process response cache with shared, write-through invalidation
+
+Cached entries live in a per-worker TTL+LRU map. Every entry is tagged with the
+version of its namespace at the time it was stored; write handlers bump that
+version through a CacheBackend, so any worker sharing the backend treats older
+entries as misses on its next read.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+
+class TTLCache:
+    """Bounded LRU map whose entries also expire after ttl seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheBackend:
+    """Shared namespace versions; bumping one invalidates it in every worker"""
+
+    def version(self, namespace: str) -> str:
+        raise NotImplementedError
+
+    def bump(self, namespace: str) -> str:
+        raise NotImplementedError
+
+
+class LocalCacheBackend(CacheBackend):
+    """Versions kept in this process only (single worker)"""
+
+    def __init__(self):
+        self._versions: Dict[str, str] = {}
+
+    def version(self, namespace: str) -> str:
+        return self._versions.get(namespace, "0")
+
+    def bump(self, namespace: str) -> str:
+        token = os.urandom(8).hex()
+        self._versions[namespace] = token
+        return token
+
+
+class FileCacheBackend(CacheBackend):
+    """Versions kept as small files in a directory shared by all workers.
+
+    A stand-in for a network store such as Redis: each bump writes a fresh
+    random token atomically, so concurrent bumps can never leave a worker
+    holding a version it already cached under.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, namespace: str) -> str:
+        return os.path.join(self.directory, namespace.replace(":", "__").replace("/", "_"))
+
+    def version(self, namespace: str) -> str:
+        try:
+            with open(self._path(namespace)) as handle:
+                return handle.read()
+        except FileNotFoundError:
+            return "0"
+
+    def bump(self, namespace: str) -> str:
+        token = os.urandom(8).hex()
+        path = self._path(namespace)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as handle:
+            handle.write(token)
+        os.replace(tmp_path, path)
+        return token
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    version: str
+
+
+class ResponseCache:
+    """Serialized JSON responses keyed by (namespace, key)"""
+
+    def __init__(self, backend: CacheBackend, maxsize: int, ttl: float):
+        self.backend = backend
+        self.entries = TTLCache(maxsize, ttl)
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def get(self, namespace: str, key: str) -> Optional[CachedResponse]:
+        entry = self.entries.get((namespace, key))
+        if entry is not None and entry.version == self.backend.version(namespace):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def put(self, namespace: str, key: str, payload: Any, version: Optional[str] = None) -> CachedResponse:
+        """Store payload; pass the namespace version read *before* loading it"""
+        if version is None:
+            version = self.backend.version(namespace)
+        body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+        entry = CachedResponse(body=body, etag=make_etag(body), version=version)
+        self.entries.set((namespace, key), entry)
+        return entry
+
+    def invalidate(self, *namespaces: str):
+        """Drop every entry stored under the given namespaces, in all workers"""
+        for namespace in namespaces:
+            self.backend.bump(namespace)
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+            "entries": len(self.entries),
+        }
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match header covers etag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def json_response(
+    request: Request,
+    body: bytes,
+    etag: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """A serialized JSON body with an ETag (its hash unless given); a matching If-None-Match gets an empty 304"""
+    headers = {**(headers or {}), "ETag": etag or make_etag(body), "Cache-Control": "private, no-cache"}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _build_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "file":
+        return FileCacheBackend(settings.CACHE_DIR)
+    return LocalCacheBackend()
+
+
+response_cache = ResponseCache(_build_backend(), settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+
+
+async def cached_response(
+    request: Request,
+    namespace: str,
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+) -> Response:
+    """Serve a JSON payload from the response cache, loading it on a miss.
+
+    Responses carry an ETag; a matching If-None-Match gets an empty 304.
+    """
+    entry = response_cache.get(namespace, key)
+    if entry is None:
+        # Read the version first so a write that lands while we load leaves
+        # this entry already stale rather than cached as current
+        version = response_cache.backend.version(namespace)
+        entry = response_cache.put(namespace, key, await loader(), version)
+
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, entry.etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
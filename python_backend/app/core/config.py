@@ -17,13 +17,153 @@ class Settings(BaseSettings):
     def database_url(self) -> str:
         return self.DATABASE_URL
     
+    # Connection pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    
+    # SQLite performance profile, applied to every new connection
+    SQLITE_PERFORMANCE_PROFILE: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE: int = -64000  # negative values are KiB, i.e. 64 MB
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MB
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    
+    # Response cache for the small, rarely changing list/detail endpoints.
+    # "local" keeps invalidation state per process; "file" shares it between
+    # workers through CACHE_DIR.
+    CACHE_BACKEND: str = "local"
+    CACHE_DIR: str = "./.cache/response_cache"
+    CACHE_TTL_SECONDS: float = 300.0
+    CACHE_MAX_ENTRIES: int = 1024
+    
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-hotel-audit-2024")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    TOKEN_VERIFY_CACHE_SIZE: int = 10000
+    
+    # Password hashing (bcrypt, verified in a thread pool off the event loop)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_VERIFY_CACHE_SIZE: int = 1024
+    PASSWORD_VERIFY_CACHE_TTL_SECONDS: float = 600.0
+    LOGIN_MAX_FAILURES: int = 5
+    LOGIN_FAILURE_WINDOW_SECONDS: float = 300.0
     
     # Gemini AI
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+    GEMINI_MODEL: str = "gemini-1.5-flash"
+    GEMINI_BASE_URL: str = ""  # REST endpoint override (proxy or local fake server)
+    GEMINI_MAX_CONCURRENCY: int = 8
+    GEMINI_TIMEOUT_SECONDS: float = 30.0
+    GEMINI_CACHE_SIZE: int = 512
+    GEMINI_CACHE_TTL_SECONDS: float = 3600.0
+    
+    # Uploaded photos, stored by SHA-256 of their content
+    PHOTO_STORAGE_DIR: str = "./storage/photos"
+    PHOTO_MAX_UPLOAD_BYTES: int = 25 * 1024 * 1024
+    
+    # Process pool for CPU-bound work (image rendering, reports)
+    PROCESS_POOL_WORKERS: int = 0  # 0 = one per CPU
+    
+    # Photo preprocessing (Pillow, on the process pool): photos are oriented,
+    # downsized and re-encoded before analysis; thumbnails for the dashboard.
+    # Rendered variants are cached on disk by source hash.
+    IMAGE_PREPROCESS_ENABLED: bool = True
+    IMAGE_ANALYSIS_MAX_EDGE: int = 1536
+    IMAGE_ANALYSIS_QUALITY: int = 85
+    IMAGE_THUMBNAIL_SIZES: List[int] = [160, 320, 640]
+    IMAGE_THUMBNAIL_DEFAULT_SIZE: int = 320
+    IMAGE_THUMBNAIL_QUALITY: int = 75
+    
+    # Generated reports, stored per audit under a key derived from the
+    # audit's last change, so an unchanged audit is served from disk
+    REPORT_STORAGE_DIR: str = "./storage/reports"
+    
+    # Weighted scoring from the shared audit checklist (reloaded when the
+    # file changes). AuditItem.score is read on a 0-SCORING_ITEM_SCALE scale;
+    # set it to 0 to read scores on each checklist item's own maxScore.
+    SCORING_CHECKLIST_PATH: str = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+        "shared", "auditChecklist.ts",
+    )
+    SCORING_ITEM_SCALE: float = 5.0
+    
+    # Compliance zones for portfolio analytics, by overall_score (0-100, as
+    # in the brand scoring criteria: 80+ good or better, 70-79 acceptable)
+    ANALYTICS_GREEN_MIN_SCORE: float = 80.0
+    ANALYTICS_AMBER_MIN_SCORE: float = 70.0
+    
+    # Background job queue (batch photo analysis, reports). Workers run in every API
+    # process and claim tasks from the jobs tables, so queued work survives
+    # restarts; results are written back in batches.
+    JOB_WORKERS: int = 8
+    JOB_CLAIM_BATCH: int = 16
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_FLUSH_BATCH: int = 25
+    JOB_FLUSH_INTERVAL_SECONDS: float = 0.5
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_LEASE_SECONDS: float = 300.0  # running tasks older than this are requeued
+    
+    # Change event stream (/api/events/audits). Audit and item writes record
+    # an event in their own transaction; each API process polls for new ones
+    # (at once after its own writes) and fans them out to its open streams.
+    # Events are kept EVENT_RETENTION_SECONDS so reconnecting clients can
+    # resume; a stream more than EVENT_SUBSCRIBER_BUFFER events behind is
+    # told to refetch instead. On databases other than SQLite an event id can
+    # commit after a higher one, so polls also re-read the events of the last
+    # EVENT_POLL_OVERLAP_SECONDS (more than a write transaction lasts).
+    EVENT_POLL_INTERVAL_SECONDS: float = 0.5
+    EVENT_POLL_BATCH: int = 500
+    EVENT_HEARTBEAT_SECONDS: float = 15.0
+    EVENT_SUBSCRIBER_BUFFER: int = 256
+    EVENT_REPLAY_LIMIT: int = 1000
+    EVENT_RETENTION_SECONDS: float = 3600.0
+    EVENT_RETRY_MS: int = 3000
+    EVENT_POLL_OVERLAP_SECONDS: float = 10.0
+    
+    # Delta sync (updated_since on the audit and item lists). A write's
+    # updated_at is taken before it gets the write lock and commits, so
+    # results reach back SYNC_OVERLAP_SECONDS (more than the busy timeout)
+    # before updated_since to catch writes still in flight at the last
+    # sync. Deleted items are reported for ITEM_TOMBSTONE_RETENTION_SECONDS;
+    # a client syncing from before that gets the full list again.
+    SYNC_OVERLAP_SECONDS: float = 10.0
+    ITEM_TOMBSTONE_RETENTION_SECONDS: float = 30 * 24 * 3600.0
+    
+    # Production launcher (serve.py): pre-forked uvicorn workers sharing one
+    # listening socket. Workers report to the master every heartbeat; one
+    # silent for WORKER_TIMEOUT_SECONDS is killed and replaced.
+    WEB_CONCURRENCY: int = 0  # 0 = one per CPU
+    WORKER_HEARTBEAT_SECONDS: float = 1.0
+    WORKER_TIMEOUT_SECONDS: float = 30.0
+    WORKER_GRACEFUL_TIMEOUT_SECONDS: float = 30.0
+    WORKER_STATUS_FILE: str = "./.run/workers.json"
+    
+    # Prometheus metrics at /metrics. With several workers each one writes a
+    # snapshot to METRICS_DIR every METRICS_FLUSH_SECONDS and a scrape sums
+    # them; empty reports this process only (serve.py sets it for workers).
+    METRICS_DIR: str = ""
+    METRICS_FLUSH_SECONDS: float = 1.0
+    HEALTH_DB_TIMEOUT_SECONDS: float = 2.0
+    
+    # Production debugging (app.core.diagnostics). Requests are profiled when
+    # they carry a signed X-Profile token or at PROFILER_SAMPLE_RATE (0-1);
+    # statements slower than SLOW_QUERY_MS (0 = off) are logged. Both keep
+    # their newest entries for /api/admin, shared through DIAGNOSTICS_DIR
+    # when set (serve.py sets it for several workers).
+    DIAGNOSTICS_DIR: str = ""
+    PROFILER_SAMPLE_RATE: float = 0.0
+    PROFILER_INTERVAL_MS: float = 5.0
+    PROFILER_MAX_SECONDS: float = 30.0
+    PROFILER_RING_SIZE: int = 50
+    PROFILE_TOKEN_TTL_SECONDS: float = 3600.0
+    SLOW_QUERY_MS: float = 200.0
+    SLOW_QUERY_RING_SIZE: int = 200
+    SLOW_QUERY_MAX_STATEMENT_CHARS: int = 2000
     
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
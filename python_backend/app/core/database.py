@@ -1,58 +1,196 @@
-from sqlalchemy import create_engine
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.models.models import Base
 from app.core.config import settings
+from app.core.diagnostics import record_slow_query
+from app.core.metrics import Gauge, db_query_duration, registry
 
-print(f"Database engine created successfully with SQLite")
-print(f"Database file: hotel_audit.db")
+logger = logging.getLogger(__name__)
 
-# Create engine for SQLite (simulating MS SQL Server structure)
-try:
-    if settings.database_url.startswith("sqlite"):
-        engine = create_engine(
-            settings.database_url,
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the SQLite performance profile to every new pooled connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}")
+    finally:
+        cursor.close()
+
+def build_engine(database_url: str, sqlite_profile: Optional[bool] = None):
+    """Create a sync engine; SQLite gets the performance profile unless disabled"""
+    if sqlite_profile is None:
+        sqlite_profile = settings.SQLITE_PERFORMANCE_PROFILE
+    
+    if database_url.startswith("sqlite"):
+        new_engine = create_engine(
+            database_url,
             echo=False,  # Disable SQL logging for cleaner output
             connect_args={"check_same_thread": False},  # SQLite specific
+            # WAL lets many readers run alongside the single writer, so size
+            # the pool for concurrent dashboard reads
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
         )
-    else:
-        engine = create_engine(
-            settings.database_url,
-            echo=False,  # Disable SQL logging for cleaner output
-            pool_pre_ping=True,  # Verify connections before use
-            pool_recycle=3600,  # Recycle connections every hour
-        )
-    print("SQLite database engine created successfully!")
-except Exception as e:
-    print(f"Failed to create SQLite engine: {e}")
-    raise
+        if sqlite_profile:
+            event.listen(new_engine, "connect", _apply_sqlite_pragmas)
+        return new_engine
+    
+    return create_engine(
+        database_url,
+        echo=False,  # Disable SQL logging for cleaner output
+        pool_pre_ping=True,  # Verify connections before use
+        pool_recycle=3600,  # Recycle connections every hour
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+
+# Create engine for SQLite (simulating MS SQL Server structure)
+engine = build_engine(settings.database_url)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def async_database_url(database_url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (aiosqlite / asyncpg)"""
+    if database_url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + database_url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if database_url.startswith(prefix):
+            return "postgresql+asyncpg://" + database_url[len(prefix):]
+    return database_url
+
+def build_async_engine(database_url: str, sqlite_profile: Optional[bool] = None):
+    """Create the asyncio engine used by the API endpoints"""
+    if sqlite_profile is None:
+        sqlite_profile = settings.SQLITE_PERFORMANCE_PROFILE
+    
+    new_engine = create_async_engine(
+        async_database_url(database_url),
+        echo=False,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=not database_url.startswith("sqlite"),
+    )
+    if database_url.startswith("sqlite") and sqlite_profile:
+        event.listen(new_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return new_engine
+
+async_engine = build_async_engine(settings.database_url)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+class QueryStats:
+    """SQL statements executed, and time spent in them, while tracking is active"""
+    __slots__ = ("count", "duration", "scope")
+
+    def __init__(self, scope=None):
+        self.count = 0
+        self.duration = 0.0
+        self.scope = scope  # ASGI scope of the request, for the slow-query log
+
+_current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+@contextmanager
+def track_queries(scope=None):
+    """Count the statements executed in the current context (e.g. one request)"""
+    stats = QueryStats(scope)
+    token = _current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_query_stats.reset(token)
+
+STATEMENT_KINDS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA", "BEGIN", "COMMIT", "ROLLBACK"}
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _time_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current_query_stats.get()
+    if stats is not None:
+        stats.duration += elapsed
+    if 0 < settings.SLOW_QUERY_MS <= elapsed * 1000:
+        record_slow_query(statement, parameters, executemany, elapsed, stats.scope if stats is not None else None)
+    kind = statement.lstrip()[:8].split(None, 1)[0].upper() if statement.strip() else ""
+    db_query_duration.observe(kind if kind in STATEMENT_KINDS else "OTHER", value=elapsed)
+
+def _discard_timing(context):
+    # A failed statement never reaches after_cursor_execute
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, "before_cursor_execute", _count_query)
+    event.listen(_engine, "after_cursor_execute", _time_query)
+    event.listen(_engine, "handle_error", _discard_timing)
+
+def pool_status() -> dict:
+    """Connection counts of the API's (async) engine pool"""
+    pool = async_engine.sync_engine.pool
+    return {
+        "size": pool.size() if hasattr(pool, "size") else None,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else 0,
+        "idle": pool.checkedin() if hasattr(pool, "checkedin") else 0,
+        "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0,
+    }
+
+def _pool_connections():
+    status = pool_status()
+    return {("checked_out",): status["checked_out"], ("idle",): status["idle"]}
+
+registry.register(Gauge(
+    "db_pool_connections", "API database pool connections by state", ("state",), collect=_pool_connections,
+))
+
+async def probe_database(timeout: float) -> float:
+    """Run SELECT 1 on a pooled connection; returns the round trip in seconds"""
+    started = time.perf_counter()
+
+    async def probe():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.wait_for(probe(), timeout)
+    return time.perf_counter() - started
+
 def create_tables():
     """Create all tables using SQLAlchemy"""
     try:
         Base.metadata.create_all(bind=engine)
-        print("SQLite tables created successfully!")
+        logger.info("Database tables created")
     except Exception as e:
-        print(f"Error creating SQLite tables: {e}")
+        logger.error(f"Error creating database tables: {e}")
         raise
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 def test_connection():
     """Test the SQLite database connection"""
     try:
         from sqlalchemy import text
         with engine.connect() as connection:
-            result = connection.execute(text("SELECT 1"))
-            print(f"SQLite connection test successful: {result.fetchone()}")
+            connection.execute(text("SELECT 1"))
             return True
     except Exception as e:
-        print(f"SQLite connection test failed: {e}")
+        logger.error(f"Database connection test failed: {e}")
         return False
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""
+Production debugging aids: an opt-in sampling profiler and a slow-query log
+
+A request is profiled when it carries a valid X-Profile token (see
+profile_token(); `python manage.py profile-token` or POST
+/api/admin/profile-token mints one), or at random at PROFILER_SAMPLE_RATE.
+While a profiled request runs, a sampler thread records its stack every
+PROFILER_INTERVAL_MS: the live stack when its task is running, and the
+chain of awaits it is suspended in otherwise, so the profile shows wall
+time including database and model waits. Profiles are kept as collapsed
+stacks ("frame;frame;frame count", the input format of flamegraph.pl,
+speedscope and inferno) in a ring buffer read through /api/admin/profiles.
+
+SQL statements slower than SLOW_QUERY_MS are logged with the shape of their
+parameters (types only, never values) and the endpoint that ran them, and
+kept in a second ring buffer at /api/admin/slow-queries.
+
+With DIAGNOSTICS_DIR set (serve.py does for several workers) both ring
+buffers are shared through files in that directory; otherwise they hold
+this process's entries only. With no token and a zero sample rate a
+request pays for one scan of its header names.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.slow_query")
+
+PROFILE_HEADER = b"x-profile"
+
+
+def profile_token(ttl_seconds: float) -> str:
+    """A value for the X-Profile header, valid for ttl_seconds"""
+    expires = int(time.time() + ttl_seconds)
+    return f"{expires}.{_sign(str(expires))}"
+
+def _sign(message: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), b"profile:" + message.encode(), hashlib.sha256).hexdigest()
+
+def verify_profile_token(token: str) -> bool:
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _sign(expires))
+
+def should_profile(scope) -> bool:
+    rate = settings.PROFILER_SAMPLE_RATE
+    if rate > 0 and random.random() < rate:
+        return True
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return verify_profile_token(value.decode("latin-1"))
+    return False
+
+
+class RingLog:
+    """The newest `size` entries of a diagnostics log.
+
+    Entries live in this process, or as one JSON file each under
+    DIAGNOSTICS_DIR/<name> when that is set, so every worker sees them.
+    """
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=size)
+
+    def _directory(self) -> Optional[str]:
+        return os.path.join(settings.DIAGNOSTICS_DIR, self.name) if settings.DIAGNOSTICS_DIR else None
+
+    def add(self, entry: Dict[str, Any]):
+        directory = self._directory()
+        if directory is None:
+            self._entries.append(entry)
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{time.time_ns()}-{entry['id']}.json")
+            with open(path + ".tmp", "w", encoding="utf-8") as handle:
+                json.dump(entry, handle)
+            os.replace(path + ".tmp", path)
+            for stale in self._filenames(directory)[:-self.size]:
+                os.unlink(os.path.join(directory, stale))
+        except OSError as e:
+            logger.warning(f"Could not write {self.name} entry: {e}")
+
+    @staticmethod
+    def _filenames(directory: str) -> List[str]:
+        return sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Newest first"""
+        directory = self._directory()
+        if directory is None:
+            return list(reversed(self._entries))
+        if not os.path.isdir(directory):
+            return []
+        entries = []
+        for filename in reversed(self._filenames(directory)):
+            try:
+                with open(os.path.join(directory, filename), encoding="utf-8") as handle:
+                    entries.append(json.load(handle))
+            except (OSError, ValueError):
+                continue  # pruned by another worker
+        return entries
+
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        return next((entry for entry in self.entries() if entry["id"] == entry_id), None)
+
+
+_labels: Dict[Any, str] = {}
+
+def _frame_label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        # Paths relative to the longest sys.path entry holding them
+        filename = code.co_filename
+        root = max((root for root in sys.path if root and filename.startswith(root + os.sep)), key=len, default="")
+        filename = filename[len(root):].lstrip(os.sep)
+        label = _labels[code] = f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ",")
+    return label
+
+def _awaited_stack(task: asyncio.Task) -> List[str]:
+    """Frames of a suspended task, outermost first, down to what it awaits"""
+    labels = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        labels.append(_frame_label(frame.f_code))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    if awaitable is not None:
+        labels.append(f"[await {type(awaitable).__name__}]")
+    return labels
+
+def _running_stack(frame, root) -> List[str]:
+    """Frames of the running task, from its coroutine's frame to the leaf"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        if frame is root:
+            break
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class ProfileRun:
+    def __init__(self, task: asyncio.Task, loop: asyncio.AbstractEventLoop):
+        self.id = os.urandom(6).hex()
+        self.task = task
+        self.loop = loop
+        self.thread_id = threading.get_ident()
+        self.root = task.get_coro().cr_frame
+        self.stacks: Counter = Counter()
+        self.started = time.perf_counter()
+
+    def sample(self, frames):
+        if asyncio.current_task(self.loop) is self.task:
+            stack = _running_stack(frames.get(self.thread_id), self.root)
+        else:
+            stack = _awaited_stack(self.task)
+        if stack:
+            self.stacks[";".join(stack)] += 1
+
+
+class SamplingProfiler:
+    """Samples the stacks of the requests being profiled from one background thread"""
+
+    def __init__(self):
+        self._runs: Dict[int, ProfileRun] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> ProfileRun:
+        run = ProfileRun(asyncio.current_task(), asyncio.get_running_loop())
+        with self._lock:
+            self._runs[id(run)] = run
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_forever, name="request-profiler", daemon=True)
+                self._thread.start()
+        return run
+
+    def stop(self, run: ProfileRun) -> Counter:
+        with self._lock:
+            self._runs.pop(id(run), None)
+        return run.stacks
+
+    def _sample_forever(self):
+        interval = settings.PROFILER_INTERVAL_MS / 1000
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if not self._runs:
+                    self._thread = None
+                    return
+                runs = list(self._runs.values())
+            frames = sys._current_frames()
+            deadline = time.perf_counter() - settings.PROFILER_MAX_SECONDS
+            for run in runs:
+                if run.started < deadline:
+                    continue  # long-lived (streaming) request: keep what it has
+                try:
+                    run.sample(frames)
+                except Exception:
+                    # The task may finish between reading its state and walking it
+                    pass
+            del frames
+
+
+profiler = SamplingProfiler()
+profiles = RingLog("profiles", settings.PROFILER_RING_SIZE)
+slow_queries = RingLog("slow_queries", settings.SLOW_QUERY_RING_SIZE)
+
+def save_profile(run: ProfileRun, stacks: Counter, scope, status: int):
+    endpoint = scope.get("endpoint")
+    profiles.add({
+        "id": run.id,
+        "method": scope["method"],
+        "path": scope["path"],
+        "endpoint": getattr(endpoint, "__qualname__", None),
+        "status": status,
+        "duration_ms": round((time.perf_counter() - run.started) * 1000, 2),
+        "samples": sum(stacks.values()),
+        "interval_ms": settings.PROFILER_INTERVAL_MS,
+        "recorded_at": time.time(),
+        "worker_pid": os.getpid(),
+        "folded": "".join(f"{stack} {count}\n" for stack, count in stacks.most_common()),
+    })
+
+
+def _shape(parameters) -> str:
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+def parameter_shape(parameters, executemany: bool) -> str:
+    """Types of a statement's parameters, e.g. "(int, str)" or "25 x (int, str)" """
+    if executemany:
+        return f"{len(parameters)} x {_shape(parameters[0])}" if parameters else "0 x ()"
+    return _shape(parameters)
+
+def record_slow_query(statement: str, parameters, executemany: bool, elapsed: float, scope=None):
+    endpoint = "background"
+    if scope is not None:
+        handler = scope.get("endpoint")
+        endpoint = f"{scope['method']} {scope['path']}"
+        if handler is not None:
+            endpoint += f" ({handler.__qualname__})"
+    statement = " ".join(statement.split())
+    shape = parameter_shape(parameters, executemany)
+    slow_query_logger.warning(f"{elapsed * 1000:.1f} ms [{endpoint}] {statement[:500]} {shape}")
+    slow_queries.add({
+        "id": os.urandom(6).hex(),
+        "duration_ms": round(elapsed * 1000, 2),
+        "statement": statement[:settings.SLOW_QUERY_MAX_STATEMENT_CHARS],
+        "parameters": shape,
+        "endpoint": endpoint,
+        "recorded_at": time.time(),
+        "worker_pid": os.getpid(),
+    })
@@ -0,0 +1,240 @@
+"""
+Prometheus metrics for the API, served in text format at /metrics
+
+Counters, gauges and histograms live in this process. Under serve.py each
+worker also writes a snapshot to METRICS_DIR every METRICS_FLUSH_SECONDS,
+and /metrics sums the snapshots of all workers (its own taken fresh), so a
+scrape sees the whole server whichever worker answers it.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Request and query latencies: 1 ms to 10 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Model calls are slower: 50 ms to 60 s
+GEMINI_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[LabelValues, object] = {}
+
+    def snapshot(self) -> Dict[LabelValues, object]:
+        return self.values
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+    def lines(self, values) -> Iterable[str]:
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}"
+
+class Gauge(Counter):
+    """A value that goes up and down; summed across workers"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def set(self, *labels: str, value: float):
+        self.values[labels] = value
+
+    def snapshot(self):
+        return self.collect() if self.collect is not None else self.values
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labels: str, value: float):
+        # [per-bucket counts..., +Inf count, sum]
+        state = self.values.get(labels)
+        if state is None:
+            state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        else:
+            state[len(self.buckets)] += 1
+        state[-1] += value
+
+    @staticmethod
+    def merge(a, b):
+        return [x + y for x, y in zip(a, b)]
+
+    def lines(self, values) -> Iterable[str]:
+        for labels, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_format_value(state[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, List]:
+        return {name: [[list(labels), value] for labels, value in metric.snapshot().items()]
+                for name, metric in self.metrics.items()}
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(settings.METRICS_DIR, f"{pid}.json")
+
+    def write_snapshot(self):
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        with open(path + ".tmp", "w", encoding="utf-8") as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(path + ".tmp", path)
+
+    def _snapshots(self) -> List[Dict[str, List]]:
+        snapshots = [self.snapshot()]
+        if not settings.METRICS_DIR or not os.path.isdir(settings.METRICS_DIR):
+            return snapshots
+        for filename in os.listdir(settings.METRICS_DIR):
+            pid, _, extension = filename.partition(".")
+            if extension != "json" or not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                with open(os.path.join(settings.METRICS_DIR, filename), encoding="utf-8") as handle:
+                    snapshot = json.load(handle)
+            except (OSError, ValueError):
+                continue  # being replaced
+            if not _alive(int(pid)):
+                # Counts of a replaced worker still add up; its gauges no longer do
+                snapshot = {name: entries for name, entries in snapshot.items()
+                            if name in self.metrics and self.metrics[name].kind != "gauge"}
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format (version 0.0.4)"""
+        merged: Dict[str, Dict[LabelValues, object]] = {name: {} for name in self.metrics}
+        for snapshot in self._snapshots():
+            for name, entries in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                for labels, value in entries:
+                    labels = tuple(labels)
+                    current = merged[name].get(labels)
+                    merged[name][labels] = value if current is None else metric.merge(current, value)
+        out = []
+        for name, metric in self.metrics.items():
+            out.append(f"# HELP {name} {metric.help}")
+            out.append(f"# TYPE {name} {metric.kind}")
+            out.extend(metric.lines(merged[name]))
+        return "\n".join(out) + "\n"
+
+    async def _flush_forever(self):
+        while True:
+            await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def start(self):
+        """Share this worker's metrics through METRICS_DIR, if set"""
+        if settings.METRICS_DIR and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_forever())
+
+    async def stop(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+            if settings.METRICS_DIR:
+                self.write_snapshot()
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"),
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"),
+))
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", (),
+))
+db_queries_per_request = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ("method", "route"), QUERY_COUNT_BUCKETS,
+))
+db_time_per_request = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per HTTP request", ("method", "route"),
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement execution time by statement kind", ("statement",),
+))
+gemini_call_duration = registry.register(Histogram(
+    "gemini_call_duration_seconds", "Gemini generateContent latency by outcome", ("outcome",), GEMINI_BUCKETS,
+))
+gemini_requests = registry.register(Counter(
+    "gemini_requests_total", "Gemini requests by how they were served (call, cache_hit, coalesced)", ("source",),
+))
+
+def observe_gemini_call(outcome: str, started: float):
+    gemini_call_duration.observe(outcome, value=time.perf_counter() - started)
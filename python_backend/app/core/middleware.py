@@ -0,0 +1,94 @@
+"""
+ASGI middleware for the API application
+"""
+
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from app.core.database import track_queries
+from app.core.diagnostics import profiler, save_profile, should_profile
+from app.core.metrics import (
+    db_queries_per_request, db_time_per_request, http_request_duration, http_requests, http_requests_in_progress,
+)
+
+
+def _route_template(scope) -> str:
+    # Routes of included routers are matched in place, so scope["route"].path
+    # lacks the router prefixes; FastAPI keeps the full template on the
+    # effective route it selected
+    effective = scope.get("fastapi", {}).get("effective_route_context")
+    template = getattr(effective, "path_format", None) or getattr(scope.get("route"), "path", None)
+    return template or "unmatched"
+
+class RequestMetricsMiddleware:
+    """Time each request and count its SQL statements.
+
+    Results go to the Prometheus metrics, labelled by route template
+    (/api/audits/{audit_id}, not the concrete path), and back to the caller
+    in X-Query-Count and Server-Timing headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        http_requests_in_progress.inc(amount=1)
+        with track_queries(scope) as stats:
+            async def send_with_stats(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Query-Count"] = str(stats.count)
+                    headers["Server-Timing"] = (
+                        f"db;dur={stats.duration * 1000:.1f}, app;dur={(time.perf_counter() - started) * 1000:.1f}"
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                http_requests_in_progress.inc(amount=-1)
+                labels = (scope["method"], _route_template(scope))
+                http_requests.inc(*labels, str(status))
+                http_request_duration.observe(*labels, value=time.perf_counter() - started)
+                db_queries_per_request.observe(*labels, value=stats.count)
+                db_time_per_request.observe(*labels, value=stats.duration)
+
+
+class ProfilingMiddleware:
+    """Run the sampling profiler over requests that ask for it (see app.core.diagnostics).
+
+    A profiled response carries X-Profile-Id, the id to fetch the profile
+    by from /api/admin/profiles.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        run = profiler.start()
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = run.id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            save_profile(run, profiler.stop(run), scope, status)
@@ -0,0 +1,39 @@
+"""
+Shared process pool for CPU-bound work (image rendering, report building)
+
+Started on first use. Children come from a forkserver rather than a fork of
+the API process, so they do not inherit its event loop, thread pools or
+database connections. Functions sent to the pool should live in modules
+that import little beyond the standard library.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+class ProcessPool:
+    def __init__(self, workers: int):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Global instance
+cpu_pool = ProcessPool(settings.PROCESS_POOL_WORKERS)
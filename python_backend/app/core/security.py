@@ -1,21 +1,222 @@
+import asyncio
 import hashlib
-from datetime import datetime, timedelta
-from typing import Optional
+import hmac
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from jose import JWTError, jwt
+from passlib.context import CryptContext
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import CacheBackend, LocalCacheBackend, TTLCache, response_cache
+from app.core.config import settings
+from app.core.database import async_engine
+from app.models.models import LoginAttempt, User
+
+# bcrypt for new hashes; bare SHA-256 hex digests from earlier releases still
+# verify but are flagged for an upgrade on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt", "hex_sha256"],
+    deprecated=["hex_sha256"],
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
+
+class PasswordHasher:
+    """Password hashing service that keeps the KDF off the event loop.
+
+    Hashing and verification run in a bounded thread pool (bcrypt releases
+    the GIL). Successful verifications are remembered for a short time as an
+    HMAC of (hash, password), so repeat logins skip the KDF without the
+    plaintext ever being stored.
+    """
+
+    def __init__(self, max_workers: int, cache_size: int, cache_ttl: float):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._verified = TTLCache(cache_size, cache_ttl)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # A pool started before a fork (serve.py --init-db seeds users in the
+        # master) has no threads in the child, so each process starts its own
+        if self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-kdf")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _cache_key(self, password: str, hashed_password: str) -> bytes:
+        message = hashed_password.encode() + b"\0" + password.encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).digest()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Verify a password; returns (valid, replacement hash or None).
+
+        A replacement hash is returned when the stored hash uses a deprecated
+        scheme (legacy SHA-256) and should be written back.
+        """
+        if not hashed_password:
+            await self._run(pwd_context.dummy_verify)
+            return False, None
+
+        cache_key = self._cache_key(password, hashed_password)
+        if self._verified.get(cache_key):
+            return True, None
+
+        valid, new_hash = await self._run(pwd_context.verify_and_update, password, hashed_password)
+        if valid and new_hash is None:
+            self._verified.set(cache_key, True)
+        return valid, new_hash
+
+class LoginRateLimiter:
+    """Sliding-window limit on failed logins per username, shared by all workers.
+
+    Attempts are rows in login_attempts. Each is committed before the
+    password is checked, so guesses running concurrently count against the
+    limit too; a success deletes the username's rows, so what remains are
+    failures (and attempts still in progress). Rows leave only by expiring,
+    however many usernames are tried.
+    """
+
+    def __init__(self, max_failures: int, window_seconds: float):
+        self.max_failures = max_failures
+        self.window_seconds = window_seconds
+
+    async def reserve(self, username: str) -> int:
+        """Record an attempt by username; returns 0, or the seconds to wait if it is limited"""
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=self.window_seconds)
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(LoginAttempt).where(LoginAttempt.attempted_at < cutoff))
+            result = await conn.execute(insert(LoginAttempt).values(username=username, attempted_at=now))
+            attempt_id = result.inserted_primary_key[0]
+        async with async_engine.connect() as conn:
+            count, oldest = (await conn.execute(
+                select(func.count(), func.min(LoginAttempt.attempted_at))
+                .where(LoginAttempt.username == username, LoginAttempt.attempted_at >= cutoff)
+            )).one()
+        if count <= self.max_failures:
+            return 0
+        # Turned away: not an attempt, or a limited client could keep itself locked out
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(LoginAttempt).where(LoginAttempt.id == attempt_id))
+        return max(1, int((oldest - cutoff).total_seconds()) + 1)
+
+    async def reset(self, username: str):
+        """Forget username's attempts after a successful login"""
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(LoginAttempt).where(LoginAttempt.username == username))
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_VERIFY_CACHE_SIZE,
+    settings.PASSWORD_VERIFY_CACHE_TTL_SECONDS,
+)
+login_rate_limiter = LoginRateLimiter(settings.LOGIN_MAX_FAILURES, settings.LOGIN_FAILURE_WINDOW_SECONDS)
 
 def get_password_hash(password: str) -> str:
-    """Simple password hashing for demo purposes"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash a password (blocking; request handlers should use password_hasher)"""
+    return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Simple password verification for demo purposes"""
-    return get_password_hash(plain_password) == hashed_password
+    """Verify a password (blocking; request handlers should use password_hasher)"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+class InvalidTokenError(Exception):
+    """Raised when an access token is malformed, forged, expired or revoked"""
+
+class TokenVerifier:
+    """Verify HMAC-signed access tokens, almost never touching the database.
+
+    Tokens that verified recently are kept in a bounded LRU, so the common
+    case is one dict lookup plus expiry and revocation checks. Each token
+    carries its user's token version ("ver"), stored in users.token_version;
+    logging out or changing the user increments it, which revokes every token
+    issued before. Each process caches the versions it has read, tagged with
+    the user's namespace version in the cache backend shared by all workers;
+    a revocation bumps that too, so every worker reads the new version once.
+    A restart starts from the stored versions, so it cannot revive a token.
+    """
+
+    def __init__(
+        self,
+        secret_key: str,
+        algorithm: str,
+        cache_size: int,
+        cache_ttl: float,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.backend = backend or LocalCacheBackend()
+        self._verified = TTLCache(cache_size, cache_ttl)
+        self._versions = TTLCache(cache_size, cache_ttl)
+
+    async def user_version(self, user_id: int) -> Optional[int]:
+        """user_id's current token version; None if there is no such user"""
+        # Read the marker before the database, so a revocation in between
+        # leaves a stale marker and the next call reads the database again
+        marker = self.backend.version(f"auth:user:{user_id}")
+        cached = self._versions.get(user_id)
+        if cached is not None and cached[0] == marker:
+            return cached[1]
+        async with async_engine.connect() as conn:
+            version = await conn.scalar(select(User.token_version).where(User.id == user_id))
+        self._versions.set(user_id, (marker, version))
+        return version
+
+    async def revoke_user(self, db: AsyncSession, user_id: int):
+        """Invalidate every token issued to user_id so far; commits db"""
+        await db.execute(
+            update(User).where(User.id == user_id).values(token_version=User.token_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        self.backend.bump(f"auth:user:{user_id}")
+
+    async def verify(self, token: str) -> dict:
+        claims = self._verified.get(token)
+        if claims is None:
+            try:
+                claims = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            except JWTError as e:
+                raise InvalidTokenError(str(e))
+            self._verified.set(token, claims)
+        elif claims["exp"] <= time.time():
+            self._verified.pop(token)
+            raise InvalidTokenError("Signature has expired.")
+
+        version = await self.user_version(int(claims["sub"]))
+        if version is None or claims.get("ver") != version:
+            raise InvalidTokenError("Token has been revoked.")
+        return claims
+
+token_verifier = TokenVerifier(
+    settings.SECRET_KEY,
+    settings.ALGORITHM,
+    settings.TOKEN_VERIFY_CACHE_SIZE,
+    settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    response_cache.backend,
+)
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    """Create a simple access token (in a real app, use JWT)"""
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    """Create a signed access token carrying data as claims"""
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    return "simple_token_" + str(to_encode)
\ No newline at end of file
+    to_encode.update({
+        "iat": int(now.timestamp()),
+        "exp": int(expire.timestamp()),
+        "jti": secrets.token_urlsafe(12),
+    })
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
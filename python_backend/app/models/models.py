@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -7,6 +7,9 @@ Base = declarative_base()
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_role_name", "role", "name"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
@@ -14,6 +17,8 @@ class User(Base):
     role = Column(String(20), nullable=False)  # admin, auditor, reviewer, corporate, hotel_gm
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
+    # Carried in access tokens; incremented to revoke all of them
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -30,6 +35,9 @@ class HotelGroup(Base):
 
 class Property(Base):
     __tablename__ = "properties"
+    __table_args__ = (
+        Index("ix_properties_hotel_group_name", "hotel_group_id", "name"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -46,6 +54,20 @@ class Property(Base):
 
 class Audit(Base):
     __tablename__ = "audits"
+    # Match the get_audits filters, with and without status; each ends in
+    # created_at so the keyset ORDER BY (created_at, id) is served by the
+    # index (id is the rowid on SQLite, and spelled out where it matters)
+    __table_args__ = (
+        Index("ix_audits_created_at", "created_at"),
+        Index("ix_audits_status_created", "status", "created_at"),
+        Index("ix_audits_auditor_status_created", "auditor_id", "status", "created_at"),
+        Index("ix_audits_reviewer_status_created", "reviewer_id", "status", "created_at"),
+        Index("ix_audits_property_status_created", "property_id", "status", "created_at"),
+        Index("ix_audits_auditor_created", "auditor_id", "created_at", "id"),
+        Index("ix_audits_reviewer_created", "reviewer_id", "created_at", "id"),
+        Index("ix_audits_property_created", "property_id", "created_at", "id"),
+        Index("ix_audits_updated_at", "updated_at"),  # updated_since
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     property_id = Column(Integer, ForeignKey("properties.id"))
@@ -66,6 +88,10 @@ class Audit(Base):
 
 class AuditItem(Base):
     __tablename__ = "audit_items"
+    __table_args__ = (
+        Index("ix_audit_items_audit_category", "audit_id", "category"),
+        Index("ix_audit_items_audit_updated", "audit_id", "updated_at"),  # updated_since, sync ETag
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     audit_id = Column(Integer, ForeignKey("audits.id"))
@@ -83,4 +109,153 @@ class AuditItem(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    audit = relationship("Audit", back_populates="audit_items")
\ No newline at end of file
+    audit = relationship("Audit", back_populates="audit_items")
+
+class AuditItemTombstone(Base):
+    """A deleted audit item, reported to clients syncing the audit's items with updated_since"""
+    __tablename__ = "audit_item_tombstones"
+    __table_args__ = (
+        Index("ix_audit_item_tombstones_audit_deleted", "audit_id", "deleted_at"),
+    )
+    
+    audit_id = Column(Integer, ForeignKey("audits.id"), primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class Job(Base):
+    """A batch of background work (e.g. analysing every photo of an audit)"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_audit_created", "audit_id", "created_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)  # photo_analysis, report
+    audit_id = Column(Integer, ForeignKey("audits.id"), nullable=True)
+    status = Column(String(20), default="queued")  # queued, running, completed
+    total = Column(Integer, default=0)
+    completed = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    tasks = relationship("JobTask", back_populates="job")
+
+class JobTask(Base):
+    """One unit of a job, claimed and run by a queue worker"""
+    __tablename__ = "job_tasks"
+    # Workers claim the oldest queued tasks; progress reads go by job
+    __table_args__ = (
+        Index("ix_job_tasks_status_id", "status", "id"),
+        Index("ix_job_tasks_job_status", "job_id", "status"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
+    kind = Column(String(50), nullable=False)
+    audit_item_id = Column(Integer, ForeignKey("audit_items.id"), nullable=True)
+    status = Column(String(20), default="queued")  # queued, running, done, failed
+    attempts = Column(Integer, default=0)
+    payload = Column(Text, nullable=True)  # JSON input, cleared once the task finishes
+    result = Column(Text, nullable=True)  # JSON output
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    claimed_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    job = relationship("Job", back_populates="tasks")
+
+class LoginAttempt(Base):
+    """A login attempt within LOGIN_FAILURE_WINDOW_SECONDS; a success removes its username's rows"""
+    __tablename__ = "login_attempts"
+    __table_args__ = (
+        Index("ix_login_attempts_username_attempted", "username", "attempted_at"),
+        Index("ix_login_attempts_attempted_at", "attempted_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    username = Column(String(50), nullable=False)
+    attempted_at = Column(DateTime, nullable=False)
+
+class ChangeEvent(Base):
+    """An audit or audit item change, streamed to /api/events subscribers"""
+    __tablename__ = "change_events"
+    # AUTOINCREMENT: ids are the clients' resume cursors, so they must never
+    # be reused once old events are pruned
+    __table_args__ = (
+        Index("ix_change_events_created_at", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(40), nullable=False)  # audit.created, audit.updated, audit_item.created, ...
+    audit_id = Column(Integer, nullable=False)
+    # The audit's filter keys when the event was recorded
+    property_id = Column(Integer, nullable=True)
+    auditor_id = Column(Integer, nullable=True)
+    reviewer_id = Column(Integer, nullable=True)
+    payload = Column(Text, nullable=False)  # JSON, sent as the event's data
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# Portfolio analytics. Each audit's last contribution is kept as facts, so a
+# change to one audit is applied to the rollups as a delta; dashboards read
+# the rollups only.
+
+class AuditAnalyticsFact(Base):
+    """What one audit currently contributes to analytics_audit_rollups"""
+    __tablename__ = "analytics_audit_facts"
+    
+    audit_id = Column(Integer, ForeignKey("audits.id"), primary_key=True)
+    hotel_group_id = Column(Integer, nullable=False)  # 0 if the property has none
+    property_id = Column(Integer, nullable=False)
+    month = Column(String(7), nullable=False)  # YYYY-MM of the audit's created_at
+    overall_score = Column(Float, nullable=True)
+    compliance_zone = Column(String(10), nullable=True)  # green, amber, red
+
+class CategoryAnalyticsFact(Base):
+    """What one audit's items in one category contribute to analytics_category_rollups"""
+    __tablename__ = "analytics_category_facts"
+    
+    audit_id = Column(Integer, ForeignKey("audits.id"), primary_key=True)
+    category = Column(String(100), primary_key=True)
+    items = Column(Integer, nullable=False, default=0)
+    scored_items = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    compliant_items = Column(Integer, nullable=False, default=0)
+    compliance_known = Column(Integer, nullable=False, default=0)
+    ai_scored_items = Column(Integer, nullable=False, default=0)
+    ai_score_sum = Column(Float, nullable=False, default=0.0)
+
+class AuditRollup(Base):
+    """Audit counts, overall score and compliance zones per group, property and month"""
+    __tablename__ = "analytics_audit_rollups"
+    
+    hotel_group_id = Column(Integer, primary_key=True)
+    property_id = Column(Integer, primary_key=True)
+    month = Column(String(7), primary_key=True)
+    audits = Column(Integer, nullable=False, default=0)
+    scored_audits = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    green = Column(Integer, nullable=False, default=0)
+    amber = Column(Integer, nullable=False, default=0)
+    red = Column(Integer, nullable=False, default=0)
+
+class CategoryRollup(Base):
+    """Item scores and compliance per group, property, month and category"""
+    __tablename__ = "analytics_category_rollups"
+    
+    hotel_group_id = Column(Integer, primary_key=True)
+    property_id = Column(Integer, primary_key=True)
+    month = Column(String(7), primary_key=True)
+    category = Column(String(100), primary_key=True)
+    items = Column(Integer, nullable=False, default=0)
+    scored_items = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    compliant_items = Column(Integer, nullable=False, default=0)
+    compliance_known = Column(Integer, nullable=False, default=0)
+    ai_scored_items = Column(Integer, nullable=False, default=0)
+    ai_score_sum = Column(Float, nullable=False, default=0.0)
@@ -69,6 +69,7 @@ class PropertyResponse(BaseModel):
 class AuditCreate(BaseModel):
     property_id: int
     auditor_id: int
+    reviewer_id: Optional[int] = None
     scheduled_date: Optional[datetime] = None
 
 class AuditUpdate(BaseModel):
@@ -91,6 +92,13 @@ class AuditResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AuditDetailResponse(AuditResponse):
+    property_name: Optional[str] = None
+    property_location: Optional[str] = None
+    hotel_group_name: Optional[str] = None
+    auditor_name: Optional[str] = None
+    reviewer_name: Optional[str] = None
+
 # Audit Item schemas
 class AuditItemCreate(BaseModel):
     audit_id: int
@@ -98,6 +106,20 @@ class AuditItemCreate(BaseModel):
     item_name: str
     description: Optional[str] = None
 
+class AuditItemBulkEntry(BaseModel):
+    category: str
+    item_name: str
+    description: Optional[str] = None
+    score: Optional[float] = None
+    auditor_comments: Optional[str] = None
+    photo_url: Optional[str] = None
+    is_compliant: Optional[bool] = None
+
+class AuditItemBulkResponse(BaseModel):
+    audit_id: int
+    created: int
+    ids: List[int]
+
 class AuditItemUpdate(BaseModel):
     score: Optional[float] = None
     ai_score: Optional[float] = None
@@ -126,6 +148,31 @@ class AuditItemResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AuditItemChangesResponse(BaseModel):
+    audit_id: int
+    full: bool  # True: updated_since was too old and items is the whole list
+    items: List[AuditItemResponse]
+    deleted_ids: List[int]
+
+# Checklist scoring schemas
+class CategoryScore(BaseModel):
+    id: str
+    name: str
+    weight: float
+    score: float  # 0-100
+
+class AuditScoreResponse(BaseModel):
+    audit_id: int
+    overall_score: Optional[float] = None  # None when no item matches the checklist
+    compliance_zone: Optional[str] = None
+    matched_items: int
+    unmatched_items: int
+    categories: List[CategoryScore] = []
+
+class AuditRescoreResponse(BaseModel):
+    scored: int
+    changed: int
+
 # AI Analysis schemas
 class AIAnalysisRequest(BaseModel):
     item_name: str
@@ -141,7 +188,9 @@ class AIAnalysisResponse(BaseModel):
 
 # Photo Analysis schemas
 class PhotoAnalysisRequest(BaseModel):
-    image_data: str
+    # Either base64 image_data or the photo_id of an uploaded photo
+    image_data: Optional[str] = None
+    photo_id: Optional[str] = None
     context: Optional[str] = None
 
 class PhotoAnalysisResponse(BaseModel):
@@ -156,7 +205,9 @@ class ReportGenerationRequest(BaseModel):
 
 class ReportGenerationResponse(BaseModel):
     report_url: str
-    status: str
+    status: str  # generated, queued
+    format: Optional[str] = None
+    job_id: Optional[int] = None
 
 # Score Suggestion schemas
 class ScoreSuggestionRequest(BaseModel):
@@ -167,4 +218,70 @@ class ScoreSuggestionRequest(BaseModel):
 class ScoreSuggestionResponse(BaseModel):
     suggested_score: float
     reasoning: str
-    confidence: float
\ No newline at end of file
+    confidence: float
+
+# Photo Upload schemas
+class PhotoUploadResponse(BaseModel):
+    photo_id: str
+    size: int
+    mime_type: str
+    deduplicated: bool
+    url: str
+
+# Batch Photo Analysis schemas
+class BatchPhotoEntry(BaseModel):
+    audit_item_id: int
+    image_data: Optional[str] = None
+    photo_id: Optional[str] = None
+
+class BatchPhotoAnalysisRequest(BaseModel):
+    audit_id: int
+    # When omitted, every item of the audit that has a photo_url is analysed
+    photos: Optional[List[BatchPhotoEntry]] = None
+
+class JobTaskResult(BaseModel):
+    task_id: int
+    audit_item_id: Optional[int] = None
+    status: str
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    finished_at: Optional[datetime] = None
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    audit_id: Optional[int] = None
+    status: str
+    total: int
+    completed: int
+    failed: int
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    results: List[JobTaskResult] = []
+
+# Analytics schemas
+class AnalyticsRow(BaseModel):
+    # Grouping keys; only those the endpoint groups by are set
+    hotel_group_id: Optional[int] = None
+    hotel_group_name: Optional[str] = None
+    property_id: Optional[int] = None
+    property_name: Optional[str] = None
+    month: Optional[str] = None
+    category: Optional[str] = None
+    # Audit measures (absent when split by category)
+    audits: Optional[int] = None
+    scored_audits: Optional[int] = None
+    average_score: Optional[float] = None
+    green: Optional[int] = None
+    amber: Optional[int] = None
+    red: Optional[int] = None
+    # Item measures
+    items: Optional[int] = None
+    scored_items: Optional[int] = None
+    average_item_score: Optional[float] = None
+    compliance_rate: Optional[float] = None  # % of items with a compliance verdict
+    average_ai_score: Optional[float] = None
+
+class AnalyticsRebuildResponse(BaseModel):
+    audits: int
@@ -0,0 +1,253 @@
+"""
+Portfolio analytics: score and compliance rollups kept up to date incrementally
+
+Every write that touches an audit or its items calls refresh_audit_analytics
+in the same transaction. It re-aggregates just those audits (one indexed
+GROUP BY over their items), compares the result with the facts stored for
+them last time, and adds the difference to the rollup rows. Dashboard reads
+then scan rollup rows (groups x properties x months x categories), however
+many audit items there are.
+
+The difference is only right if nobody else refreshes the same audits in
+between, so a refresh locks their rows first (FOR UPDATE; SQLite has a single
+writer anyway), and adds to the rollups with INSERT ... ON CONFLICT DO UPDATE
+so that concurrent refreshes of other audits in the same rollup row both count.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.models.models import (
+    Audit, AuditAnalyticsFact, AuditItem, AuditRollup, CategoryAnalyticsFact, CategoryRollup, HotelGroup, Property,
+)
+
+Executor = Union[AsyncSession, AsyncConnection]
+
+AUDIT_KEY = ["hotel_group_id", "property_id", "month"]
+CATEGORY_KEY = AUDIT_KEY + ["category"]
+AUDIT_MEASURES = ["audits", "scored_audits", "score_sum", "green", "amber", "red"]
+ITEM_MEASURES = [
+    "items", "scored_items", "score_sum", "compliant_items", "compliance_known", "ai_scored_items", "ai_score_sum",
+]
+ZONES = ("green", "amber", "red")
+REFRESH_CHUNK = 500
+
+def compliance_zone(score: Optional[float]) -> Optional[str]:
+    if score is None:
+        return None
+    if score >= settings.ANALYTICS_GREEN_MIN_SCORE:
+        return "green"
+    if score >= settings.ANALYTICS_AMBER_MIN_SCORE:
+        return "amber"
+    return "red"
+
+def _audit_measures(fact: Dict[str, Any]) -> List[float]:
+    score = fact["overall_score"]
+    return [1, int(score is not None), score or 0.0] + [int(fact["compliance_zone"] == zone) for zone in ZONES]
+
+async def _stored_facts(db: Executor, audit_ids: List[int]):
+    """The facts last stored for these audits, locked until the transaction ends"""
+    # The audit rows too: an audit refreshed for the first time has no facts to lock
+    await db.execute(select(Audit.id).where(Audit.id.in_(audit_ids)).order_by(Audit.id).with_for_update())
+    audits = {
+        row.audit_id: dict(row._mapping)
+        for row in await db.execute(
+            select(AuditAnalyticsFact.__table__)
+            .where(AuditAnalyticsFact.audit_id.in_(audit_ids))
+            .order_by(AuditAnalyticsFact.audit_id)
+            .with_for_update()
+        )
+    }
+    categories = {
+        (row.audit_id, row.category): dict(row._mapping)
+        for row in await db.execute(
+            select(CategoryAnalyticsFact.__table__)
+            .where(CategoryAnalyticsFact.audit_id.in_(audit_ids))
+            .order_by(CategoryAnalyticsFact.audit_id, CategoryAnalyticsFact.category)
+            .with_for_update()
+        )
+    }
+    return audits, categories
+
+async def _current_facts(db: Executor, audit_ids: List[int]):
+    audits = {}
+    rows = await db.execute(
+        select(Audit.id, Audit.property_id, Audit.created_at, Audit.overall_score, Property.hotel_group_id)
+        .outerjoin(Property, Property.id == Audit.property_id)
+        .where(Audit.id.in_(audit_ids))
+    )
+    for row in rows:
+        audits[row.id] = {
+            "audit_id": row.id,
+            "hotel_group_id": row.hotel_group_id or 0,
+            "property_id": row.property_id or 0,
+            "month": (row.created_at or datetime.utcnow()).strftime("%Y-%m"),
+            "overall_score": row.overall_score,
+            "compliance_zone": compliance_zone(row.overall_score),
+        }
+
+    rows = await db.execute(
+        select(
+            AuditItem.audit_id,
+            AuditItem.category,
+            func.count().label("items"),
+            func.count(AuditItem.score).label("scored_items"),
+            func.coalesce(func.sum(AuditItem.score), 0.0).label("score_sum"),
+            func.count(case((AuditItem.is_compliant.is_(True), 1))).label("compliant_items"),
+            func.count(AuditItem.is_compliant).label("compliance_known"),
+            func.count(AuditItem.ai_score).label("ai_scored_items"),
+            func.coalesce(func.sum(AuditItem.ai_score), 0.0).label("ai_score_sum"),
+        )
+        .where(AuditItem.audit_id.in_(audit_ids))
+        .group_by(AuditItem.audit_id, AuditItem.category)
+    )
+    categories = {
+        (row.audit_id, row.category): dict(row._mapping)
+        for row in rows
+        if row.audit_id in audits
+    }
+    return audits, categories
+
+def _add_to_rollup(table, key_columns: List[str], measures: List[str]):
+    """INSERT ... ON CONFLICT (key) DO UPDATE SET m = m + excluded.m"""
+    dialect = sqlite if async_engine.dialect.name == "sqlite" else postgresql
+    statement = dialect.insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={m: table.c[m] + statement.excluded[m] for m in measures},
+    )
+
+async def _apply_deltas(db: Executor, table, key_columns: List[str], measures: List[str], deltas):
+    rows = [
+        {**dict(zip(key_columns, key)), **dict(zip(measures, values))}
+        for key, values in sorted(deltas.items())
+        if any(values)
+    ]
+    if rows:
+        await db.execute(_add_to_rollup(table, key_columns, measures), rows)
+
+async def _refresh_chunk(db: Executor, audit_ids: List[int]):
+    old_audits, old_categories = await _stored_facts(db, audit_ids)
+    new_audits, new_categories = await _current_facts(db, audit_ids)
+
+    audit_deltas = defaultdict(lambda: [0] * len(AUDIT_MEASURES))
+    category_deltas = defaultdict(lambda: [0] * len(ITEM_MEASURES))
+    for audits, categories, sign in ((old_audits, old_categories, -1), (new_audits, new_categories, 1)):
+        for fact in audits.values():
+            delta = audit_deltas[tuple(fact[column] for column in AUDIT_KEY)]
+            for i, value in enumerate(_audit_measures(fact)):
+                delta[i] += sign * value
+        for (audit_id, category), fact in categories.items():
+            audit = audits.get(audit_id)
+            if audit is None:
+                continue
+            delta = category_deltas[tuple(audit[column] for column in AUDIT_KEY) + (category,)]
+            for i, measure in enumerate(ITEM_MEASURES):
+                delta[i] += sign * fact[measure]
+
+    await _apply_deltas(db, AuditRollup.__table__, AUDIT_KEY, AUDIT_MEASURES, audit_deltas)
+    await _apply_deltas(db, CategoryRollup.__table__, CATEGORY_KEY, ITEM_MEASURES, category_deltas)
+
+    await db.execute(delete(CategoryAnalyticsFact.__table__).where(CategoryAnalyticsFact.audit_id.in_(audit_ids)))
+    await db.execute(delete(AuditAnalyticsFact.__table__).where(AuditAnalyticsFact.audit_id.in_(audit_ids)))
+    if new_audits:
+        await db.execute(insert(AuditAnalyticsFact.__table__), list(new_audits.values()))
+    if new_categories:
+        await db.execute(insert(CategoryAnalyticsFact.__table__), list(new_categories.values()))
+
+async def refresh_audit_analytics(db: Executor, audit_ids: Iterable[Optional[int]]):
+    """Bring the rollups up to date with the current state of these audits.
+
+    Call inside the transaction that changed them, after the change is
+    flushed. Deleted audits have their contribution removed.
+    """
+    audit_ids = sorted({audit_id for audit_id in audit_ids if audit_id is not None})
+    for start in range(0, len(audit_ids), REFRESH_CHUNK):
+        await _refresh_chunk(db, audit_ids[start:start + REFRESH_CHUNK])
+
+async def rebuild_analytics(db: AsyncSession) -> int:
+    """Recompute every rollup from scratch; returns the number of audits"""
+    for model in (CategoryRollup, AuditRollup, CategoryAnalyticsFact, AuditAnalyticsFact):
+        await db.execute(delete(model.__table__))
+    audit_ids = (await db.scalars(select(Audit.id))).all()
+    await refresh_audit_analytics(db, audit_ids)
+    await db.commit()
+    return len(audit_ids)
+
+async def backfill_if_empty(db: AsyncSession) -> bool:
+    """Build the rollups once for a database that has audits but no facts yet"""
+    if await db.scalar(select(AuditAnalyticsFact.audit_id).limit(1)) is not None:
+        return False
+    if await db.scalar(select(Audit.id).limit(1)) is None:
+        return False
+    await rebuild_analytics(db)
+    return True
+
+def _ratio(total: float, count: int, scale: float = 1.0, digits: int = 2) -> Optional[float]:
+    return round(scale * total / count, digits) if count else None
+
+def _rollup_query(model, measures: List[str], group_by: Sequence[str], filters: Dict[str, Any]):
+    columns = [getattr(model, column) for column in group_by]
+    query = select(*columns, *(func.coalesce(func.sum(getattr(model, m)), 0).label(m) for m in measures))
+    for column in ("hotel_group_id", "property_id", "category"):
+        if filters.get(column) is not None:
+            query = query.where(getattr(model, column) == filters[column])
+    if filters.get("month_from"):
+        query = query.where(model.month >= filters["month_from"])
+    if filters.get("month_to"):
+        query = query.where(model.month <= filters["month_to"])
+    return query.group_by(*columns) if columns else query
+
+async def load_rollups(db: AsyncSession, group_by: Sequence[str], **filters) -> List[Dict[str, Any]]:
+    """Rollup rows grouped by any of hotel_group_id, property_id, month, category.
+
+    Audit-level measures (counts, overall score, zones) are not split by
+    category, so they are left out when grouping or filtering by category.
+    """
+    by_category = "category" in group_by or filters.get("category") is not None
+    rows: Dict[Tuple, Dict[str, Any]] = {}
+
+    def row_for(record) -> Dict[str, Any]:
+        key = tuple(getattr(record, column) for column in group_by)
+        return rows.setdefault(key, dict(zip(group_by, key)))
+
+    if not by_category:
+        for record in await db.execute(_rollup_query(AuditRollup, AUDIT_MEASURES, group_by, filters)):
+            row = row_for(record)
+            row.update(
+                audits=record.audits,
+                scored_audits=record.scored_audits,
+                average_score=_ratio(record.score_sum, record.scored_audits),
+                **{zone: getattr(record, zone) for zone in ZONES},
+            )
+    for record in await db.execute(_rollup_query(CategoryRollup, ITEM_MEASURES, group_by, filters)):
+        row = row_for(record)
+        row.update(
+            items=record.items,
+            scored_items=record.scored_items,
+            average_item_score=_ratio(record.score_sum, record.scored_items),
+            compliance_rate=_ratio(record.compliant_items, record.compliance_known, 100.0, 1),
+            average_ai_score=_ratio(record.ai_score_sum, record.ai_scored_items),
+        )
+
+    # Keys whose audits all moved away or were deleted are left at zero
+    result = [row for key, row in sorted(rows.items()) if row.get("audits") or row.get("items") or not group_by]
+
+    if "hotel_group_id" in group_by:
+        ids = {row["hotel_group_id"] for row in result}
+        names = dict((await db.execute(select(HotelGroup.id, HotelGroup.name).where(HotelGroup.id.in_(ids)))).all())
+        for row in result:
+            row["hotel_group_name"] = names.get(row["hotel_group_id"])
+    if "property_id" in group_by:
+        ids = {row["property_id"] for row in result}
+        names = dict((await db.execute(select(Property.id, Property.name).where(Property.id.in_(ids)))).all())
+        for row in result:
+            row["property_name"] = names.get(row["property_id"])
+    return result
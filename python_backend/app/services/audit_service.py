@@ -0,0 +1,144 @@
+"""
+Audit loading and serialization shared by the audit endpoints
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.core.cache import make_etag
+from app.core.config import settings
+from app.models.models import Audit, AuditItem, AuditItemTombstone, Property
+
+
+# What GET /api/audits/ returns per audit (AuditResponse)
+AUDIT_LIST_COLUMNS = (
+    Audit.id,
+    Audit.property_id,
+    Audit.auditor_id,
+    Audit.reviewer_id,
+    Audit.status,
+    Audit.overall_score,
+    Audit.created_at,
+    Audit.updated_at,
+    Audit.scheduled_date,
+    Audit.completed_date,
+)
+
+
+def audit_detail_query():
+    """SELECT for an audit with its property, hotel group, auditor and reviewer joined in"""
+    return select(Audit).options(
+        joinedload(Audit.property).joinedload(Property.hotel_group),
+        joinedload(Audit.auditor),
+        joinedload(Audit.reviewer),
+    )
+
+
+async def load_audit_detail(db: AsyncSession, audit_id: int) -> Optional[Audit]:
+    """Load one audit and everything serialize_audit needs in a single query"""
+    query = audit_detail_query().where(Audit.id == audit_id).execution_options(populate_existing=True)
+    return (await db.execute(query)).unique().scalar_one_or_none()
+
+
+def serialize_audit(audit: Audit) -> Dict[str, Any]:
+    """Build the audit detail payload from an audit loaded by load_audit_detail"""
+    prop = audit.property
+    hotel_group = prop.hotel_group if prop else None
+    return {
+        "id": audit.id,
+        "property_id": audit.property_id,
+        "property_name": prop.name if prop else None,
+        "property_location": prop.location if prop else None,
+        "hotel_group_name": hotel_group.name if hotel_group else None,
+        "auditor_id": audit.auditor_id,
+        "auditor_name": audit.auditor.name if audit.auditor else None,
+        "reviewer_id": audit.reviewer_id,
+        "reviewer_name": audit.reviewer.name if audit.reviewer else None,
+        "status": audit.status,
+        "overall_score": audit.overall_score,
+        "created_at": audit.created_at,
+        "updated_at": audit.updated_at,
+        "scheduled_date": audit.scheduled_date,
+        "completed_date": audit.completed_date,
+    }
+
+
+def serialize_audit_item(item: AuditItem) -> Dict[str, Any]:
+    """Build the audit item payload"""
+    return {
+        "id": item.id,
+        "audit_id": item.audit_id,
+        "category": item.category,
+        "item_name": item.item_name,
+        "description": item.description,
+        "score": item.score,
+        "ai_score": item.ai_score,
+        "ai_feedback": item.ai_feedback,
+        "auditor_comments": item.auditor_comments,
+        "reviewer_comments": item.reviewer_comments,
+        "photo_url": item.photo_url,
+        "is_compliant": item.is_compliant,
+        "created_at": item.created_at,
+        "updated_at": item.updated_at,
+    }
+
+
+def as_utc_naive(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC; convert a client's aware datetime to match"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def item_list_etag(audit_id: int, items: int, last_updated: Optional[datetime]) -> str:
+    """ETag of an audit's full item list: any insert, edit or delete moves the count or the latest updated_at"""
+    return make_etag(f"{audit_id}:{items}:{last_updated}".encode())
+
+
+async def current_item_list_etag(db: AsyncSession, audit_id: int) -> str:
+    """item_list_etag from the (audit_id, updated_at) index alone, without loading the items"""
+    row = (await db.execute(
+        select(func.count(), func.max(AuditItem.updated_at)).where(AuditItem.audit_id == audit_id)
+    )).one()
+    return item_list_etag(audit_id, row[0], row[1])
+
+
+async def load_item_changes(db: AsyncSession, audit_id: int, updated_since: datetime) -> Dict[str, Any]:
+    """Items of an audit changed since updated_since and the ids of those deleted since.
+
+    Falls back to every item, with ``full`` set, when updated_since is older
+    than the tombstones kept.
+    """
+    now = datetime.utcnow()
+    if updated_since < now - timedelta(seconds=settings.ITEM_TOMBSTONE_RETENTION_SECONDS):
+        items = (await db.scalars(select(AuditItem).where(AuditItem.audit_id == audit_id))).all()
+        return {"audit_id": audit_id, "full": True, "items": [serialize_audit_item(item) for item in items], "deleted_ids": []}
+
+    since = updated_since - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+    items = (await db.scalars(
+        select(AuditItem).where(AuditItem.audit_id == audit_id, AuditItem.updated_at > since)
+    )).all()
+    deleted_ids: List[int] = (await db.scalars(
+        select(AuditItemTombstone.item_id).where(
+            AuditItemTombstone.audit_id == audit_id,
+            AuditItemTombstone.deleted_at > since,
+            # SQLite may hand a deleted item's id to the next new item
+            AuditItemTombstone.item_id.not_in(select(AuditItem.id).where(AuditItem.audit_id == audit_id)),
+        )
+    )).all()
+    return {"audit_id": audit_id, "full": False, "items": [serialize_audit_item(item) for item in items], "deleted_ids": deleted_ids}
+
+
+async def record_item_tombstone(db: AsyncSession, item: AuditItem):
+    """Remember a deleted item for delta sync and prune the audit's expired tombstones"""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=settings.ITEM_TOMBSTONE_RETENTION_SECONDS)
+    await db.execute(delete(AuditItemTombstone).where(
+        AuditItemTombstone.audit_id == item.audit_id,
+        (AuditItemTombstone.item_id == item.id) | (AuditItemTombstone.deleted_at < cutoff),
+    ))
+    await db.execute(insert(AuditItemTombstone), [{"item_id": item.id, "audit_id": item.audit_id, "deleted_at": now}])
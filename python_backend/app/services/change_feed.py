@@ -0,0 +1,354 @@
+"""
+Audit change events, pushed to clients so they don't have to poll the lists
+
+Audit and item writes call record_audit_changes / record_item_change in
+their transaction, which adds rows to change_events. Each API process runs
+one ChangeFeed dispatcher: it reads new rows (every
+EVENT_POLL_INTERVAL_SECONDS, or at once when a write in this process calls
+notify()), encodes each event once as a server-sent event frame and appends
+it to the matching streams. Streams are indexed by the filter they asked
+for, so an event costs a few dict lookups plus one list append per stream
+that receives it, however many are open.
+
+Event ids only grow, so a client reconnecting with Last-Event-ID is replayed
+what it missed from the table, for EVENT_RETENTION_SECONDS; after that, or
+when it falls too far behind, it gets a reset event and refetches.
+
+SQLite commits one write at a time, so events become visible in id order.
+Elsewhere (PostgreSQL) a transaction holding a lower id can commit after a
+higher one was read; the dispatcher then also re-reads the ids of the last
+EVENT_POLL_OVERLAP_SECONDS and dispatches those it has not seen. Replay by
+Last-Event-ID still goes by id alone.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.metrics import Counter, Gauge, registry
+from app.models.models import Audit, ChangeEvent
+from app.services.audit_service import AUDIT_LIST_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# A stream may filter on any of these; several must all match
+FILTER_KEYS = ("audit_id", "property_id", "auditor_id", "reviewer_id")
+EVENT_COLUMNS = (
+    ChangeEvent.id, ChangeEvent.kind, ChangeEvent.audit_id, ChangeEvent.property_id,
+    ChangeEvent.auditor_id, ChangeEvent.reviewer_id, ChangeEvent.payload,
+)
+RECORD_CHUNK = 500
+PRUNE_INTERVAL_SECONDS = 60.0
+HEARTBEAT = b": keep-alive\n\n"
+
+stream_resets = registry.register(Counter(
+    "event_stream_resets_total", "Streams told to refetch after falling EVENT_SUBSCRIBER_BUFFER events behind", (),
+))
+
+def _event_row(kind: str, audit, data: Any, now: datetime) -> Dict[str, Any]:
+    return {
+        "kind": kind,
+        "audit_id": audit.id,
+        "property_id": audit.property_id,
+        "auditor_id": audit.auditor_id,
+        "reviewer_id": audit.reviewer_id,
+        "payload": json.dumps(jsonable_encoder(data)),
+        "created_at": now,
+    }
+
+async def record_audit_changes(db: AsyncSession, kind: str, audit_ids: Iterable[int]):
+    """Record an event per audit carrying its list row, as GET /api/audits/ returns it.
+
+    Call after the change is flushed, before the commit.
+    """
+    audit_ids = sorted(set(audit_ids))
+    now = datetime.utcnow()
+    for start in range(0, len(audit_ids), RECORD_CHUNK):
+        chunk = audit_ids[start:start + RECORD_CHUNK]
+        audits = (await db.execute(select(*AUDIT_LIST_COLUMNS).where(Audit.id.in_(chunk)))).all()
+        if audits:
+            await db.execute(insert(ChangeEvent), [_event_row(kind, audit, dict(audit._mapping), now) for audit in audits])
+
+async def record_item_change(db: AsyncSession, kind: str, audit_id: int, data: Dict[str, Any]):
+    """Record an event about the items of one audit. Call before the commit."""
+    audit = (await db.execute(
+        select(Audit.id, Audit.property_id, Audit.auditor_id, Audit.reviewer_id).where(Audit.id == audit_id)
+    )).one_or_none()
+    if audit is not None:
+        await db.execute(insert(ChangeEvent), [_event_row(kind, audit, data, datetime.utcnow())])
+
+def _frame(event_id: int, kind: str, data: str) -> bytes:
+    return f"id: {event_id}\nevent: {kind}\ndata: {data}\n\n".encode()
+
+def _filter_key(filters: Dict[str, int]) -> Tuple[str, Optional[int]]:
+    """Index a stream by its first filter; the rest are checked per event"""
+    for key in FILTER_KEYS:
+        if key in filters:
+            return key, filters[key]
+    return "", None
+
+class Subscription:
+    """One open stream: its filters and the frames waiting to be sent to it"""
+
+    __slots__ = ("filters", "frames", "overflowed", "ready")
+
+    def __init__(self, filters: Dict[str, int]):
+        self.filters = filters
+        self.frames: List[bytes] = []
+        self.overflowed = False
+        self.ready = asyncio.Event()
+
+    def matches(self, event) -> bool:
+        return all(getattr(event, key) == value for key, value in self.filters.items())
+
+    def push(self, frame: bytes) -> bool:
+        """Queue a frame; False if it was dropped"""
+        if self.overflowed:
+            return False
+        self.ready.set()
+        if len(self.frames) >= settings.EVENT_SUBSCRIBER_BUFFER:
+            # The client isn't keeping up: drop its backlog and have it refetch
+            self.frames.clear()
+            self.overflowed = True
+            stream_resets.inc()
+            return False
+        self.frames.append(frame)
+        return True
+
+class ChangeFeed:
+    def __init__(
+        self,
+        poll_interval: float,
+        poll_batch: int,
+        heartbeat_seconds: float,
+        retention_seconds: float,
+        overlap_seconds: float = 0.0,
+    ):
+        self.poll_interval = poll_interval
+        self.poll_batch = poll_batch
+        self.heartbeat_seconds = heartbeat_seconds
+        self.retention_seconds = retention_seconds
+        self.overlap_seconds = overlap_seconds
+        self.last_id = 0
+        # With an overlap: ids dispatched within it (id -> when), and the id
+        # below which late commits are no longer looked for
+        self._seen: Dict[int, datetime] = {}
+        self._floor = 0
+        self._streams: Dict[Tuple[str, Optional[int]], Set[Subscription]] = {}
+        self._count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._closing = False
+
+    @property
+    def subscribers(self) -> int:
+        return self._count
+
+    def notify(self):
+        """Look for new events now rather than at the next poll"""
+        self._wake.set()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="change-feed")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def close_streams(self):
+        """End every open stream, e.g. when the server drains; clients reconnect elsewhere and resume"""
+        self._closing = True
+        for streams in self._streams.values():
+            for subscription in streams:
+                subscription.ready.set()
+
+    async def _max_id(self) -> int:
+        async with async_engine.connect() as conn:
+            return await conn.scalar(select(func.max(ChangeEvent.id))) or 0
+
+    async def subscribe(self, filters: Dict[str, int]) -> Tuple[Subscription, int]:
+        """Register a stream; returns it and the id of the last event it will not be sent"""
+        if not self._count:
+            # With nobody listening the dispatcher stops reading events, so
+            # catch up with the table first
+            max_id = await self._max_id()
+            if not self._count:
+                self.last_id = max(self.last_id, max_id)
+                self._floor = self.last_id
+        subscription = Subscription(filters)
+        self._streams.setdefault(_filter_key(filters), set()).add(subscription)
+        self._count += 1
+        return subscription, self.last_id
+
+    def unsubscribe(self, subscription: Subscription):
+        key = _filter_key(subscription.filters)
+        streams = self._streams.get(key)
+        if streams is None or subscription not in streams:
+            return
+        streams.discard(subscription)
+        if not streams:
+            del self._streams[key]
+        self._count -= 1
+
+    def _dispatch(self, event):
+        frame = _frame(event.id, event.kind, event.payload)
+        for key in ("",) + FILTER_KEYS:
+            streams = self._streams.get((key, getattr(event, key) if key else None))
+            if not streams:
+                continue
+            for subscription in streams:
+                if subscription.matches(event):
+                    subscription.push(frame)
+
+    def _heartbeat(self):
+        for streams in self._streams.values():
+            for subscription in streams:
+                if not subscription.frames:
+                    subscription.push(HEARTBEAT)
+
+    async def _late_events(self, conn, since: datetime) -> List[Any]:
+        """Events at or below last_id that committed after it was read"""
+        for event_id, seen_at in list(self._seen.items()):
+            if seen_at >= since:
+                break
+            del self._seen[event_id]  # older than the overlap, never re-read
+        ids = (await conn.scalars(
+            select(ChangeEvent.id)
+            .where(ChangeEvent.id > self._floor, ChangeEvent.id <= self.last_id, ChangeEvent.created_at >= since)
+        )).all()
+        missed = [event_id for event_id in ids if event_id not in self._seen]
+        if not missed:
+            return []
+        return (await conn.execute(
+            select(*EVENT_COLUMNS).where(ChangeEvent.id.in_(missed)).order_by(ChangeEvent.id)
+        )).all()
+
+    async def _poll(self) -> int:
+        # Without an overlap (SQLite: one write transaction at a time) ids
+        # become visible in order, and reading past last_id skips nothing
+        now = datetime.utcnow()
+        async with async_engine.connect() as conn:
+            late = []
+            if self.overlap_seconds:
+                late = await self._late_events(conn, now - timedelta(seconds=self.overlap_seconds))
+            events = (await conn.execute(
+                select(*EVENT_COLUMNS)
+                .where(ChangeEvent.id > self.last_id)
+                .order_by(ChangeEvent.id)
+                .limit(self.poll_batch)
+            )).all()
+        for event in late + events:
+            self._dispatch(event)
+            if self.overlap_seconds:
+                self._seen[event.id] = now
+        if events:
+            self.last_id = events[-1].id
+        return len(events)
+
+    async def _prune(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention_seconds)
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(ChangeEvent).where(ChangeEvent.created_at < cutoff))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_heartbeat = loop.time() + self.heartbeat_seconds
+        next_prune = loop.time()
+        while True:
+            self._wake.clear()
+            polled = 0
+            try:
+                if self._count:
+                    polled = await self._poll()
+                if loop.time() >= next_heartbeat:
+                    next_heartbeat = loop.time() + self.heartbeat_seconds
+                    self._heartbeat()
+                if loop.time() >= next_prune:
+                    next_prune = loop.time() + PRUNE_INTERVAL_SECONDS
+                    await self._prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Change feed poll failed: {e!r}")
+
+            if polled < self.poll_batch:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _replay(self, filters: Dict[str, int], after_id: int, upto: int) -> Optional[List[bytes]]:
+        """Frames of the matching events after after_id up to upto; None if some are gone or too many"""
+        if after_id >= upto:
+            return [] if after_id == upto else None
+        query = select(*EVENT_COLUMNS).where(ChangeEvent.id > after_id, ChangeEvent.id <= upto)
+        for key, value in filters.items():
+            query = query.where(getattr(ChangeEvent, key) == value)
+        async with async_engine.connect() as conn:
+            oldest = await conn.scalar(select(func.min(ChangeEvent.id)))
+            if oldest is None or oldest > after_id + 1:
+                return None  # pruned
+            events = (await conn.execute(query.order_by(ChangeEvent.id).limit(settings.EVENT_REPLAY_LIMIT + 1))).all()
+        if len(events) > settings.EVENT_REPLAY_LIMIT:
+            return None
+        return [_frame(event.id, event.kind, event.payload) for event in events]
+
+    async def stream(self, filters: Dict[str, int], last_event_id: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Server-sent events for one client.
+
+        Starts with "ready" (or "reset" when the events since last_event_id
+        can't be replayed), then sends each matching event as it is read.
+        """
+        subscription, upto = await self.subscribe(filters)
+        try:
+            head = [f"retry: {settings.EVENT_RETRY_MS}\n\n".encode()]
+            replayed = [] if last_event_id is None else await self._replay(filters, last_event_id, upto)
+            state = json.dumps({"last_event_id": upto})
+            if replayed is None:
+                head.append(_frame(upto, "reset", state))
+            else:
+                head += replayed
+                head.append(_frame(upto, "ready", state))
+            yield b"".join(head)
+
+            while True:
+                await subscription.ready.wait()
+                subscription.ready.clear()
+                if self._closing:
+                    return
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    yield _frame(self.last_id, "reset", json.dumps({"last_event_id": self.last_id}))
+                    continue
+                frames, subscription.frames = subscription.frames, []
+                yield b"".join(frames)
+        finally:
+            self.unsubscribe(subscription)
+
+# Global instance
+change_feed = ChangeFeed(
+    poll_interval=settings.EVENT_POLL_INTERVAL_SECONDS,
+    poll_batch=settings.EVENT_POLL_BATCH,
+    heartbeat_seconds=settings.EVENT_HEARTBEAT_SECONDS,
+    retention_seconds=settings.EVENT_RETENTION_SECONDS,
+    overlap_seconds=0.0 if async_engine.dialect.name == "sqlite" else settings.EVENT_POLL_OVERLAP_SECONDS,
+)
+
+registry.register(Gauge(
+    "event_stream_subscribers", "Open /api/events streams in this process", (),
+    collect=lambda: {(): change_feed.subscribers},
+))
@@ -2,98 +2,338 @@
 Gemini AI Service for Hotel Audit Analysis
 """
 
-import os
-import google.generativeai as genai
-from typing import Dict, Any, Optional
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import mmap
+import re
+import time
+from typing import Dict, Any, Optional, Union
 import logging
 
+import httpx
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import gemini_requests, observe_gemini_call
+
 logger = logging.getLogger(__name__)
 
-class GeminiService:
-    def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if self.api_key:
+# Raw image bytes or a memory map of a stored photo
+ImageData = Union[bytes, memoryview, mmap.mmap]
+
+class GeminiBackend:
+    """Transport for a single generateContent call"""
+
+    def load(self):
+        """Import and set up whatever the first call would (serve.py calls
+        this before forking workers, so they share it)"""
+
+    async def generate(self, model: str, prompt: str, image: Optional[ImageData], mime_type: str) -> str:
+        raise NotImplementedError
+
+class SDKGeminiBackend(GeminiBackend):
+    """google.generativeai SDK, using its native async API.
+
+    The SDK takes most of a second to import, so that waits for the first call.
+    """
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self._genai = None
+        self._models: Dict[str, Any] = {}
+
+    def load(self):
+        if self._genai is None:
+            import google.generativeai as genai
             genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-pro')
+            self._genai = genai
+        return self._genai
+
+    async def generate(self, model: str, prompt: str, image: Optional[ImageData], mime_type: str) -> str:
+        if model not in self._models:
+            self._models[model] = self.load().GenerativeModel(model)
+        parts: list = [prompt]
+        if image is not None:
+            parts.append({"mime_type": mime_type, "data": bytes(image)})
+        response = await self._models[model].generate_content_async(parts)
+        return response.text
+
+class HTTPGeminiBackend(GeminiBackend):
+    """REST generateContent over a pooled httpx client.
+
+    Used when GEMINI_BASE_URL is set, e.g. to point at a proxy or at the
+    local fake model server in benchmarks/fake_gemini.py.
+    """
+
+    def __init__(self, base_url: str, api_key: str, max_connections: int):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so the pool belongs to the worker's event loop
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            self._client = httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=None)
+        return self._client
+
+    async def generate(self, model: str, prompt: str, image: Optional[ImageData], mime_type: str) -> str:
+        parts: list = [{"text": prompt}]
+        if image is not None:
+            parts.append({"inline_data": {"mime_type": mime_type, "data": base64.b64encode(image).decode()}})
+        response = await self._get_client().post(
+            f"/v1beta/models/{model}:generateContent",
+            params={"key": self.api_key} if self.api_key else None,
+            json={"contents": [{"parts": parts}]},
+        )
+        response.raise_for_status()
+        return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+def _build_backend() -> Optional[GeminiBackend]:
+    if settings.GEMINI_BASE_URL:
+        return HTTPGeminiBackend(settings.GEMINI_BASE_URL, settings.GEMINI_API_KEY, settings.GEMINI_MAX_CONCURRENCY)
+    if settings.GEMINI_API_KEY:
+        return SDKGeminiBackend(settings.GEMINI_API_KEY)
+    return None
+
+def decode_image_data(image_data: str) -> bytes:
+    """Decode base64 image data, accepting an optional data: URL prefix"""
+    if image_data.startswith("data:") and "," in image_data:
+        image_data = image_data.split(",", 1)[1]
+    return base64.b64decode(image_data, validate=False)
+
+def sniff_mime_type(image: bytes) -> str:
+    if image[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if image[:4] == b"RIFF" and image[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+def parse_model_json(text: str) -> Dict[str, Any]:
+    """Pull the JSON object out of a model reply (which may be fenced or chatty)"""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if match:
+        try:
+            return json.loads(match.group(0))
+        except json.JSONDecodeError:
+            pass
+    return {"analysis": text.strip()}
+
+def _clamp_score(value: Any, default: float = 3.0) -> float:
+    try:
+        return min(5.0, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return default
+
+class GeminiService:
+    """Async Gemini client with bounded concurrency, per-call timeouts,
+    coalescing of identical in-flight requests and a content-addressed
+    result cache keyed by (model, prompt, image hash).
+    """
+
+    def __init__(self, backend: Optional[GeminiBackend] = None):
+        self.backend = backend if backend is not None else _build_backend()
+        self.model_name = settings.GEMINI_MODEL
+        self.timeout = settings.GEMINI_TIMEOUT_SECONDS
+        self.max_concurrency = settings.GEMINI_MAX_CONCURRENCY
+        self._results = TTLCache(settings.GEMINI_CACHE_SIZE, settings.GEMINI_CACHE_TTL_SECONDS)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"calls": 0, "cache_hits": 0, "coalesced": 0, "timeouts": 0, "errors": 0}
+
+        if self.backend:
             logger.info("✅ Gemini AI service initialized")
         else:
             logger.warning("⚠️ Gemini API key not found - AI features disabled")
-            self.model = None
-    
-    async def analyze_audit_photo(self, image_data: str, context: Optional[str] = None) -> Dict[str, Any]:
-        """Analyze audit photo using Gemini Vision"""
-        if not self.model:
-            return {
-                "analysis": "AI analysis unavailable - no API key",
-                "suggested_score": 3,
-                "confidence": 0.0
-            }
-        
-        try:
-            prompt = f"""
+
+    def _bind_loop(self):
+        # Semaphores and in-flight tasks belong to one event loop; rebuild them
+        # if the service is used from a new loop (a forked worker, a test run)
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+
+    def cache_key(self, prompt: str, image: Optional[ImageData], image_hash: Optional[str] = None) -> str:
+        if image_hash is None:
+            image_hash = hashlib.sha256(image).hexdigest() if image is not None else "-"
+        return hashlib.sha256(f"{self.model_name}\0{prompt}\0{image_hash}".encode()).hexdigest()
+
+    async def _call_model(self, key: str, prompt: str, image: Optional[ImageData], mime_type: str) -> str:
+        async with self._semaphore:
+            self.stats["calls"] += 1
+            gemini_requests.inc("call")
+            started = time.perf_counter()
+            try:
+                text = await asyncio.wait_for(
+                    self.backend.generate(self.model_name, prompt, image, mime_type),
+                    timeout=self.timeout,
+                )
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                observe_gemini_call("timeout", started)
+                raise
+            except Exception:
+                self.stats["errors"] += 1
+                observe_gemini_call("error", started)
+                raise
+            observe_gemini_call("ok", started)
+        self._results.set(key, text)
+        return text
+
+    async def generate(
+        self,
+        prompt: str,
+        image: Optional[ImageData] = None,
+        mime_type: str = "image/jpeg",
+        image_hash: Optional[str] = None,
+    ) -> str:
+        """Run one model call, served from cache or shared with an identical in-flight call.
+
+        Pass image_hash (the SHA-256 hex of the image) when it is already
+        known, e.g. for a stored photo, to skip hashing the image again.
+        """
+        self._bind_loop()
+        key = self.cache_key(prompt, image, image_hash)
+
+        cached = self._results.get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            gemini_requests.inc("cache_hit")
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            # The call runs as its own task so a caller disconnecting does not
+            # cancel it for the others waiting on the same result. It can
+            # outlive this caller, so it must not borrow a map the caller
+            # closes on the way out: copy the image once, for the real call
+            if image is not None and not isinstance(image, bytes):
+                image = bytes(image)
+            task = asyncio.ensure_future(self._call_model(key, prompt, image, mime_type))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+        else:
+            self.stats["coalesced"] += 1
+            gemini_requests.inc("coalesced")
+
+        return await asyncio.shield(task)
+
+    async def aclose(self):
+        """Release the backend's connection pool, if it has one"""
+        if isinstance(self.backend, HTTPGeminiBackend):
+            await self.backend.aclose()
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    async def analyze_image(
+        self,
+        image: ImageData,
+        context: Optional[str] = None,
+        image_hash: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Analyze raw image bytes; raises if the model call fails"""
+        prompt = f"""
             Analyze this hotel audit photo and provide:
             1. Overall assessment
             2. Compliance issues identified
             3. Suggested score (0-5 scale)
             4. Recommendations for improvement
-            
+
             Context: {context or "General hotel audit item"}
-            
-            Please provide a structured analysis in JSON format.
+
+            Respond with a single JSON object with the keys "analysis",
+            "suggested_score", "compliance_issues" and "recommendations".
             """
-            
-            # For demo purposes, return mock analysis
+
+        mime_type = sniff_mime_type(image[:16])
+        result = parse_model_json(await self.generate(prompt, image, mime_type, image_hash))
+        result["suggested_score"] = _clamp_score(result.get("suggested_score"))
+        return result
+
+    async def analyze_audit_photo(
+        self,
+        image_data: Union[str, ImageData],
+        context: Optional[str] = None,
+        image_hash: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Analyze audit photo using Gemini Vision (base64 string or raw bytes)"""
+        if not self.backend:
+            return {
+                "analysis": "AI analysis unavailable - no API key",
+                "suggested_score": 3,
+                "confidence": 0.0
+            }
+
+        try:
+            image = decode_image_data(image_data) if isinstance(image_data, str) else image_data
+            return await self.analyze_image(image, context, image_hash)
+
+        except (binascii.Error, ValueError) as e:
+            logger.error(f"Gemini analysis failed: {e}")
             return {
-                "analysis": "Photo shows good condition with minor issues",
-                "suggested_score": 4.2,
-                "compliance_issues": ["Minor wear on surfaces"],
-                "recommendations": ["Regular maintenance recommended"]
+                "analysis": f"Analysis failed: invalid image data ({e})",
+                "suggested_score": 3,
+                "confidence": 0.0
             }
-            
         except Exception as e:
-            logger.error(f"Gemini analysis failed: {e}")
+            logger.error(f"Gemini analysis failed: {e!r}")
             return {
-                "analysis": f"Analysis failed: {str(e)}",
+                "analysis": f"Analysis failed: {e!r}",
                 "suggested_score": 3,
                 "confidence": 0.0
             }
-    
+
     async def suggest_score(self, item_name: str, description: str, photo_url: Optional[str] = None) -> Dict[str, Any]:
         """Get AI-suggested score for audit item"""
-        if not self.model:
+        if not self.backend:
             return {
                 "suggested_score": 3.0,
                 "reasoning": "AI service unavailable",
                 "confidence": 0.0
             }
-        
+
         try:
             prompt = f"""
             Analyze this hotel audit item and suggest a score (0-5 scale):
-            
+
             Item: {item_name}
             Description: {description}
-            
-            Consider standard hotel audit criteria and provide:
-            1. Suggested score (0-5)
-            2. Reasoning for the score
-            3. Key factors considered
+
+            Consider standard hotel audit criteria and respond with a single
+            JSON object with the keys "suggested_score" (0-5), "reasoning"
+            and "confidence" (0-1).
             """
-            
-            # For demo purposes, return mock response
+
+            result = parse_model_json(await self.generate(prompt))
             return {
-                "suggested_score": 4.0,
-                "reasoning": f"Item '{item_name}' meets most standards with minor improvements needed",
-                "confidence": 0.85
+                "suggested_score": _clamp_score(result.get("suggested_score")),
+                "reasoning": result.get("reasoning") or result.get("analysis", ""),
+                "confidence": float(result.get("confidence", 0.85)),
             }
-            
+
         except Exception as e:
-            logger.error(f"Score suggestion failed: {e}")
+            logger.error(f"Score suggestion failed: {e!r}")
             return {
                 "suggested_score": 3.0,
-                "reasoning": f"Analysis failed: {str(e)}",
+                "reasoning": f"Analysis failed: {e!r}",
                 "confidence": 0.0
             }
 
 # Global instance
-gemini_service = GeminiService()
\ No newline at end of file
+gemini_service = GeminiService()
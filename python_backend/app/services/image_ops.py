@@ -0,0 +1,42 @@
+"""
+Pillow operations run inside the image worker processes
+
+Kept free of app imports so a worker only loads this module and Pillow.
+"""
+
+import os
+from typing import Tuple
+
+class UnsupportedImageError(Exception):
+    """Raised when Pillow cannot decode a photo (e.g. HEIC without a plugin)"""
+
+def render_variant(source_path: str, dest_path: str, max_edge: int, quality: int) -> Tuple[int, int, int]:
+    """Orient, downsize and JPEG-encode source_path into dest_path.
+
+    Runs in a worker process. Returns (width, height, bytes written).
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(source_path) as image:
+            # JPEG only: let the decoder scale down by 1/2..1/8 while decoding
+            image.draft("RGB", (max_edge, max_edge))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+            if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+                image = image.convert("RGBA")
+                flattened = Image.new("RGB", image.size, (255, 255, 255))
+                flattened.paste(image, mask=image.getchannel("A"))
+                image = flattened
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+            # No exif= argument, so location and device metadata are dropped
+            image.save(tmp_path, "JPEG", quality=quality)
+            os.replace(tmp_path, dest_path)
+            return image.width, image.height, os.path.getsize(dest_path)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise UnsupportedImageError(f"{type(e).__name__}: {e}")
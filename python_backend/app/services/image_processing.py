@@ -0,0 +1,125 @@
+"""
+Photo preprocessing in a process pool
+
+Before analysis a photo is EXIF-oriented, downsized to IMAGE_ANALYSIS_MAX_EDGE
+and re-encoded as JPEG; dashboard thumbnails are made the same way. Outputs
+are stored by source hash and variant next to the originals, so each one is
+rendered once. The rendering itself lives in image_ops, so pool workers
+import Pillow and nothing else from the app.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.process_pool import ProcessPool, cpu_pool
+from app.services.image_ops import UnsupportedImageError, render_variant
+from app.services.photo_storage import PhotoStore, photo_store
+
+logger = logging.getLogger(__name__)
+
+class ImageProcessor:
+    """Renders cached photo variants on the shared process pool"""
+
+    def __init__(
+        self,
+        store: PhotoStore,
+        pool: ProcessPool,
+        analysis_max_edge: int,
+        analysis_quality: int,
+        thumbnail_sizes: List[int],
+        thumbnail_quality: int,
+    ):
+        self.store = store
+        self.pool = pool
+        self.analysis_max_edge = analysis_max_edge
+        self.analysis_quality = analysis_quality
+        self.thumbnail_sizes = thumbnail_sizes
+        self.thumbnail_quality = thumbnail_quality
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"rendered": 0, "cache_hits": 0, "coalesced": 0, "unsupported": 0}
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._inflight = {}
+
+    async def render(self, photo_id: str, variant: str, max_edge: int, quality: int) -> str:
+        """Path of a rendered variant, rendering it on first use.
+
+        Raises FileNotFoundError if the photo is not stored and
+        UnsupportedImageError if it cannot be decoded.
+        """
+        self._bind_loop()
+        dest_path = self.store.derived_path(photo_id, variant)
+        if os.path.exists(dest_path):
+            self.stats["cache_hits"] += 1
+            return dest_path
+
+        source_path = self.store.path(photo_id)
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(source_path)
+
+        future = self._inflight.get(dest_path)
+        if future is None:
+            future = asyncio.ensure_future(
+                self.pool.run(render_variant, source_path, dest_path, max_edge, quality)
+            )
+            self._inflight[dest_path] = future
+            future.add_done_callback(lambda done, key=dest_path: self._finish(key, done))
+        else:
+            self.stats["coalesced"] += 1
+
+        try:
+            await asyncio.shield(future)
+        except UnsupportedImageError:
+            self.stats["unsupported"] += 1
+            raise
+        return dest_path
+
+    def _finish(self, key: str, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled() and future.exception() is None:
+            self.stats["rendered"] += 1
+
+    async def prepare_for_analysis(self, photo_id: str) -> Tuple[str, str]:
+        """(path, cache hash) of the image to send to the model.
+
+        Falls back to the original when preprocessing is disabled or the
+        format is one Pillow cannot read; the model may still accept it.
+        """
+        if not settings.IMAGE_PREPROCESS_ENABLED:
+            return self.store.path(photo_id), photo_id
+
+        variant = f"analysis-{self.analysis_max_edge}-q{self.analysis_quality}"
+        try:
+            path = await self.render(photo_id, variant, self.analysis_max_edge, self.analysis_quality)
+        except UnsupportedImageError as e:
+            logger.warning(f"⚠️ Sending photo {photo_id[:12]} unprocessed: {e}")
+            return self.store.path(photo_id), photo_id
+        return path, f"{photo_id}/{variant}"
+
+    async def thumbnail(self, photo_id: str, size: int) -> str:
+        return await self.render(photo_id, f"thumb-{size}-q{self.thumbnail_quality}", size, self.thumbnail_quality)
+
+    async def warm(self, photo_id: str):
+        """Render the default thumbnail ahead of the first dashboard request"""
+        try:
+            await self.thumbnail(photo_id, settings.IMAGE_THUMBNAIL_DEFAULT_SIZE)
+        except (UnsupportedImageError, FileNotFoundError):
+            pass
+
+# Global instance
+image_processor = ImageProcessor(
+    photo_store,
+    cpu_pool,
+    analysis_max_edge=settings.IMAGE_ANALYSIS_MAX_EDGE,
+    analysis_quality=settings.IMAGE_ANALYSIS_QUALITY,
+    thumbnail_sizes=settings.IMAGE_THUMBNAIL_SIZES,
+    thumbnail_quality=settings.IMAGE_THUMBNAIL_QUALITY,
+)
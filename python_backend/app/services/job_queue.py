@@ -0,0 +1,453 @@
+"""
+Persistent background job queue
+
+Jobs and their tasks live in the jobs / job_tasks tables, so queued work
+survives a restart and is shared by every API process. Each process runs:
+
+- a claimer, which moves a batch of queued tasks to "running" with a single
+  UPDATE ... RETURNING (safe to race against other processes);
+- a pool of workers, which run claimed tasks through the handler registered
+  for their kind;
+- a writer, which applies finished tasks in batched transactions: the
+  handler's own write-back, task status and the job's progress counters.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.models.models import Job, JobTask
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ClaimedTask:
+    id: int
+    job_id: int
+    kind: str
+    audit_item_id: Optional[int]
+    payload: Dict[str, Any]
+    attempts: int
+
+@dataclass
+class TaskOutcome:
+    task: ClaimedTask
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class JobHandler:
+    """Runs the tasks of one job kind"""
+
+    kind: str = ""
+
+    async def run(self, task: ClaimedTask) -> Dict[str, Any]:
+        """Process one task and return its JSON result; raise to fail it"""
+        raise NotImplementedError
+
+    async def apply(self, conn: AsyncConnection, outcomes: List[TaskOutcome]):
+        """Write successful results back, inside the writer's transaction"""
+
+class JobQueue:
+    def __init__(
+        self,
+        workers: int,
+        claim_batch: int,
+        poll_interval: float,
+        flush_batch: int,
+        flush_interval: float,
+        max_attempts: int,
+        lease_seconds: float,
+    ):
+        self.workers = workers
+        self.claim_batch = claim_batch
+        self.poll_interval = poll_interval
+        self.flush_batch = flush_batch
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Optional[asyncio.Queue] = None
+        self._outcomes: Optional[asyncio.Queue] = None
+        self._running: Dict[int, ClaimedTask] = {}
+        self._wake = asyncio.Event()
+        self._progress = asyncio.Event()
+        self.stats = {"claimed": 0, "done": 0, "failed": 0, "retried": 0, "flushes": 0}
+
+    def register(self, handler: JobHandler):
+        self._handlers[handler.kind] = handler
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        kind: str,
+        tasks: Sequence[Tuple[Optional[int], Dict[str, Any]]],
+        audit_id: Optional[int] = None,
+    ) -> Job:
+        """Create a job with one task per (audit_item_id, payload) and commit it"""
+        job = Job(kind=kind, audit_id=audit_id, status="queued", total=len(tasks), completed=0, failed=0)
+        db.add(job)
+        await db.flush()
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "job_id": job.id,
+                "kind": kind,
+                "audit_item_id": audit_item_id,
+                "status": "queued",
+                "attempts": 0,
+                "payload": json.dumps(payload),
+                "created_at": now,
+            }
+            for audit_item_id, payload in tasks
+        ]
+        try:
+            await db.execute(insert(JobTask), rows)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        self.notify()
+        return job
+
+    def notify(self):
+        """Wake the claimer now rather than at its next poll"""
+        self._wake.set()
+
+    async def wait_for_progress(self, timeout: float):
+        """Return when this process next records progress, or after timeout"""
+        progress = self._progress
+        try:
+            await asyncio.wait_for(progress.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _signal_progress(self):
+        progress, self._progress = self._progress, asyncio.Event()
+        progress.set()
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._pending = asyncio.Queue()
+        self._outcomes = asyncio.Queue()
+        self._wake = asyncio.Event()
+        self._progress = asyncio.Event()
+        await self._requeue_stale()
+        self._tasks = [asyncio.create_task(self._claimer(), name="job-claimer"),
+                       asyncio.create_task(self._writer(), name="job-writer")]
+        self._tasks += [asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)]
+        logger.info(f"✅ Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers, flush finished results and hand unfinished tasks back"""
+        if not self._tasks:
+            return
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        outcomes = []
+        while not self._outcomes.empty():
+            outcomes.append(self._outcomes.get_nowait())
+        if outcomes:
+            await self._flush(outcomes)
+
+        unfinished = list(self._running.values())
+        while not self._pending.empty():
+            unfinished.append(self._pending.get_nowait())
+        self._running.clear()
+        if unfinished:
+            await self._release(unfinished)
+
+    async def _claim(self, limit: int) -> List[ClaimedTask]:
+        now = datetime.utcnow()
+        oldest_queued = (
+            select(JobTask.id)
+            .where(JobTask.status == "queued")
+            .order_by(JobTask.id)
+            .limit(limit)
+        )
+        # The outer status check makes a task that another process claimed
+        # first drop out of this statement instead of being claimed twice
+        claim = (
+            update(JobTask)
+            .where(JobTask.id.in_(oldest_queued), JobTask.status == "queued")
+            .values(status="running", attempts=JobTask.attempts + 1, claimed_at=now)
+            .returning(JobTask.id, JobTask.job_id, JobTask.kind, JobTask.audit_item_id,
+                       JobTask.payload, JobTask.attempts)
+        )
+        async with async_engine.begin() as conn:
+            rows = (await conn.execute(claim)).all()
+            job_ids = {row.job_id for row in rows}
+            if job_ids:
+                await conn.execute(
+                    update(Job)
+                    .where(Job.id.in_(job_ids), Job.status == "queued")
+                    .values(status="running", started_at=now)
+                )
+
+        self.stats["claimed"] += len(rows)
+        return [
+            ClaimedTask(row.id, row.job_id, row.kind, row.audit_item_id, json.loads(row.payload or "{}"), row.attempts)
+            for row in sorted(rows, key=lambda row: row.id)
+        ]
+
+    async def _requeue_stale(self):
+        """Requeue tasks left running by a process that went away.
+
+        A task that has used up its attempts fails instead, so one that kills
+        its worker or whose result never gets written is not retried forever.
+        """
+        now = datetime.utcnow()
+        stale = (JobTask.status == "running", JobTask.claimed_at < now - timedelta(seconds=self.lease_seconds))
+        async with async_engine.begin() as conn:
+            exhausted = (await conn.execute(
+                update(JobTask)
+                .where(*stale, JobTask.attempts >= self.max_attempts)
+                .values(status="failed", error="Lease expired on the last attempt", payload=None, finished_at=now)
+                .returning(JobTask.job_id)
+            )).all()
+            counts: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+            for row in exhausted:
+                counts[row.job_id][1] += 1
+            await _count_finished(conn, counts, now)
+            requeued = await conn.execute(
+                update(JobTask)
+                .where(*stale, JobTask.attempts < self.max_attempts)
+                .values(status="queued", claimed_at=None)
+            )
+        if exhausted:
+            logger.warning(f"⚠️ Failed {len(exhausted)} stale job tasks with no attempts left")
+            self.stats["failed"] += len(exhausted)
+            self._signal_progress()
+        if requeued.rowcount:
+            logger.warning(f"⚠️ Requeued {requeued.rowcount} stale job tasks")
+
+    async def _release(self, tasks: List[ClaimedTask]):
+        """Hand claimed but unfinished tasks back to the queue"""
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                update(JobTask)
+                .where(JobTask.id == bindparam("b_id"), JobTask.status == "running")
+                .values(status="queued", claimed_at=None, attempts=JobTask.attempts - 1),
+                [{"b_id": task.id} for task in tasks],
+            )
+
+    async def _claimer(self):
+        loop = asyncio.get_running_loop()
+        next_stale_check = loop.time() + self.lease_seconds / 4
+        while True:
+            try:
+                # Keep about one batch buffered beyond what the workers hold,
+                # so other processes can still pick up the rest of a big job
+                capacity = self.workers + self.claim_batch - self._pending.qsize() - len(self._running)
+                claimed = await self._claim(min(self.claim_batch, capacity)) if capacity > 0 else []
+                for task in claimed:
+                    self._pending.put_nowait(task)
+                if loop.time() >= next_stale_check:
+                    next_stale_check = loop.time() + self.lease_seconds / 4
+                    await self._requeue_stale()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Job claim failed: {e!r}")
+                claimed = []
+
+            if len(claimed) < self.claim_batch or capacity <= 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _worker(self):
+        while True:
+            task = await self._pending.get()
+            self._running[task.id] = task
+            handler = self._handlers.get(task.kind)
+            try:
+                if handler is None:
+                    raise LookupError(f"no handler for job kind {task.kind!r}")
+                outcome = TaskOutcome(task, result=await handler.run(task))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                outcome = TaskOutcome(task, error=str(e) or type(e).__name__)
+            self._outcomes.put_nowait(outcome)
+            del self._running[task.id]
+            self._wake.set()
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            try:
+                batch.append(await self._outcomes.get())
+                deadline = loop.time() + self.flush_interval
+                while len(batch) < self.flush_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    if self._outcomes.empty() and not self._running and self._pending.empty():
+                        # Nothing in flight could join the batch; don't sit
+                        # on the last results of a job
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._outcomes.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                for attempt in range(3):
+                    try:
+                        await self._flush(batch)
+                        break
+                    except Exception as e:
+                        # Tasks that never get flushed stay "running" in the
+                        # database and are requeued once their lease runs out
+                        logger.error(f"❌ Job result flush failed: {e!r}")
+                        await asyncio.sleep(self.flush_interval * (attempt + 1))
+            except asyncio.CancelledError:
+                # Leave the batch for stop() to flush
+                for outcome in batch:
+                    self._outcomes.put_nowait(outcome)
+                raise
+
+    async def _flush(self, outcomes: List[TaskOutcome]):
+        now = datetime.utcnow()
+        done = [o for o in outcomes if o.error is None]
+        failed = [o for o in outcomes if o.error is not None and o.task.attempts >= self.max_attempts]
+        retry = [o for o in outcomes if o.error is not None and o.task.attempts < self.max_attempts]
+
+        counts: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+        for outcome in done:
+            counts[outcome.task.job_id][0] += 1
+        for outcome in failed:
+            counts[outcome.task.job_id][1] += 1
+
+        by_kind: Dict[str, List[TaskOutcome]] = defaultdict(list)
+        for outcome in done:
+            by_kind[outcome.task.kind].append(outcome)
+
+        async with async_engine.begin() as conn:
+            for kind, group in by_kind.items():
+                await self._handlers[kind].apply(conn, group)
+
+            if done:
+                await conn.execute(
+                    update(JobTask)
+                    .where(JobTask.id == bindparam("b_id"))
+                    .values(status="done", result=bindparam("b_result"), error=None, payload=None, finished_at=now),
+                    [{"b_id": o.task.id, "b_result": json.dumps(o.result)} for o in done],
+                )
+            if failed:
+                await conn.execute(
+                    update(JobTask)
+                    .where(JobTask.id == bindparam("b_id"))
+                    .values(status="failed", error=bindparam("b_error"), payload=None, finished_at=now),
+                    [{"b_id": o.task.id, "b_error": o.error} for o in failed],
+                )
+            if retry:
+                await conn.execute(
+                    update(JobTask)
+                    .where(JobTask.id == bindparam("b_id"))
+                    .values(status="queued", error=bindparam("b_error"), claimed_at=None),
+                    [{"b_id": o.task.id, "b_error": o.error} for o in retry],
+                )
+            await _count_finished(conn, counts, now)
+
+        self.stats["done"] += len(done)
+        self.stats["failed"] += len(failed)
+        self.stats["retried"] += len(retry)
+        self.stats["flushes"] += 1
+        if retry:
+            self.notify()
+        self._signal_progress()
+
+async def _count_finished(conn: AsyncConnection, counts: Dict[int, List[int]], now: datetime):
+    """Add {job id: [done, failed]} to the jobs' counters and complete the jobs with nothing left"""
+    if not counts:
+        return
+    await conn.execute(
+        update(Job)
+        .where(Job.id == bindparam("b_job_id"))
+        .values(completed=Job.completed + bindparam("b_done"), failed=Job.failed + bindparam("b_failed")),
+        [{"b_job_id": job_id, "b_done": d, "b_failed": f} for job_id, (d, f) in counts.items()],
+    )
+    await conn.execute(
+        update(Job)
+        .where(Job.id.in_(list(counts)), Job.status != "completed", Job.completed + Job.failed >= Job.total)
+        .values(status="completed", finished_at=now)
+    )
+
+def _serialize_task(row) -> Dict[str, Any]:
+    return {
+        "task_id": row.id,
+        "audit_item_id": row.audit_item_id,
+        "status": row.status,
+        "result": json.loads(row.result) if row.result else None,
+        "error": row.error,
+        "finished_at": row.finished_at,
+    }
+
+async def load_job_progress(
+    db: AsyncSession,
+    job_id: int,
+    finished_since: Optional[datetime] = None,
+) -> Optional[Dict[str, Any]]:
+    """Job status and counters plus the results of its finished tasks.
+
+    With finished_since only tasks finished at or after that time are listed.
+    """
+    job = await db.get(Job, job_id, populate_existing=True)
+    if job is None:
+        return None
+
+    query = (
+        select(JobTask.id, JobTask.audit_item_id, JobTask.status, JobTask.result, JobTask.error, JobTask.finished_at)
+        .where(JobTask.job_id == job_id, JobTask.status.in_(("done", "failed")))
+        .order_by(JobTask.id)
+    )
+    if finished_since is not None:
+        query = query.where(JobTask.finished_at >= finished_since)
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "audit_id": job.audit_id,
+        "status": job.status,
+        "total": job.total,
+        "completed": job.completed,
+        "failed": job.failed,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "results": [_serialize_task(row) for row in (await db.execute(query)).all()],
+    }
+
+# Global instance
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    claim_batch=settings.JOB_CLAIM_BATCH,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    flush_batch=settings.JOB_FLUSH_BATCH,
+    flush_interval=settings.JOB_FLUSH_INTERVAL_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+)
@@ -0,0 +1,109 @@
+"""
+Batch photo analysis, run as background jobs on the job queue
+"""
+
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.models.models import AuditItem
+from app.services.analytics_service import refresh_audit_analytics
+from app.services.audit_service import serialize_audit_item
+from app.services.change_feed import record_item_change
+from app.services.gemini_service import GeminiService, decode_image_data, gemini_service
+from app.services.image_processing import image_processor
+from app.services.job_queue import ClaimedTask, JobHandler, TaskOutcome, job_queue
+from app.services.photo_storage import map_file, photo_store
+
+PHOTO_ANALYSIS = "photo_analysis"
+STORED_PHOTO_PREFIX = "/api/photos/"
+
+def item_context(category: str, item_name: str, description: Optional[str]) -> str:
+    """Describe an audit item for the analysis prompt"""
+    context = f"{category} - {item_name}"
+    return f"{context}: {description}" if description else context
+
+def format_feedback(result: Dict[str, Any]) -> str:
+    """Flatten a model analysis into the text stored as ai_feedback"""
+    lines = [str(result.get("analysis", "")).strip()]
+    issues = result.get("compliance_issues") or []
+    if issues:
+        lines.append("Issues: " + "; ".join(map(str, issues)))
+    recommendations = result.get("recommendations") or []
+    if recommendations:
+        lines.append("Recommendations: " + "; ".join(map(str, recommendations)))
+    return "\n".join(line for line in lines if line)
+
+async def analyze_stored_photo(service: GeminiService, photo_id: str, context: Optional[str]) -> Dict[str, Any]:
+    """Preprocess a stored photo (cached) and analyse it; raises on failure"""
+    path, image_hash = await image_processor.prepare_for_analysis(photo_id)
+    with map_file(path) as image:
+        return await service.analyze_image(image, context, image_hash)
+
+class PhotoAnalysisHandler(JobHandler):
+    """Analyse one item photo per task and write ai_score/ai_feedback back"""
+
+    kind = PHOTO_ANALYSIS
+
+    def __init__(self, service: GeminiService):
+        self.service = service
+
+    def stored_photo_id(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Id of the stored photo a task refers to, by photo_id or /api/photos/ URL"""
+        photo_id = payload.get("photo_id")
+        photo_url = payload.get("photo_url") or ""
+        if not photo_id and photo_url.startswith(STORED_PHOTO_PREFIX):
+            photo_id = photo_url[len(STORED_PHOTO_PREFIX):].split("?", 1)[0].rstrip("/")
+        if photo_id and not photo_store.exists(photo_id):  # also rejects malformed ids
+            raise ValueError(f"photo {photo_id[:80]!r} not found")
+        return photo_id
+
+    def load_image(self, payload: Dict[str, Any]) -> bytes:
+        """Decode an inline image. Remote URLs are not fetched: a photo_url is
+        user input, and fetching it would let anyone make the server request
+        internal addresses"""
+        if payload.get("image_data"):
+            return decode_image_data(payload["image_data"])
+
+        photo_url = payload.get("photo_url") or ""
+        if photo_url.startswith("data:"):
+            return decode_image_data(photo_url)
+        raise ValueError(f"unsupported photo_url {photo_url[:80]!r}; upload the photo to {STORED_PHOTO_PREFIX} first")
+
+    async def run(self, task: ClaimedTask) -> Dict[str, Any]:
+        photo_id = self.stored_photo_id(task.payload)
+        if not photo_id:
+            # Inline images go through storage too, so they share the
+            # preprocessing cache
+            photo_id = (await photo_store.save_bytes(self.load_image(task.payload))).photo_id
+        return await analyze_stored_photo(self.service, photo_id, task.payload.get("context"))
+
+    async def apply(self, conn: AsyncConnection, outcomes: List[TaskOutcome]):
+        rows = [
+            {
+                "b_item_id": outcome.task.audit_item_id,
+                "b_score": outcome.result.get("suggested_score"),
+                "b_feedback": format_feedback(outcome.result),
+            }
+            for outcome in outcomes
+            if outcome.task.audit_item_id is not None
+        ]
+        if rows:
+            await conn.execute(
+                update(AuditItem)
+                .where(AuditItem.id == bindparam("b_item_id"))
+                .values(ai_score=bindparam("b_score"), ai_feedback=bindparam("b_feedback")),
+                rows,
+            )
+            items = (await conn.execute(
+                select(AuditItem.__table__).where(AuditItem.id.in_([row["b_item_id"] for row in rows]))
+            )).all()
+            await refresh_audit_analytics(conn, sorted({item.audit_id for item in items}))
+            # In the same transaction, so open event streams see the results
+            # arrive (at the dispatcher's next poll, as this is another task)
+            for item in items:
+                await record_item_change(conn, "audit_item.updated", item.audit_id, serialize_audit_item(item))
+
+photo_analysis_handler = PhotoAnalysisHandler(gemini_service)
+job_queue.register(photo_analysis_handler)
@@ -0,0 +1,121 @@
+"""
+Content-addressed photo storage
+
+Uploads are streamed to a temporary file one chunk at a time while being
+hashed, then renamed to <root>/<sha256[:2]>/<sha256>. Identical photos share
+one file, and readers get a read-only memory map rather than a bytes copy.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterable, Iterator
+
+import aiofiles
+
+from app.core.config import settings
+from app.services.gemini_service import sniff_mime_type
+
+PHOTO_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+SNIFF_BYTES = 16
+
+class PhotoTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+
+@dataclass
+class StoredPhoto:
+    photo_id: str
+    size: int
+    mime_type: str
+    deduplicated: bool
+
+class PhotoStore:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def path(self, photo_id: str) -> str:
+        """Path of a stored photo; raises ValueError for a malformed id"""
+        if not PHOTO_ID_PATTERN.match(photo_id):
+            raise ValueError(f"invalid photo id {photo_id[:80]!r}")
+        return os.path.join(self.root, photo_id[:2], photo_id)
+
+    def derived_path(self, photo_id: str, variant: str) -> str:
+        """Path of a rendered variant (resized copy, thumbnail) of a photo"""
+        self.path(photo_id)  # validates the id
+        return os.path.join(self.root, "derived", variant, photo_id[:2], f"{photo_id}.jpg")
+
+    def exists(self, photo_id: str) -> bool:
+        return os.path.exists(self.path(photo_id))
+
+    def mime_type(self, photo_id: str) -> str:
+        with open(self.path(photo_id), "rb") as handle:
+            return sniff_mime_type(handle.read(SNIFF_BYTES))
+
+    async def save_stream(self, chunks: AsyncIterable[bytes]) -> StoredPhoto:
+        """Write chunks to storage, hashing as they arrive.
+
+        Only one chunk is held in memory at a time. Raises PhotoTooLargeError
+        past max_bytes and ValueError for an empty upload.
+        """
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, f"{uuid.uuid4().hex}.part")
+
+        digest = hashlib.sha256()
+        head = b""
+        size = 0
+        try:
+            async with aiofiles.open(tmp_path, "wb") as handle:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise PhotoTooLargeError(f"photo exceeds {self.max_bytes} bytes")
+                    if len(head) < SNIFF_BYTES:
+                        head += chunk[:SNIFF_BYTES - len(head)]
+                    digest.update(chunk)
+                    await handle.write(chunk)
+
+            if size == 0:
+                raise ValueError("empty upload")
+
+            photo_id = digest.hexdigest()
+            final_path = self.path(photo_id)
+            deduplicated = os.path.exists(final_path)
+            if not deduplicated:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        return StoredPhoto(photo_id=photo_id, size=size, mime_type=sniff_mime_type(head), deduplicated=deduplicated)
+
+    async def save_bytes(self, data: bytes) -> StoredPhoto:
+        """Store an image that is already in memory (e.g. decoded base64)"""
+        async def single_chunk():
+            yield data
+        return await self.save_stream(single_chunk())
+
+    def open_mmap(self, photo_id: str):
+        """Read-only memory map of a stored photo; FileNotFoundError if absent"""
+        return map_file(self.path(photo_id))
+
+@contextmanager
+def map_file(path: str) -> Iterator[mmap.mmap]:
+    """Read-only memory map of a file"""
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+# Global instance
+photo_store = PhotoStore(settings.PHOTO_STORAGE_DIR, settings.PHOTO_MAX_UPLOAD_BYTES)
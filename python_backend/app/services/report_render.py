@@ -0,0 +1,227 @@
+"""
+Audit report rendering (CSV, HTML, PDF) from plain audit data
+
+Runs on the shared process pool, so it imports only the standard library.
+The PDF writer is deliberately small: text only, in the built-in Helvetica
+fonts, with Flate-compressed page streams.
+"""
+
+import csv
+import html
+import io
+import os
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+REPORT_FORMATS = {
+    "pdf": "application/pdf",
+    "html": "text/html; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+
+ITEM_COLUMNS = [
+    "id", "category", "item_name", "description", "score", "ai_score", "is_compliant",
+    "auditor_comments", "reviewer_comments", "photo_url", "updated_at",
+]
+
+AUDIT_FIELDS = [
+    ("Property", "property_name"),
+    ("Location", "property_location"),
+    ("Hotel group", "hotel_group_name"),
+    ("Auditor", "auditor_name"),
+    ("Reviewer", "reviewer_name"),
+    ("Status", "status"),
+    ("Overall score", "overall_score"),
+    ("Scheduled", "scheduled_date"),
+    ("Completed", "completed_date"),
+    ("Last updated", "updated_at"),
+]
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    if isinstance(value, float):
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    return str(value)
+
+def _average(values: List[float]) -> Optional[float]:
+    return round(sum(values) / len(values), 2) if values else None
+
+def summarize(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Item count, average score, compliance rate and a per-category breakdown"""
+    categories: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        category = categories.setdefault(item["category"], {"items": 0, "scores": []})
+        category["items"] += 1
+        if item.get("score") is not None:
+            category["scores"].append(item["score"])
+
+    scores = [item["score"] for item in items if item.get("score") is not None]
+    compliance = [item["is_compliant"] for item in items if item.get("is_compliant") is not None]
+    return {
+        "items": len(items),
+        "scored": len(scores),
+        "average_score": _average(scores),
+        "compliance_rate": round(100.0 * sum(compliance) / len(compliance), 1) if compliance else None,
+        "categories": [
+            {"category": name, "items": data["items"], "average_score": _average(data["scores"])}
+            for name, data in categories.items()
+        ],
+    }
+
+def render_csv(report: Dict[str, Any]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ITEM_COLUMNS)
+    for item in report["items"]:
+        writer.writerow([
+            item[column].isoformat() if isinstance(item.get(column), datetime) else item.get(column)
+            for column in ITEM_COLUMNS
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+def render_html(report: Dict[str, Any]) -> bytes:
+    audit, items, summary = report["audit"], report["items"], summarize(report["items"])
+    esc = lambda value: html.escape(_text(value))
+
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">",
+        f"<title>Audit #{audit['id']} report</title>",
+        "<style>body{font-family:Helvetica,Arial,sans-serif;margin:2em;color:#222}"
+        "table{border-collapse:collapse;width:100%;margin-bottom:1.5em}"
+        "th,td{border:1px solid #ccc;padding:4px 6px;text-align:left;vertical-align:top;font-size:13px}"
+        "th{background:#f3f3f3}h2{margin-top:1.5em}</style></head><body>",
+        f"<h1>Audit #{audit['id']}: {esc(audit.get('property_name'))}</h1>",
+        "<table>",
+    ]
+    parts += [f"<tr><th>{label}</th><td>{esc(audit.get(key))}</td></tr>" for label, key in AUDIT_FIELDS]
+    parts += [
+        "</table><h2>Summary</h2><table>",
+        f"<tr><th>Items</th><td>{summary['items']}</td></tr>",
+        f"<tr><th>Scored</th><td>{summary['scored']}</td></tr>",
+        f"<tr><th>Average score</th><td>{esc(summary['average_score'])}</td></tr>",
+        f"<tr><th>Compliance rate</th><td>{esc(summary['compliance_rate'])}{'%' if summary['compliance_rate'] is not None else ''}</td></tr>",
+        "</table><table><tr><th>Category</th><th>Items</th><th>Average score</th></tr>",
+    ]
+    parts += [
+        f"<tr><td>{esc(row['category'])}</td><td>{row['items']}</td><td>{esc(row['average_score'])}</td></tr>"
+        for row in summary["categories"]
+    ]
+    parts.append("</table><h2>Items</h2><table><tr><th>Category</th><th>Item</th><th>Description</th>"
+                 "<th>Score</th><th>AI score</th><th>Compliant</th><th>Auditor comments</th><th>Reviewer comments</th></tr>")
+    parts += [
+        f"<tr><td>{esc(item['category'])}</td><td>{esc(item['item_name'])}</td><td>{esc(item.get('description'))}</td>"
+        f"<td>{esc(item.get('score'))}</td><td>{esc(item.get('ai_score'))}</td><td>{esc(item.get('is_compliant'))}</td>"
+        f"<td>{esc(item.get('auditor_comments'))}</td><td>{esc(item.get('reviewer_comments'))}</td></tr>"
+        for item in items
+    ]
+    parts.append(f"</table><p>Generated {esc(report.get('generated_at'))}</p></body></html>")
+    return "".join(parts).encode("utf-8")
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US Letter, in points
+MARGIN = 40
+LEADING = 13
+# (x, max characters) per item table column: category, item, score, AI, compliant
+ITEM_TABLE = [(40, 22), (165, 52), (440, 6), (490, 6), (535, 9)]
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode("latin-1", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+def _clip(text: str, width: int) -> str:
+    return text if len(text) <= width else text[:width - 1] + "~"
+
+def _pdf_lines(report: Dict[str, Any]) -> List[Tuple[str, List[Tuple[int, str]]]]:
+    """Report content as (font, [(x, text), ...]) lines, before pagination"""
+    audit, summary = report["audit"], summarize(report["items"])
+    lines: List[Tuple[str, List[Tuple[int, str]]]] = [
+        ("title", [(MARGIN, f"Audit #{audit['id']}: {_text(audit.get('property_name'))}")]),
+        ("body", [(MARGIN, "")]),
+    ]
+    lines += [("body", [(MARGIN, label), (160, _clip(_text(audit.get(key)), 70))]) for label, key in AUDIT_FIELDS]
+    lines += [
+        ("body", [(MARGIN, "")]),
+        ("bold", [(MARGIN, "Summary")]),
+        ("body", [(MARGIN, "Items"), (160, str(summary["items"]))]),
+        ("body", [(MARGIN, "Average score"), (160, _text(summary["average_score"]))]),
+        ("body", [(MARGIN, "Compliance rate"),
+                  (160, f"{summary['compliance_rate']}%" if summary["compliance_rate"] is not None else "")]),
+        ("body", [(MARGIN, "")]),
+        ("bold", [(MARGIN, "Category"), (300, "Items"), (360, "Average score")]),
+    ]
+    lines += [
+        ("body", [(MARGIN, _clip(row["category"], 45)), (300, str(row["items"])), (360, _text(row["average_score"]))])
+        for row in summary["categories"]
+    ]
+    lines += [("body", [(MARGIN, "")]), ("bold", list(zip([x for x, _ in ITEM_TABLE],
+                                                          ["Category", "Item", "Score", "AI", "Compliant"])))]
+    for item in report["items"]:
+        values = [item["category"], item["item_name"], item.get("score"), item.get("ai_score"), item.get("is_compliant")]
+        lines.append(("body", [(x, _clip(_text(value), width)) for (x, width), value in zip(ITEM_TABLE, values)]))
+    return lines
+
+def render_pdf(report: Dict[str, Any]) -> bytes:
+    fonts = {"title": (b"/F2", 16), "bold": (b"/F2", 10), "body": (b"/F1", 9)}
+    lines = _pdf_lines(report)
+    per_page = (PAGE_HEIGHT - 2 * MARGIN - 2 * LEADING) // LEADING
+    pages = [lines[start:start + per_page] for start in range(0, len(lines), per_page)] or [[]]
+    footer = f"Audit #{report['audit']['id']} - generated {_text(report.get('generated_at'))}"
+
+    # Objects 1-4 are fixed; each page then adds a page object and its stream
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for number, page in enumerate(pages, 1):
+        stream = io.BytesIO()
+        y = PAGE_HEIGHT - MARGIN
+        for font, cells in page:
+            name, size = fonts[font]
+            for x, text in cells:
+                if text:
+                    stream.write(b"BT %s %d Tf %d %d Td %s Tj ET\n" % (name, size, x, y, _pdf_string(text)))
+            y -= LEADING + (size - 9)
+        stream.write(b"BT /F1 8 Tf %d %d Td %s Tj ET\n" % (MARGIN, MARGIN - 10, _pdf_string(f"{footer} - page {number} of {len(pages)}")))
+        content = zlib.compress(stream.getvalue())
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(content), content))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>" % (PAGE_WIDTH, PAGE_HEIGHT, content_id)
+        )
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for object_id, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (object_id, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+RENDERERS = {"pdf": render_pdf, "html": render_html, "csv": render_csv}
+
+def render_report(fmt: str, report: Dict[str, Any], dest_path: str) -> int:
+    """Render report in fmt and write it atomically to dest_path; returns its size"""
+    data = RENDERERS[fmt](report)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(data)
+    os.replace(tmp_path, dest_path)
+    return len(data)
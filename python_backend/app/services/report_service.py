@@ -0,0 +1,110 @@
+"""
+Audit report generation, run as background jobs on the job queue
+
+Reports are rendered on the shared process pool and stored under a key
+derived from everything they are built from: the audit's updated_at, the
+newest item change, the item count and the format. Editing an item does not
+touch the audit row, hence the item terms. An unchanged audit maps to the
+same key, so its report is served from disk without being rebuilt.
+"""
+
+import hashlib
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.process_pool import cpu_pool
+from app.models.models import Audit, AuditItem
+from app.services.audit_service import load_audit_detail, serialize_audit
+from app.services.job_queue import ClaimedTask, JobHandler, job_queue
+from app.services.report_render import ITEM_COLUMNS, REPORT_FORMATS, render_report
+
+REPORT = "report"
+# Bump when the rendered output changes, so cached reports are rebuilt
+REPORT_TEMPLATE_VERSION = "1"
+REPORT_FILENAME_PATTERN = re.compile(r"^([0-9a-f]{32})\.(pdf|html|csv)$")
+
+class ReportStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, audit_id: int, key: str, fmt: str) -> str:
+        return os.path.join(self.root, str(audit_id), f"{key}.{fmt}")
+
+    def url(self, audit_id: int, key: str, fmt: str) -> str:
+        return f"/api/reports/{audit_id}/{key}.{fmt}"
+
+    def exists(self, audit_id: int, key: str, fmt: str) -> bool:
+        return os.path.exists(self.path(audit_id, key, fmt))
+
+    def find(self, audit_id: int, filename: str) -> Optional[Tuple[str, str]]:
+        """(path, format) of a stored report, or None if absent or malformed"""
+        match = REPORT_FILENAME_PATTERN.match(filename)
+        if not match:
+            return None
+        path = self.path(audit_id, match.group(1), match.group(2))
+        return (path, match.group(2)) if os.path.exists(path) else None
+
+async def report_key(db: AsyncSession, audit: Audit, fmt: str) -> str:
+    """Cache key for a report of the audit as it stands now"""
+    last_item_change, item_count = (await db.execute(
+        select(func.max(AuditItem.updated_at), func.count(AuditItem.id)).where(AuditItem.audit_id == audit.id)
+    )).one()
+    parts = [REPORT_TEMPLATE_VERSION, fmt, audit.id, audit.updated_at, last_item_change, item_count]
+    return hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:32]
+
+async def load_report_data(db: AsyncSession, audit_id: int) -> Optional[Dict[str, Any]]:
+    """Plain audit and item data for report_render; None if the audit is gone"""
+    audit = await load_audit_detail(db, audit_id)
+    if audit is None:
+        return None
+    columns = [getattr(AuditItem, column) for column in ITEM_COLUMNS]
+    rows = await db.execute(
+        select(*columns).where(AuditItem.audit_id == audit_id).order_by(AuditItem.category, AuditItem.id)
+    )
+    return {
+        "audit": serialize_audit(audit),
+        "items": [dict(row._mapping) for row in rows],
+        "generated_at": datetime.utcnow(),
+    }
+
+class ReportHandler(JobHandler):
+    """Build one report per task; the result carries its download URL"""
+
+    kind = REPORT
+
+    def __init__(self, store: ReportStore):
+        self.store = store
+
+    async def run(self, task: ClaimedTask) -> Dict[str, Any]:
+        audit_id, fmt = task.payload["audit_id"], task.payload["format"]
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"unsupported report format {fmt!r}")
+
+        # Key and data come from one session, so the stored file always
+        # matches the key it is filed under
+        async with AsyncSessionLocal() as db:
+            audit = await db.get(Audit, audit_id, populate_existing=True)
+            if audit is None:
+                raise ValueError(f"audit {audit_id} not found")
+            key = await report_key(db, audit, fmt)
+            path = self.store.path(audit_id, key, fmt)
+            report = None if os.path.exists(path) else await load_report_data(db, audit_id)
+
+        if report is not None:
+            await cpu_pool.run(render_report, fmt, report, path)
+        return {
+            "report_url": self.store.url(audit_id, key, fmt),
+            "format": fmt,
+            "bytes": os.path.getsize(path),
+        }
+
+report_store = ReportStore(settings.REPORT_STORAGE_DIR)
+report_handler = ReportHandler(report_store)
+job_queue.register(report_handler)
@@ -0,0 +1,235 @@
+"""
+Weighted audit scoring driven by the shared audit checklist
+
+shared/auditChecklist.ts is parsed once (and again when it changes) into
+NumPy arrays. Scores follow calculateCategoryScore/calculateOverallScore in
+that file: an item contributes score/maxScore times its weight, checklist
+items without a score count as zero, a category score is the weighted mean
+of its items and the overall score the weighted mean of the categories, both
+on 0-100. A whole batch of audits is scored with one matrix product, so a
+portfolio rescore after a weight change is cheap.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import Audit, AuditItem
+
+CHECKLIST_EXPORT = "HOTEL_AUDIT_CHECKLIST"
+RESCORE_CHUNK = 2000
+
+_TOKEN = re.compile(
+    r"""\s+|//[^\n]*|/\*.*?\*/"""
+    r"""|'((?:[^'\\]|\\.)*)'|"((?:[^"\\]|\\.)*)"|(-?\d+(?:\.\d+)?)|([A-Za-z_$][\w$]*)|([\[\]{}:,])""",
+    re.S,
+)
+
+def _tokens(source: str, pos: int) -> Iterator[Tuple[str, Any]]:
+    while pos < len(source):
+        match = _TOKEN.match(source, pos)
+        if match is None:
+            raise ValueError(f"unexpected input at {source[pos:pos + 30]!r}")
+        pos = match.end()
+        single, double, number, name, punct = match.groups()
+        if single is not None or double is not None:
+            yield "str", re.sub(r"\\(.)", r"\1", single if single is not None else double)
+        elif number is not None:
+            yield "num", float(number)
+        elif name is not None:
+            yield "name", name
+        elif punct is not None:
+            yield "punct", punct
+
+def _parse_value(tokens: Iterator[Tuple[str, Any]], token: Tuple[str, Any]) -> Any:
+    kind, value = token
+    if kind in ("str", "num"):
+        return value
+    if kind == "name":
+        return {"true": True, "false": False, "null": None, "undefined": None}[value]
+    if value == "[":
+        items = []
+        token = next(tokens)
+        while token != ("punct", "]"):
+            items.append(_parse_value(tokens, token))
+            token = next(tokens)
+            if token == ("punct", ","):
+                token = next(tokens)
+        return items
+    if value == "{":
+        obj = {}
+        token = next(tokens)
+        while token != ("punct", "}"):
+            key = token[1]
+            if next(tokens) != ("punct", ":"):
+                raise ValueError(f"expected ':' after {key!r}")
+            obj[key] = _parse_value(tokens, next(tokens))
+            token = next(tokens)
+            if token == ("punct", ","):
+                token = next(tokens)
+        return obj
+    raise ValueError(f"unexpected {value!r}")
+
+def parse_checklist(source: str) -> List[Dict[str, Any]]:
+    """The HOTEL_AUDIT_CHECKLIST array literal of auditChecklist.ts as Python data"""
+    match = re.search(rf"export\s+const\s+{CHECKLIST_EXPORT}\b[^=]*=", source)
+    if match is None:
+        raise ValueError(f"{CHECKLIST_EXPORT} not found")
+    tokens = _tokens(source, match.end())
+    return _parse_value(tokens, next(tokens))
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+class Checklist:
+    """Checklist weights and max scores as arrays, items in checklist order"""
+
+    def __init__(self, categories: List[Dict[str, Any]]):
+        self.category_ids = [category["id"] for category in categories]
+        self.category_names = [category["name"] for category in categories]
+        self.category_weights = np.array([category["weight"] for category in categories], dtype=float)
+
+        items = [(index, item) for index, category in enumerate(categories) for item in category["items"]]
+        self.item_ids = [item["id"] for _, item in items]
+        self.item_category = np.array([index for index, _ in items], dtype=np.intp)
+        self.max_scores = np.array([item["maxScore"] for _, item in items], dtype=float)
+        self.item_weights = np.array([item["weight"] for _, item in items], dtype=float)
+
+        # membership[i, c] is item i's weight if it belongs to category c, so
+        # fractions @ membership gives every category's weighted sum at once
+        self.membership = np.zeros((len(items), len(categories)))
+        self.membership[np.arange(len(items)), self.item_category] = self.item_weights
+        self.category_weight_totals = self.membership.sum(axis=0)
+
+        # Audit items may name a checklist item by its id or its label
+        self._index: Dict[str, int] = {}
+        for position, (_, item) in enumerate(items):
+            self._index[_normalize(item["item"])] = position
+            self._index[_normalize(item["id"])] = position
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def item_index(self, name: str) -> int:
+        """Checklist position of an item id or label, or -1"""
+        return self._index.get(_normalize(name), -1)
+
+    def score(self, fractions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(category scores, overall scores) for an (audits x items) matrix of score/maxScore"""
+        weighted = fractions @ self.membership
+        categories = np.divide(
+            100.0 * weighted, self.category_weight_totals,
+            out=np.zeros_like(weighted), where=self.category_weight_totals > 0,
+        )
+        total = self.category_weights.sum()
+        overall = categories @ self.category_weights / total if total > 0 else np.zeros(len(fractions))
+        return categories, overall
+
+def compliance_zones(overall: np.ndarray) -> np.ndarray:
+    return np.where(
+        overall >= settings.ANALYTICS_GREEN_MIN_SCORE, "green",
+        np.where(overall >= settings.ANALYTICS_AMBER_MIN_SCORE, "amber", "red"),
+    )
+
+_loaded: Optional[Tuple[str, float, Checklist]] = None
+
+def get_checklist() -> Checklist:
+    """The scoring checklist, reparsed only when the file has changed"""
+    global _loaded
+    path = settings.SCORING_CHECKLIST_PATH
+    mtime = os.path.getmtime(path)
+    if _loaded is None or _loaded[:2] != (path, mtime):
+        with open(path, encoding="utf-8") as handle:
+            _loaded = (path, mtime, Checklist(parse_checklist(handle.read())))
+    return _loaded[2]
+
+@dataclass
+class ScoredAudits:
+    audit_ids: List[int]
+    category_scores: np.ndarray  # audits x categories
+    overall: np.ndarray
+    zones: np.ndarray
+    matched: np.ndarray  # checklist items found per audit
+    unmatched: np.ndarray  # items with no checklist counterpart
+    checklist: Checklist = field(repr=False)
+
+def score_rows(
+    checklist: Checklist,
+    audit_ids: Sequence[int],
+    item_audit_ids: Sequence[int],
+    item_names: Sequence[str],
+    item_scores: Sequence[Optional[float]],
+) -> ScoredAudits:
+    """Score audits from their items given as three parallel sequences"""
+    positions = {audit_id: row for row, audit_id in enumerate(audit_ids)}
+    rows = np.fromiter((positions.get(audit_id, -1) for audit_id in item_audit_ids), dtype=np.intp, count=len(item_audit_ids))
+    # Item names repeat across audits, so only the distinct ones are looked up
+    codes: Dict[str, int] = {}
+    inverse = np.fromiter((codes.setdefault(name, len(codes)) for name in item_names), dtype=np.intp, count=len(item_names))
+    columns = np.array([checklist.item_index(name) for name in codes] + [-1], dtype=np.intp)[inverse]
+    scores = np.array(item_scores, dtype=float).reshape(-1)  # None becomes NaN
+
+    known = (rows >= 0) & (columns >= 0)
+    matched = np.bincount(rows[known], minlength=len(audit_ids))
+    unmatched = np.bincount(rows[(rows >= 0) & (columns < 0)], minlength=len(audit_ids))
+
+    scored = known & ~np.isnan(scores)
+    scale = settings.SCORING_ITEM_SCALE or checklist.max_scores[columns[scored]]
+    fractions = np.zeros((len(audit_ids), len(checklist)))
+    fractions[rows[scored], columns[scored]] = np.clip(scores[scored] / scale, 0.0, 1.0)
+
+    category_scores, overall = checklist.score(fractions)
+    return ScoredAudits(
+        audit_ids=list(audit_ids),
+        category_scores=category_scores,
+        overall=overall,
+        zones=compliance_zones(overall),
+        matched=matched,
+        unmatched=unmatched,
+        checklist=checklist,
+    )
+
+async def score_audits(db: AsyncSession, audit_ids: Sequence[int]) -> ScoredAudits:
+    """Score audits from their stored items"""
+    rows = (await db.execute(
+        select(AuditItem.audit_id, AuditItem.item_name, AuditItem.score).where(AuditItem.audit_id.in_(audit_ids))
+    )).all()
+    return score_rows(get_checklist(), audit_ids, [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
+
+async def rescore_audits(db: AsyncSession, audit_ids: Optional[Sequence[int]] = None) -> Tuple[int, List[int]]:
+    """Recompute and store overall_score; returns (audits scored, ids changed).
+
+    Audits with no checklist items are left alone, so a hand-set
+    overall_score on a free-form audit is kept. None rescores every audit.
+    The caller commits.
+    """
+    if audit_ids is None:
+        audit_ids = (await db.scalars(select(Audit.id).order_by(Audit.id))).all()
+    scored, changed = 0, []
+    for start in range(0, len(audit_ids), RESCORE_CHUNK):
+        chunk = list(audit_ids[start:start + RESCORE_CHUNK])
+        result = await score_audits(db, chunk)
+        current = dict((await db.execute(select(Audit.id, Audit.overall_score).where(Audit.id.in_(chunk)))).all())
+        rows = []
+        for audit_id, overall, matched in zip(result.audit_ids, result.overall, result.matched):
+            if not matched or audit_id not in current:
+                continue
+            scored += 1
+            overall = round(float(overall), 2)
+            if current[audit_id] is None or abs(current[audit_id] - overall) > 1e-9:
+                rows.append({"b_audit_id": audit_id, "b_score": overall})
+        if rows:
+            await db.execute(
+                update(Audit.__table__)
+                .where(Audit.__table__.c.id == bindparam("b_audit_id"))
+                .values(overall_score=bindparam("b_score")),
+                rows,
+            )
+            changed.extend(row["b_audit_id"] for row in rows)
+    return scored, changed
@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the Hotel Audit backend.
+
+Run from the python_backend directory, e.g. ``python -m benchmarks.sqlite_profile``.
+"""
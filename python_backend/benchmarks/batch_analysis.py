@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Sequential /ai/analyze-photo calls vs one /ai/analyze-photos:batch job
+
+Starts benchmarks/fake_gemini.py as a subprocess, creates an audit with N
+items and analyses one distinct photo per item both ways, reporting wall time.
+
+    python -m benchmarks.batch_analysis --photos 100 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/batch_analysis.db"
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_gemini", "--port", str(args.port), "--latency", str(args.latency)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    try:
+        from fastapi.testclient import TestClient
+        import manage
+        from main import app
+
+        asyncio.run(manage.init_db())
+
+        with TestClient(app) as client:
+            for _ in range(50):
+                try:
+                    import httpx
+                    httpx.get(os.environ["GEMINI_BASE_URL"] + "/stats")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+
+            audit = client.post("/api/audits/", json={"property_id": 1, "auditor_id": 2}).json()
+            entries = [{"category": "Room", "item_name": f"Item {i}"} for i in range(args.photos)]
+            ids = client.post(f"/api/audits/{audit['id']}/items:bulk", json=entries).json()["ids"]
+
+            def photo(tag, item_id):
+                return base64.b64encode(f"{tag}-{item_id}".encode() * 32).decode()
+
+            started = time.perf_counter()
+            for item_id in ids:
+                client.post("/api/ai/analyze-photo", json={"image_data": photo("seq", item_id), "context": "Room"})
+            sequential = time.perf_counter() - started
+
+            started = time.perf_counter()
+            job = client.post("/api/ai/analyze-photos:batch", json={
+                "audit_id": audit["id"],
+                "photos": [{"audit_item_id": item_id, "image_data": photo("batch", item_id)} for item_id in ids],
+            }).json()
+            while job["status"] != "completed":
+                time.sleep(0.05)
+                job = client.get(f"/api/ai/jobs/{job['id']}").json()
+            batch = time.perf_counter() - started
+
+        print(json.dumps({
+            "photos": args.photos,
+            "model_latency_s": args.latency,
+            "sequential_s": round(sequential, 2),
+            "batch_job_s": round(batch, 2),
+            "batch_completed": job["completed"],
+            "batch_failed": job["failed"],
+        }, indent=2))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
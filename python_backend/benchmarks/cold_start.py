@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Cold start: process launch to first successful request
+
+Initializes a database once (manage.py init-db), then repeatedly starts the
+API in a fresh interpreter and times how long it takes until /api/health and
+then a database-backed endpoint answer 200. Pass --backend-dir to measure
+another checkout of python_backend (e.g. the previous commit, via
+`git worktree add`) against the same database.
+
+    python -m benchmarks.cold_start --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def time_to_first_requests(backend_dir: str, env: dict, port: int) -> dict:
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=url) as client:
+            while True:
+                try:
+                    if client.get("/api/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError("server exited during startup")
+                time.sleep(0.005)
+            health = time.perf_counter() - started
+            client.get("/api/audits/").raise_for_status()
+            audits = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+    return {"health_s": health, "audit_list_s": audits}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8841)
+    parser.add_argument("--backend-dir", default=BACKEND_DIR)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{workdir}/cold_start.db",
+               WORKER_STATUS_FILE=os.path.join(workdir, "workers.json"))
+    subprocess.run([sys.executable, "manage.py", "init-db"], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    runs = [time_to_first_requests(args.backend_dir, env, args.port) for _ in range(args.runs)]
+    results = {"backend_dir": args.backend_dir, "runs": args.runs}
+    for key in ("health_s", "audit_list_s"):
+        values = [run[key] for run in runs]
+        results[key] = {"median": round(statistics.median(values), 3), "min": round(min(values), 3)}
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Per-route latency and query counts, as reported by /metrics
+
+Starts serve.py on a fresh database, drives a mix of audit endpoints with
+concurrent keep-alive clients, then scrapes /metrics and prints for each
+route template: requests, p50/p95/p99 latency (estimated from the histogram
+buckets, as Prometheus' histogram_quantile does), SQL statements and SQL
+time per request. Any route doing more than a handful of queries per request
+is a candidate N+1.
+
+    python -m benchmarks.endpoint_latency --workers 2 --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.proxy_throughput import BACKEND_DIR, drive, wait_until_up
+
+SAMPLE = re.compile(r'^(\w+)\{(.*)\} (\S+)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+def parse_metrics(text: str):
+    """{metric name: [(labels dict, value)]} for the labelled samples"""
+    samples = defaultdict(list)
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if match:
+            name, labels, value = match.groups()
+            samples[name].append((dict(LABEL.findall(labels)), float(value)))
+    return samples
+
+def quantile(q: float, buckets):
+    """Linear interpolation within the bucket holding the q-th observation"""
+    buckets = sorted(buckets)
+    total = buckets[-1][1]
+    if not total:
+        return math.nan
+    rank = q * total
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == math.inf:
+                return lower_bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / max(count - lower_count, 1)
+        lower_bound, lower_count = bound, count
+    return lower_bound
+
+def summarize(samples):
+    routes = defaultdict(lambda: defaultdict(list))
+    for name in ("http_request_duration_seconds_bucket", "http_request_db_queries_bucket"):
+        for labels, value in samples[name]:
+            key = (labels["method"], labels["route"])
+            routes[key][name].append((float(labels["le"].replace("+Inf", "inf")), value))
+    totals = {}
+    for name in ("http_request_duration_seconds", "http_request_db_queries", "http_request_db_seconds"):
+        for labels, value in samples[name + "_sum"]:
+            totals[(labels["method"], labels["route"], name)] = value
+
+    report = {}
+    for (method, route), histograms in sorted(routes.items()):
+        latency = histograms["http_request_duration_seconds_bucket"]
+        count = max(count for _, count in latency)
+        report[f"{method} {route}"] = {
+            "requests": int(count),
+            "p50_ms": round(quantile(0.50, latency) * 1000, 1),
+            "p95_ms": round(quantile(0.95, latency) * 1000, 1),
+            "p99_ms": round(quantile(0.99, latency) * 1000, 1),
+            "queries_per_request": round(totals[(method, route, "http_request_db_queries")] / count, 2),
+            "db_ms_per_request": round(totals[(method, route, "http_request_db_seconds")] / count * 1000, 2),
+        }
+    return report
+
+async def run(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    await wait_until_up(base_url + "/api/health")
+
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        audit = (await client.post("/api/audits/", json={"property_id": 1, "auditor_id": 2})).json()
+        entries = [{"category": "Rooms", "item_name": f"Item {i}", "score": i % 5 + 1} for i in range(20)]
+        await client.post(f"/api/audits/{audit['id']}/items:bulk", json=entries)
+
+    requests = [
+        ("GET", "/api/health", None),
+        ("GET", "/api/audits/", None),
+        ("GET", f"/api/audits/{audit['id']}", None),
+        ("GET", f"/api/audits/{audit['id']}/items", None),
+        ("GET", "/api/properties/", None),
+        ("GET", "/api/audits/does-not-exist", None),
+    ]
+    load = await drive(base_url, requests, args.concurrency, args.requests)
+    # Let every worker flush its snapshot before scraping
+    await asyncio.sleep(args.flush_wait)
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        samples = parse_metrics((await client.get("/metrics")).text)
+    return {"load": load, "routes": summarize(samples)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8813)
+    parser.add_argument("--flush-wait", type=float, default=1.5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{workdir}/endpoint_latency.db",
+        WORKER_STATUS_FILE=f"{workdir}/run/workers.json",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--init-db", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
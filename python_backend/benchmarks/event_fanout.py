@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Fan-out cost of the /api/events/audits change stream
+
+Starts serve.py on a fresh database, opens --connections event streams (each
+filtered to one of --properties properties, plus --unfiltered streams that
+see everything), then updates one audit at a time and records when every
+stream that should see the change receives it. Reports delivery latency
+(from sending the write to receipt), deliveries lost, the server's RSS per
+open stream and its CPU time per delivery.
+
+    python -m benchmarks.event_fanout --connections 2000 --writes 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.proxy_throughput import BACKEND_DIR, wait_until_up
+from benchmarks.suite import cpu_seconds, memory_mb, percentile
+
+AUDIT_ID = re.compile(rb'^data: \{"id": (\d+)')
+
+async def open_stream(port: int, query: str, received, ready: asyncio.Event):
+    """A bare-socket SSE client: records (audit id, time) for each audit event it gets"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /api/events/audits{query} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if line.startswith(b"event: ready"):
+                ready.set()
+                continue
+            match = AUDIT_ID.match(line)
+            if match:
+                received[int(match.group(1))].append(time.perf_counter())
+    finally:
+        writer.close()
+
+async def run(args, server_pid: int):
+    base_url = f"http://127.0.0.1:{args.port}"
+    await wait_until_up(base_url + "/api/health")
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        property_ids = []
+        for p in range(args.properties):
+            response = await client.post("/api/properties/", json={
+                "name": f"Fan-out hotel {p}", "location": "Bench City", "hotel_group_id": 1})
+            property_ids.append(response.json()["id"])
+        audits = []
+        for w in range(args.writes):
+            property_id = property_ids[w % len(property_ids)]
+            response = await client.post("/api/audits/", json={"property_id": property_id, "auditor_id": 2})
+            audits.append((response.json()["id"], property_id))
+
+        rss_before = memory_mb(server_pid, "VmRSS")
+        received = defaultdict(list)
+        subscribers = defaultdict(int)  # property id (None: all) -> streams
+        streams = []
+        readies = []
+        connect_started = time.perf_counter()
+        for c in range(args.connections + args.unfiltered):
+            property_id = property_ids[c % len(property_ids)] if c < args.connections else None
+            subscribers[property_id] += 1
+            ready = asyncio.Event()
+            readies.append(ready)
+            query = f"?property_id={property_id}" if property_id is not None else ""
+            streams.append(asyncio.create_task(open_stream(args.port, query, received, ready)))
+            # Connect in batches, within the listen backlog
+            if c % 200 == 199:
+                await ready.wait()
+        await asyncio.gather(*(ready.wait() for ready in readies))
+        connect_seconds = time.perf_counter() - connect_started
+        await asyncio.sleep(1)
+        rss_streams = memory_mb(server_pid, "VmRSS")
+
+        sent = {}
+        cpu_before = cpu_seconds(server_pid)
+        for audit_id, property_id in audits:
+            sent[audit_id] = time.perf_counter()
+            await client.put(f"/api/audits/{audit_id}", json={"status": "in_progress"})
+            await asyncio.sleep(args.interval)
+        await asyncio.sleep(args.settle)
+        cpu_used = cpu_seconds(server_pid) - cpu_before
+
+        metrics = (await client.get("/metrics")).text
+
+    for stream in streams:
+        stream.cancel()
+    await asyncio.gather(*streams, return_exceptions=True)
+
+    latencies = sorted(t - sent[audit_id] for audit_id, times in received.items() if audit_id in sent for t in times)
+    expected = sum(subscribers[property_id] + subscribers[None] for _, property_id in audits)
+    delivered = len(latencies)
+    open_streams = args.connections + args.unfiltered
+    return {
+        "streams": open_streams,
+        "writes": len(audits),
+        "deliveries": delivered,
+        "lost": expected - delivered,
+        "connect_s": round(connect_seconds, 2),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "latency_max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+        "server_rss_mb": {"idle": rss_before, "streaming": rss_streams},
+        "kb_per_stream": round((rss_streams - rss_before) * 1024 / open_streams, 1),
+        "server_cpu_us_per_delivery": round(cpu_used / max(delivered, 1) * 1e6, 1),
+        "resets": [line for line in metrics.splitlines() if line.startswith("event_stream_resets_total")],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=2000, help="streams filtered to one property")
+    parser.add_argument("--unfiltered", type=int, default=20, help="streams that see every event")
+    parser.add_argument("--properties", type=int, default=20)
+    parser.add_argument("--writes", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between writes")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait for the last deliveries")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8814)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{workdir}/event_fanout.db",
+        WORKER_STATUS_FILE=f"{workdir}/run/workers.json",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--init-db", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        print(json.dumps(asyncio.run(run(args, server.pid)), indent=2))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini REST generateContent endpoint
+
+Answers POST /v1beta/models/{model}:generateContent after a fixed delay with
+a canned JSON analysis, and counts calls at GET /stats. Point the backend at
+it with GEMINI_BASE_URL=http://127.0.0.1:8765.
+
+    python -m benchmarks.fake_gemini --port 8765 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import json
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+ANALYSIS = {
+    "analysis": "Photo shows good condition with minor issues",
+    "suggested_score": 4.2,
+    "compliance_issues": ["Minor wear on surfaces"],
+    "recommendations": ["Regular maintenance recommended"],
+    "reasoning": "Meets most standards with minor improvements needed",
+    "confidence": 0.85,
+}
+
+
+def create_app(latency: float) -> Starlette:
+    stats = {"calls": 0, "in_flight": 0, "peak_in_flight": 0, "bytes_received": 0}
+
+    async def generate_content(request: Request):
+        stats["bytes_received"] += len(await request.body())
+        stats["calls"] += 1
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            stats["in_flight"] -= 1
+        text = "```json\n" + json.dumps(ANALYSIS) + "\n```"
+        return JSONResponse({"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]})
+
+    async def get_stats(request: Request):
+        return JSONResponse(stats)
+
+    return Starlette(routes=[
+        Route("/v1beta/models/{model}:generateContent", generate_content, methods=["POST"]),
+        Route("/stats", get_stats),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per model call")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+GeminiService latency and throughput at 1/10/100 concurrent analyses
+
+Starts benchmarks/fake_gemini.py as a subprocess, points a GeminiService at it
+and runs photo analyses at each concurrency level with distinct images (cache
+misses), then once more with 100 identical concurrent requests to show
+coalescing (a single upstream call).
+
+    python -m benchmarks.gemini_concurrency --latency 0.2 --requests 200
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def wait_for_server(url):
+    import httpx
+
+    async with httpx.AsyncClient() as client:
+        for _ in range(100):
+            try:
+                await client.get(url + "/stats")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("fake Gemini server did not start")
+
+
+async def run_level(service, concurrency, requests, image_seed):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        image = base64.b64encode(f"{image_seed}-{i}".encode() * 64).decode()
+        async with semaphore:
+            start = time.perf_counter()
+            await service.analyze_audit_photo(image, "Lobby")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "throughput_per_sec": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+    }
+
+
+async def run(args, url):
+    from app.services.gemini_service import GeminiService, HTTPGeminiBackend
+
+    await wait_for_server(url)
+    results = []
+    for concurrency in (1, 10, 100):
+        service = GeminiService(HTTPGeminiBackend(url, "", max_connections=concurrency))
+        service.max_concurrency = concurrency
+        requests = min(args.requests, concurrency * 20)
+        results.append(await run_level(service, concurrency, requests, f"level{concurrency}"))
+        await service.backend.aclose()
+
+    service = GeminiService(HTTPGeminiBackend(url, "", max_connections=100))
+    image = base64.b64encode(b"same-photo" * 64).decode()
+    await asyncio.gather(*(service.analyze_audit_photo(image, "Lobby") for _ in range(100)))
+    await service.backend.aclose()
+    results.append({"identical_concurrent_requests": 100, "upstream_calls": service.stats["calls"],
+                    "coalesced": service.stats["coalesced"]})
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_gemini", "--port", str(args.port), "--latency", str(args.latency)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    try:
+        asyncio.run(run(args, url))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
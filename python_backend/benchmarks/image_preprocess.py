@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Photo preprocessing throughput in images per second per core
+
+Generates synthetic phone-sized JPEGs (12 MP, EXIF-rotated), then renders the
+analysis copy and the default thumbnail for each through a process pool of
+1..--max-workers processes, as ImageProcessor does.
+
+    python -m benchmarks.image_preprocess --images 24 --max-workers 4
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+def make_photo(path, width, height, seed):
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([(x * 255 // width), (y * 255 // height), ((x + y) * 255 // (width + height))], axis=-1)
+    noise = rng.integers(0, 40, size=(height, width, 3))
+    image = Image.fromarray(np.clip(base + noise, 0, 255).astype("uint8"))
+    exif = image.getexif()
+    exif[0x0112] = 6  # rotated 90 degrees, as phones store portrait shots
+    image.save(path, "JPEG", quality=92, exif=exif)
+
+def render_pair(source, workdir, analysis_edge, thumb_edge):
+    from app.services.image_ops import render_variant
+
+    name = os.path.basename(source)
+    analysis = render_variant(source, os.path.join(workdir, "analysis", name), analysis_edge, 85)
+    thumbnail = render_variant(source, os.path.join(workdir, "thumb", name), thumb_edge, 75)
+    return analysis[2], thumbnail[2]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--analysis-edge", type=int, default=1536)
+    parser.add_argument("--thumb-edge", type=int, default=320)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        sources = []
+        for i in range(args.images):
+            path = os.path.join(workdir, f"photo{i}.jpg")
+            make_photo(path, args.width, args.height, i)
+            sources.append(path)
+        source_bytes = sum(os.path.getsize(path) for path in sources)
+
+        results = []
+        workers = 1
+        while workers <= args.max_workers:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Warm the workers (imports) before timing
+                list(pool.map(render_pair, sources[:workers], [workdir] * workers,
+                              [args.analysis_edge] * workers, [args.thumb_edge] * workers))
+                started = time.perf_counter()
+                sizes = list(pool.map(render_pair, sources, [workdir] * len(sources),
+                                      [args.analysis_edge] * len(sources), [args.thumb_edge] * len(sources)))
+                elapsed = time.perf_counter() - started
+            results.append({
+                "workers": workers,
+                "images_per_sec": round(len(sources) / elapsed, 2),
+                "images_per_sec_per_core": round(len(sources) / elapsed / min(workers, os.cpu_count() or 1), 2),
+            })
+            workers *= 2
+
+        print(json.dumps({
+            "images": args.images,
+            "source_mb_avg": round(source_bytes / len(sources) / 1e6, 2),
+            "analysis_kb_avg": round(sum(a for a, _ in sizes) / len(sizes) / 1e3, 1),
+            "thumbnail_kb_avg": round(sum(t for _, t in sizes) / len(sizes) / 1e3, 1),
+            "cpus": os.cpu_count(),
+            "results": results,
+        }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Event-loop latency during a login storm
+
+Fires concurrent logins at POST /api/auth/login (in-process) while a ticker
+task measures how late the event loop wakes it up. Runs twice: once with
+verification inline on the loop (how the old SHA-256 check -- and a naive
+bcrypt port -- behaved) and once through the app's offloaded PasswordHasher.
+
+    python -m benchmarks.login_storm --logins 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def measure_loop_lag(stop, lags, interval=0.001):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def storm(mode, users, logins, concurrency):
+    import httpx
+    import main
+    from app.core import security
+
+    original = security.password_hasher.verify_and_update
+    limiter = security.login_rate_limiter
+    original_limiter = limiter.reserve, limiter.reset
+
+    async def inline_verify(password, hashed_password):
+        return security.pwd_context.verify_and_update(password, hashed_password)
+
+    async def not_limited(username):
+        return 0
+
+    if mode == "inline":
+        security.password_hasher.verify_and_update = inline_verify
+        # With the loop blocked for seconds at a time, the rate limiter's
+        # write transactions would outlast the SQLite busy timeout; the
+        # baseline only needs the inline KDF
+        limiter.reserve = limiter.reset = not_limited
+
+    lags, stop = [], asyncio.Event()
+    ticker = asyncio.create_task(measure_loop_lag(stop, lags))
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            username = users[i % len(users)]
+            async with semaphore:
+                response = await client.post("/api/auth/login", json={"username": username, "password": username})
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(logins)))
+        elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    security.password_hasher.verify_and_update = original
+    limiter.reserve, limiter.reset = original_limiter
+    return {
+        "mode": mode,
+        "logins_per_sec": round(logins / elapsed, 1),
+        "loop_lag_p50_ms": round(statistics.median(lags), 2),
+        "loop_lag_p99_ms": round(percentile(lags, 99), 2),
+        "loop_lag_max_ms": round(max(lags), 2),
+    }
+
+
+async def run(args):
+    from app.core.database import SessionLocal, create_tables
+    from app.core.security import pwd_context
+    from app.models.models import User
+
+    create_tables()
+    users = [f"storm{i}" for i in range(args.logins)]
+    with SessionLocal() as db:
+        for username in users:
+            db.add(User(username=username, password=pwd_context.hash(username), role="auditor",
+                        name=username, email=f"{username}@bench.local"))
+        db.commit()
+
+    # Distinct users so the verification cache never short-circuits the KDF
+    results = [await storm(mode, users, args.logins, args.concurrency) for mode in ("inline", "offloaded")]
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault("LOGIN_MAX_FAILURES", "1000000")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
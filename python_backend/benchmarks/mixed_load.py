@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Request latency under mixed load while a long report query runs
+
+Drives the app in-process with concurrent clients hitting cheap list endpoints
+and reports p50/p99 latency in three scenarios:
+
+* ``baseline``       -- no long query running
+* ``async_report``   -- a long query runs through the async session (current code)
+* ``blocking_report``-- the same query runs through a sync Session on the event
+                        loop, which is what every handler did before the async port
+
+    python -m benchmarks.mixed_load --clients 20 --seconds 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+LONG_QUERY = (
+    "WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < :n) "
+    "SELECT count(*) FROM counter"
+)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def drive(client, seconds, latencies):
+    deadline = time.perf_counter() + seconds
+    paths = ["/api/audits/?limit=50", "/api/hotel-groups/", "/api/properties/"]
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(paths[i % len(paths)])
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+
+
+async def long_report(mode, rows, stop):
+    from sqlalchemy import text
+    from app.core.database import AsyncSessionLocal, SessionLocal
+
+    while not stop.is_set():
+        if mode == "async_report":
+            async with AsyncSessionLocal() as db:
+                await db.execute(text(LONG_QUERY), {"n": rows})
+        else:
+            with SessionLocal() as db:
+                db.execute(text(LONG_QUERY), {"n": rows})
+            await asyncio.sleep(0)
+
+
+async def scenario(app, mode, clients, seconds, rows):
+    import httpx
+
+    latencies = []
+    stop = asyncio.Event()
+    background = None
+    if mode != "baseline":
+        background = asyncio.create_task(long_report(mode, rows, stop))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(*(drive(client, seconds, latencies) for _ in range(clients)))
+
+    stop.set()
+    if background:
+        await background
+
+    return {
+        "scenario": mode,
+        "requests": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+async def run(args):
+    import main
+    import manage
+    from app.core.database import create_tables
+
+    create_tables()
+    await manage.seed_initial_data()
+
+    results = []
+    for mode in ("baseline", "async_report", "blocking_report"):
+        results.append(await scenario(main.app, mode, args.clients, args.seconds, args.rows))
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=300_000, help="size of the long report query")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
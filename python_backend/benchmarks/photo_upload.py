@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Server peak memory for a streamed photo upload vs a base64 JSON body
+
+For each mode a fresh API server is started with uvicorn and sent one photo
+of --size-mb random bytes:
+
+- raw:       POST /api/photos/ with the image as a streamed request body
+- multipart: POST /api/photos/ as multipart/form-data, streamed
+- base64:    POST /api/ai/analyze-photo with the image as base64 JSON
+
+Reports the growth of the server's peak RSS (VmHWM, Linux only) over its
+idle RSS. With no Gemini key configured the base64 request stops right after
+decoding, so its number is a lower bound.
+
+    python -m benchmarks.photo_upload --size-mb 20
+"""
+
+import argparse
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+CHUNK = 64 * 1024
+
+def read_status_kb(pid, field):
+    with open(f"/proc/{pid}/status") as handle:
+        for line in handle:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+def start_server(port, workdir):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{workdir}/photo_upload.db",
+               PHOTO_STORAGE_DIR=os.path.join(workdir, "photos"), GEMINI_API_KEY="", GEMINI_BASE_URL="")
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "manage.py", "init-db"], cwd=backend_dir, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=backend_dir,
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            httpx.get(url + "/api/health")
+            return server, url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("API server did not start")
+
+def run_mode(mode, photo, port):
+    with tempfile.TemporaryDirectory() as workdir:
+        server, url = start_server(port, workdir)
+        try:
+            # Warm the route so imports and first-request setup are not counted
+            httpx.post(url + "/api/photos/", content=b"warmup")
+            time.sleep(0.5)
+            idle_kb = read_status_kb(server.pid, "VmRSS")
+
+            def body_chunks(prefix=b"", suffix=b""):
+                yield prefix
+                for start in range(0, len(photo), CHUNK):
+                    yield photo[start:start + CHUNK]
+                yield suffix
+
+            started = time.perf_counter()
+            if mode == "raw":
+                response = httpx.post(url + "/api/photos/", content=body_chunks(),
+                                      headers={"Content-Type": "image/jpeg"}, timeout=120)
+            elif mode == "multipart":
+                boundary = "benchmarkboundary"
+                prefix = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"p.jpg\"\r\n"
+                          "Content-Type: image/jpeg\r\n\r\n").encode()
+                suffix = f"\r\n--{boundary}--\r\n".encode()
+                response = httpx.post(url + "/api/photos/", content=body_chunks(prefix, suffix),
+                                      headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}, timeout=120)
+            else:
+                payload = json.dumps({"image_data": base64.b64encode(photo).decode(), "context": "Room"}).encode()
+                response = httpx.post(url + "/api/ai/analyze-photo", content=payload,
+                                      headers={"Content-Type": "application/json"}, timeout=120)
+            elapsed = time.perf_counter() - started
+
+            peak_kb = read_status_kb(server.pid, "VmHWM")
+            return {
+                "mode": mode,
+                "status": response.status_code,
+                "seconds": round(elapsed, 3),
+                "idle_rss_mb": round(idle_kb / 1024, 1),
+                "peak_growth_mb": round((peak_kb - idle_kb) / 1024, 1),
+            }
+        finally:
+            server.terminate()
+            server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=20)
+    parser.add_argument("--port", type=int, default=8777)
+    args = parser.parse_args()
+
+    photo = b"\xff\xd8\xff\xe0" + os.urandom(int(args.size_mb * 1024 * 1024))
+    results = [run_mode(mode, photo, args.port) for mode in ("raw", "multipart", "base64")]
+    print(json.dumps({"photo_mb": args.size_mb, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Throughput of the API straight from the backend vs through server.py
+
+Starts the backend (uvicorn) on a fresh database and the frontend proxy
+(server.py --no-backend) in front of it, then drives both with the same
+number of concurrent keep-alive clients for each request mix and reports
+requests/s and latency percentiles. Pass --proxy-script to load-test another
+proxy implementation that takes the same flags.
+
+    python -m benchmarks.proxy_throughput --concurrency 32 --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(BACKEND_DIR)
+
+async def wait_until_up(url: str):
+    async with httpx.AsyncClient() as client:
+        for _ in range(200):
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+async def drive(base_url: str, requests, concurrency: int, total: int):
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def client_loop(client):
+        nonlocal next_index, errors
+        while next_index < total:
+            method, path, body = requests[next_index % len(requests)]
+            next_index += 1
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_s": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1),
+        "errors": errors,
+    }
+
+async def run(args):
+    backend_url = f"http://127.0.0.1:{args.backend_port}"
+    proxy_url = f"http://127.0.0.1:{args.proxy_port}"
+    await wait_until_up(backend_url + "/api/health")
+    await wait_until_up(proxy_url + "/api/health")
+
+    async with httpx.AsyncClient(base_url=backend_url) as client:
+        audit = (await client.post("/api/audits/", json={"property_id": 1, "auditor_id": 2})).json()
+        entries = [{"category": "Rooms", "item_name": f"Item {i}", "score": i % 5 + 1} for i in range(20)]
+        item_ids = (await client.post(f"/api/audits/{audit['id']}/items:bulk", json=entries)).json()["ids"]
+
+    mixes = {
+        "health": [("GET", "/api/health", None)],
+        "audit_reads": [("GET", f"/api/audits/{audit['id']}", None), ("GET", f"/api/audits/{audit['id']}/items", None)],
+    }
+    results = {"concurrency": args.concurrency, "requests": args.requests}
+    # SQLite takes one writer at a time, so writes are checked rather than load-tested
+    async with httpx.AsyncClient(base_url=proxy_url) as client:
+        response = await client.put(f"/api/audits/items/{item_ids[0]}", json={"auditor_comments": "via proxy"})
+        results["put_via_proxy"] = response.status_code
+    for name, requests in mixes.items():
+        results[name] = {
+            "direct": await drive(backend_url, requests, args.concurrency, args.requests),
+            "proxied": await drive(proxy_url, requests, args.concurrency, args.requests),
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--backend-port", type=int, default=8811)
+    parser.add_argument("--proxy-port", type=int, default=8812)
+    parser.add_argument("--proxy-script", default=os.path.join(REPO_ROOT, "server.py"))
+    args = parser.parse_args()
+
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tempfile.mkdtemp()}/proxy_throughput.db")
+    subprocess.run([sys.executable, "manage.py", "init-db"], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.backend_port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    proxy = subprocess.Popen(
+        [sys.executable, args.proxy_script, "--no-backend", "--host", "127.0.0.1", "--port", str(args.proxy_port),
+         "--backend-url", f"http://127.0.0.1:{args.backend_port}"],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL,
+    )
+    try:
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+    finally:
+        for process in (proxy, backend):
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
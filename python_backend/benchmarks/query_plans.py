@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN QUERY PLAN check for the list-endpoint queries
+
+Builds a fresh SQLite database through the Alembic migration chain, runs
+EXPLAIN QUERY PLAN for every filter combination the list endpoints accept and
+exits non-zero if any of them falls back to a full table scan, or if a keyset
+page of the audit list is sorted in a temp B-tree instead of read in index
+order. An index-ordered "SCAN ... USING INDEX" (the unfiltered, LIMIT-ed audit
+list) is accepted.
+
+    python -m benchmarks.query_plans
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def endpoint_queries():
+    """(label, SELECT, keyset) triples mirroring what the endpoints execute;
+    keyset queries must come off an index already in ORDER BY order"""
+    from sqlalchemy import func, select
+
+    from app.api.endpoints.audits import _audit_list_query
+    from app.core.pagination import encode_cursor
+    from app.models.models import AuditItem, AuditItemTombstone, Property, User
+    from datetime import datetime
+
+    cursor = encode_cursor(datetime(2025, 1, 1), 1)
+    for status, auditor_id, reviewer_id, property_id, page_cursor in itertools.product(
+        (None, "pending"), (None, 1), (None, 1), (None, 1), (None, cursor)
+    ):
+        label = (
+            f"get_audits status={status} auditor_id={auditor_id} reviewer_id={reviewer_id} "
+            f"property_id={property_id} cursor={'yes' if page_cursor else 'no'}"
+        )
+        query = _audit_list_query(status, auditor_id, reviewer_id, property_id, page_cursor)
+        yield label, query.limit(101), True
+    since = datetime(2025, 1, 1)
+    # A delta is found through updated_at and sorted on purpose
+    yield "get_audits updated_since", _audit_list_query(None, None, None, None, None, since).limit(101), False
+
+    yield "get_audit_items", select(AuditItem).where(AuditItem.audit_id == 1), False
+    yield "get_audit_items etag", select(func.count(), func.max(AuditItem.updated_at)).where(AuditItem.audit_id == 1), False
+    yield "get_audit_items updated_since", select(AuditItem).where(
+        AuditItem.audit_id == 1, AuditItem.updated_at > since
+    ), False
+    yield "get_audit_items deleted since", select(AuditItemTombstone.item_id).where(
+        AuditItemTombstone.audit_id == 1, AuditItemTombstone.deleted_at > since
+    ), False
+    yield "get_properties hotel_group_id", select(Property).where(Property.hotel_group_id == 1).order_by(Property.name), False
+    yield "get_users role", select(User).where(User.role == "auditor").order_by(User.name), False
+
+
+def full_scans(plan_details):
+    return [detail for detail in plan_details if detail.startswith("SCAN ") and " INDEX " not in detail]
+
+
+def sorts(plan_details):
+    return [detail for detail in plan_details if detail.startswith("USE TEMP B-TREE FOR ORDER BY")]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'plans.db')}"
+
+        from alembic import command
+        from alembic.config import Config
+        from sqlalchemy import create_engine
+
+        command.upgrade(Config(os.path.join(BASE_DIR, "alembic.ini")), "head")
+        engine = create_engine(os.environ["DATABASE_URL"])
+
+        failures = 0
+        with engine.connect() as conn:
+            for label, query, keyset in endpoint_queries():
+                sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+                details = [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+                problems = full_scans(details) + (sorts(details) if keyset else [])
+                if problems:
+                    failures += 1
+                    print(f"FAIL {label}: {'; '.join(problems)}")
+                else:
+                    print(f"ok   {label}: {'; '.join(details)}")
+        engine.dispose()
+
+    if failures:
+        print(f"{failures} queries fall back to a table scan or a sort")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
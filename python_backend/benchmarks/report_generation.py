@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Time-to-report for a large audit, cold and from the artifact store
+
+Creates an audit with N items, then for each format requests a report,
+follows its job to completion and downloads it (cold), and requests it again
+(cached). /api/health is polled from another thread throughout the cold runs
+to show that rendering does not hold up the API. render_s is the time the
+same render takes when called directly, i.e. what a request handler would
+have blocked for.
+
+    python -m benchmarks.report_generation --items 1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/report_generation.db"
+    os.environ["REPORT_STORAGE_DIR"] = os.path.join(workdir, "reports")
+
+    from fastapi.testclient import TestClient
+    import manage
+    from main import app
+    from app.services.report_render import RENDERERS
+
+    asyncio.run(manage.init_db())
+    results = {"items": args.items, "formats": {}}
+    with TestClient(app) as client:
+        audit = client.post("/api/audits/", json={"property_id": 1, "auditor_id": 2}).json()
+        entries = [
+            {
+                "category": f"Category {i % 12}",
+                "item_name": f"Checklist item {i}",
+                "description": "Check condition, cleanliness and brand standard compliance " * 2,
+                "score": (i % 5) + 1,
+                "is_compliant": i % 7 != 0,
+                "auditor_comments": f"Observed on floor {i % 9} (see photo)",
+            }
+            for i in range(args.items)
+        ]
+        ids = client.post(f"/api/audits/{audit['id']}/items:bulk", json=entries).json()["ids"]
+
+        latencies = []
+        polling = threading.Event()
+
+        def poll_health():
+            while not polling.is_set():
+                started = time.perf_counter()
+                client.get("/api/health")
+                latencies.append((time.perf_counter() - started) * 1000)
+                time.sleep(0.005)
+
+        def fetch(fmt):
+            started = time.perf_counter()
+            report = client.post("/api/ai/generate-report", json={"audit_id": audit["id"], "format": fmt}).json()
+            url = report["report_url"]
+            if report["status"] == "queued":
+                job = client.get(f"/api/ai/jobs/{report['job_id']}").json()
+                while job["status"] != "completed":
+                    time.sleep(0.01)
+                    job = client.get(f"/api/ai/jobs/{report['job_id']}").json()
+                url = job["results"][0]["result"]["report_url"]
+            body = client.get(url).content
+            return time.perf_counter() - started, report["status"], len(body)
+
+        poller = threading.Thread(target=poll_health)
+        poller.start()
+        try:
+            for fmt in RENDERERS:
+                cold_s, cold_status, size = fetch(fmt)
+                results["formats"][fmt] = {"cold_s": round(cold_s, 3), "cold_status": cold_status, "bytes": size}
+        finally:
+            polling.set()
+            poller.join()
+
+        for fmt in RENDERERS:
+            cached_s, cached_status, _ = fetch(fmt)
+            results["formats"][fmt].update(cached_ms=round(cached_s * 1000, 1), cached_status=cached_status)
+
+        # Editing one item changes the key, so the next request rebuilds
+        client.put(f"/api/audits/items/{ids[0]}", json={"score": 4, "auditor_comments": "Rechecked"})
+        edited_s, edited_status, _ = fetch("pdf")
+        results["after_item_edit"] = {"pdf_s": round(edited_s, 3), "status": edited_status}
+
+        from app.core.database import AsyncSessionLocal
+        from app.services.report_service import load_report_data
+
+        async def load():
+            async with AsyncSessionLocal() as db:
+                return await load_report_data(db, audit["id"])
+
+        report = client.portal.call(load)
+        for fmt, render in RENDERERS.items():
+            started = time.perf_counter()
+            render(report)
+            results["formats"][fmt]["render_s"] = round(time.perf_counter() - started, 3)
+
+    latencies.sort()
+    results["health_during_cold_runs_ms"] = {
+        "requests": len(latencies),
+        "p50": round(statistics.median(latencies), 1),
+        "p99": round(latencies[int(len(latencies) * 0.99) - 1], 1),
+        "max": round(latencies[-1], 1),
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Portfolio rescore: vectorized checklist scoring vs a per-audit loop
+
+1. Engine only: scores N synthetic audits (every checklist item, random
+   scores) with scoring.score_rows and with a direct Python port of
+   calculateOverallScore from shared/auditChecklist.ts, and checks they agree.
+2. End to end: loads N audits into a fresh database, then times
+   POST /api/audits/rescore before and after a checklist weight change
+   (made on a copy of the checklist, picked up without a restart).
+
+    python -m benchmarks.rescore --audits 10000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+def ts_overall_score(categories, item_scores):
+    """calculateCategoryScore/calculateOverallScore, line for line"""
+    total_weighted = total_weight = 0.0
+    for category in categories:
+        weighted = weight = 0.0
+        for item in category["items"]:
+            weighted += (item_scores.get(item["id"], 0) / item["maxScore"]) * item["weight"]
+            weight += item["weight"]
+        category_score = weighted / weight * 100 if weight > 0 else 0
+        total_weighted += category_score / 100 * category["weight"]
+        total_weight += category["weight"]
+    return total_weighted / total_weight * 100 if total_weight > 0 else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audits", type=int, default=10000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    from app.core.config import settings
+    checklist_path = os.path.join(workdir, "auditChecklist.ts")
+    shutil.copy(settings.SCORING_CHECKLIST_PATH, checklist_path)
+    os.environ["SCORING_CHECKLIST_PATH"] = checklist_path
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/rescore.db"
+    settings.SCORING_CHECKLIST_PATH = checklist_path
+
+    import numpy as np
+    from app.services.scoring import get_checklist, parse_checklist, score_rows
+
+    with open(checklist_path, encoding="utf-8") as handle:
+        categories = parse_checklist(handle.read())
+    items = [item for category in categories for item in category["items"]]
+    rng = random.Random(7)
+    audits = [{item["id"]: rng.randint(0, 5) for item in items} for _ in range(args.audits)]
+    audit_ids = list(range(1, args.audits + 1))
+    item_audit_ids = [audit_id for audit_id, scores in zip(audit_ids, audits) for _ in scores]
+    item_names = [item_id for scores in audits for item_id in scores]
+    item_scores = [score for scores in audits for score in scores.values()]
+
+    results = {"audits": args.audits, "items_per_audit": len(items)}
+    started = time.perf_counter()
+    # The TS reads scores on each item's maxScore; the API reads them on 0-5
+    scaled = [{key: score / 5 * item["maxScore"] for (key, score), item in zip(scores.items(), items)} for scores in audits]
+    expected = [ts_overall_score(categories, scores) for scores in scaled]
+    results["per_audit_loop_s"] = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
+    scored = score_rows(get_checklist(), audit_ids, item_audit_ids, item_names, item_scores)
+    results["vectorized_s"] = round(time.perf_counter() - started, 3)
+    results["max_abs_difference"] = float(np.abs(scored.overall - np.array(expected)).max())
+
+    from fastapi.testclient import TestClient
+    import manage
+    from main import app
+
+    asyncio.run(manage.init_db())
+
+    with TestClient(app) as client:
+        from app.core.database import engine
+        from app.models.models import Audit, AuditItem
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            conn.execute(Audit.__table__.insert(), [
+                {"property_id": 1 + i % 3, "auditor_id": 2, "status": "completed", "created_at": now, "updated_at": now}
+                for i in range(args.audits)
+            ])
+            first_id = conn.execute(Audit.__table__.select().with_only_columns(Audit.id).order_by(Audit.id)).scalar()
+            conn.execute(AuditItem.__table__.insert(), [
+                {"audit_id": first_id + audit_id - 1, "category": "checklist", "item_name": name, "score": score,
+                 "created_at": now, "updated_at": now}
+                for audit_id, name, score in zip(item_audit_ids, item_names, item_scores)
+            ])
+        client.post("/api/analytics/rebuild")
+
+        started = time.perf_counter()
+        first = client.post("/api/audits/rescore").json()
+        results["rescore_s"] = round(time.perf_counter() - started, 2)
+        results["rescore"] = first
+
+        with open(checklist_path, encoding="utf-8") as handle:
+            source = handle.read()
+        # Double the weight of the first category
+        source = re.sub(r"(weight:\s*)([\d.]+)", lambda m: f"{m.group(1)}{float(m.group(2)) * 2}", source, count=1)
+        with open(checklist_path, "w", encoding="utf-8") as handle:
+            handle.write(source)
+        os.utime(checklist_path, (time.time() + 1, time.time() + 1))
+
+        started = time.perf_counter()
+        second = client.post("/api/audits/rescore").json()
+        results["rescore_after_weight_change_s"] = round(time.perf_counter() - started, 2)
+        results["rescore_after_weight_change"] = second
+        results["portfolio_summary"] = client.get("/api/analytics/summary").json()
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
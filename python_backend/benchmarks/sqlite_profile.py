@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+SQLite read/write throughput with and without the performance profile
+
+Runs concurrent dashboard-style readers against one auditor-style writer on a
+fresh database file, once with the default SQLite settings and once with the
+WAL/pragma profile from Settings, and prints operations per second and the
+number of "database is locked" failures for each.
+
+    python -m benchmarks.sqlite_profile --readers 8 --seconds 5
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import build_engine
+from app.models.models import Audit, AuditItem, Base, HotelGroup, Property
+
+
+def seed(engine, audits: int):
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(HotelGroup), [{"id": 1, "name": "Bench Group"}])
+        conn.execute(insert(Property), [{"id": 1, "name": "Bench Hotel", "location": "Bench", "hotel_group_id": 1}])
+        conn.execute(
+            insert(Audit),
+            [{"property_id": 1, "auditor_id": 1, "status": "pending", "created_at": now, "updated_at": now}
+             for _ in range(audits)],
+        )
+
+
+def run(sqlite_profile: bool, readers: int, seconds: float, audits: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", sqlite_profile=sqlite_profile)
+        seed(engine, audits)
+
+        stop = threading.Event()
+        counts = {"reads": 0, "writes": 0, "locked": 0}
+        lock = threading.Lock()
+
+        def bump(key):
+            with lock:
+                counts[key] += 1
+
+        def reader():
+            query = select(Audit.id, Audit.status, Audit.created_at).order_by(Audit.created_at.desc()).limit(50)
+            while not stop.is_set():
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(query).all()
+                    bump("reads")
+                except OperationalError:
+                    bump("locked")
+
+        def writer():
+            while not stop.is_set():
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(insert(AuditItem), [{"audit_id": 1, "category": "bench", "item_name": "item"}])
+                    bump("writes")
+                except OperationalError:
+                    bump("locked")
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return {
+        "profile": "performance" if sqlite_profile else "default",
+        "reads_per_sec": round(counts["reads"] / seconds, 1),
+        "writes_per_sec": round(counts["writes"] / seconds, 1),
+        "locked_errors": counts["locked"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--audits", type=int, default=5000)
+    args = parser.parse_args()
+
+    results = [run(profile, args.readers, args.seconds, args.audits) for profile in (False, True)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Page-load bytes and server CPU for the frontend build served by server.py
+
+Starts server.py (--no-backend) on the Vite build and loads the app the way a
+browser does: index.html, then every script and stylesheet it references.
+Reports the bytes transferred on a cold load (empty cache) and on a reload
+(immutable assets from cache, the rest revalidated with If-None-Match), plus server CPU time per page view
+(read from /proc, so Linux only). Pass --proxy-script to measure another
+server implementation that takes the same flags.
+
+    python -m benchmarks.static_assets --views 500
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(BACKEND_DIR)
+BROWSER_ACCEPT_ENCODING = "gzip, deflate, br"
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as handle:
+        fields = handle.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def page_view(client: httpx.Client, cache=None):
+    """Bytes on the wire and statuses for index.html plus its assets.
+
+    cache (path -> (etag, cache_control, body)) plays the browser cache:
+    immutable entries are used without a request, others are revalidated.
+    """
+    cache = cache if cache is not None else {}
+    wire_bytes, statuses = 0, []
+
+    def fetch(path):
+        nonlocal wire_bytes
+        cached = cache.get(path)
+        if cached and "immutable" in cached[1]:
+            return cached[2]
+        headers = {"accept-encoding": BROWSER_ACCEPT_ENCODING}
+        if cached:
+            headers["if-none-match"] = cached[0]
+        with client.stream("GET", path, headers=headers) as response:
+            raw = b"".join(response.iter_raw())
+            wire_bytes += len(raw)
+            statuses.append(response.status_code)
+            if response.status_code == 304:
+                return cached[2]
+            body = httpx.Response(200, headers={"content-encoding": response.headers.get("content-encoding", "identity")}, content=raw).content
+            if "etag" in response.headers:
+                cache[path] = (response.headers["etag"], response.headers.get("cache-control", ""), body)
+            return body
+
+    html = fetch("/").decode("utf-8")
+    for path in re.findall(r'(?:src|href)="(/[^"]+)"', html):
+        fetch(path)
+    return wire_bytes, statuses, cache
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--views", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8813)
+    parser.add_argument("--static-dir", default=os.path.join(REPO_ROOT, "dist", "public"))
+    parser.add_argument("--proxy-script", default=os.path.join(REPO_ROOT, "server.py"))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, args.proxy_script, "--no-backend", "--host", "127.0.0.1", "--port", str(args.port),
+         "--static-dir", args.static_dir, "--backend-url", "http://127.0.0.1:9"],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{args.port}", timeout=30) as client:
+            for _ in range(300):
+                try:
+                    client.get("/", headers={"accept-encoding": BROWSER_ACCEPT_ENCODING})
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.05)
+            results = {"startup_s": round(time.perf_counter() - started, 2)}
+
+            cold_bytes, statuses, cache = page_view(client)
+            results["cold_load"] = {"bytes": cold_bytes, "statuses": statuses}
+            reload_bytes, statuses, _ = page_view(client, dict(cache))
+            results["revalidated_reload"] = {"bytes": reload_bytes, "statuses": statuses}
+
+            for name, cached in (("cold_views", False), ("revalidated_views", True)):
+                cpu_before, started = cpu_seconds(server.pid), time.perf_counter()
+                for _ in range(args.views):
+                    page_view(client, dict(cache) if cached else None)
+                elapsed = time.perf_counter() - started
+                results[name] = {
+                    "server_cpu_ms_per_view": round((cpu_seconds(server.pid) - cpu_before) * 1000 / args.views, 2),
+                    "views_per_s": round(args.views / elapsed, 1),
+                }
+        print(json.dumps(results, indent=2))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
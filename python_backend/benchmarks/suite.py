@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Load test of every API route, compared against a stored baseline
+
+1. Seeds a fresh database with a synthetic portfolio at --scale: hotel
+   groups, properties and audits with one item per checklist item of
+   shared/auditChecklist.ts (random scores, spread over twelve months),
+   then scores the audits and builds the analytics rollups.
+2. Starts benchmarks/fake_gemini.py and serve.py against it, and sets up
+   fixtures the routes need (a photo, a finished batch job, a report, a
+   profile).
+3. Drives each route the app registers (read from /openapi.json) at every
+   --concurrency level with keep-alive clients: reads first (after a short
+   warm-up), then writes. Each level runs --repeat times and the fastest
+   run is kept. A route without a scenario here fails the run, so new
+   routes get one.
+4. Prints JSON with requests/s, p50/p95/p99 latency, errors and server
+   CPU time per request (the lowest of the runs; it is steadier than the
+   timings when other work shares the machine) per route and level, the
+   server's RSS after each route and its peak RSS (VmHWM summed over the
+   master and workers; forked pages shared between them are counted once
+   per process).
+5. Compares with --baseline: requests/s down, p95 up (and 2 ms), CPU per
+   request up (and 0.5 ms) or peak RSS up by more than --tolerance, or
+   more errors (beyond the same tolerance, and 2) are reported as
+   regressions and the exit status is 1. Baselines only compare at the
+   same scale, levels, request and repeat counts and worker count.
+
+    python -m benchmarks.suite                          # compare with benchmarks/baseline.json
+    python -m benchmarks.suite --update-baseline        # record a new baseline
+    python -m benchmarks.suite --scale medium --concurrency 1,16,64 --routes analytics
+
+Timings depend on the machine, so record the baseline on the machine that
+runs the comparison. Identical runs on a shared single-CPU VM differ by up
+to half in p95 and CPU per request, hence the default --tolerance of 0.5;
+on a quiet dedicated machine 0.25 catches smaller regressions.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+SCALES = {
+    "small": {"groups": 3, "properties": 12, "audits": 300},
+    "medium": {"groups": 10, "properties": 100, "audits": 5000},
+    "large": {"groups": 30, "properties": 600, "audits": 50000},
+}
+AUDIT_STATUSES = ["pending", "in_progress", "submitted", "approved", "rejected"]
+
+def seed_portfolio(groups: int, properties: int, audits: int, seed: int) -> Dict[str, int]:
+    """Demo users plus a synthetic portfolio, scored and rolled up"""
+    import manage
+    from app.core.config import settings
+    from app.core.database import AsyncSessionLocal, async_engine, engine
+    from app.models.models import Audit, AuditItem, HotelGroup, Property
+    from app.services.analytics_service import rebuild_analytics
+    from app.services.scoring import parse_checklist, rescore_audits
+
+    asyncio.run(manage.init_db(seed=True))
+    with open(settings.SCORING_CHECKLIST_PATH, encoding="utf-8") as handle:
+        checklist = [(category["name"], item) for category in parse_checklist(handle.read()) for item in category["items"]]
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        group_ids = conn.execute(HotelGroup.__table__.insert().returning(HotelGroup.id), [
+            {"name": f"Group {g}", "description": f"Synthetic hotel group {g}", "created_at": now}
+            for g in range(groups)
+        ]).scalars().all()
+        property_ids = conn.execute(Property.__table__.insert().returning(Property.id), [
+            {"name": f"Hotel {p}", "location": f"City {p % 40}", "hotel_group_id": group_ids[p % groups],
+             "manager_name": f"Manager {p}", "manager_email": f"manager{p}@hotel.com", "created_at": now}
+            for p in range(properties)
+        ]).scalars().all()
+        audit_rows = []
+        for a in range(audits):
+            created = now - timedelta(days=rng.randrange(365), minutes=rng.randrange(1440))
+            audit_rows.append({
+                "property_id": rng.choice(property_ids), "auditor_id": 2, "reviewer_id": 3,
+                "status": rng.choice(AUDIT_STATUSES), "created_at": created, "updated_at": created,
+            })
+        audit_ids = conn.execute(Audit.__table__.insert().returning(Audit.id), audit_rows).scalars().all()
+        # Insert items in chunks to bound memory at the large scale
+        for start in range(0, len(audit_ids), 500):
+            conn.execute(AuditItem.__table__.insert(), [
+                {"audit_id": audit_id, "category": category, "item_name": item["item"],
+                 "description": item.get("description"), "score": float(score),
+                 "auditor_comments": None if score > 2 else "Needs attention", "is_compliant": score >= 3,
+                 "created_at": now, "updated_at": now}
+                for audit_id in audit_ids[start:start + 500]
+                for category, item in checklist
+                for score in (rng.choices(range(6), weights=(1, 1, 2, 4, 6, 4))[0],)
+            ])
+
+    async def score_and_roll_up():
+        async with AsyncSessionLocal() as db:
+            await rescore_audits(db)
+            await rebuild_analytics(db)
+            await db.commit()
+        await async_engine.dispose()
+
+    asyncio.run(score_and_roll_up())
+    engine.dispose()
+    return {"groups": groups, "properties": properties, "audits": audits, "items_per_audit": len(checklist)}
+
+ITEM_DELETIONS = 50  # per run of DELETE /api/audits/items/{item_id}
+
+@dataclass
+class Scenario:
+    """How to send one route: request(ctx, i) returns httpx.request kwargs for the i-th request"""
+    method: str
+    route: str
+    request: Callable[[Dict[str, Any], int], Dict[str, Any]]
+    write: bool = False
+    max_requests: Optional[int] = None  # for routes too slow to run --requests times
+    stream: bool = False  # open-ended response: time up to its first chunk, then disconnect
+
+def get(path: str, **kwargs) -> Callable[[Dict[str, Any], int], Dict[str, Any]]:
+    return lambda ctx, i: {"url": path.format(**ctx), **kwargs}
+
+def admin(path: str) -> Callable[[Dict[str, Any], int], Dict[str, Any]]:
+    return lambda ctx, i: {"url": path.format(**ctx), "headers": ctx["admin_headers"]}
+
+def audit_id(ctx, i) -> int:
+    return ctx["audit_ids"][i % len(ctx["audit_ids"])]
+
+def new_user(ctx, i) -> Dict[str, Any]:
+    serial = next(ctx["serial"])
+    return {"url": "/api/users/", "json": {
+        "username": f"bench-{serial}", "password": "password", "role": "auditor",
+        "name": "Bench User", "email": f"bench-{serial}@hotel.com"}}
+
+SCENARIOS = [
+    Scenario("GET", "/", get("/")),
+    Scenario("GET", "/api/health", get("/api/health")),
+    Scenario("GET", "/api/health/workers", get("/api/health/workers")),
+    Scenario("GET", "/api/cache/stats", get("/api/cache/stats")),
+    Scenario("GET", "/api/auth/me", admin("/api/auth/me")),
+    Scenario("GET", "/api/users/", get("/api/users/")),
+    Scenario("GET", "/api/users/{user_id}", get("/api/users/2")),
+    Scenario("GET", "/api/hotel-groups/", get("/api/hotel-groups/")),
+    Scenario("GET", "/api/hotel-groups/{group_id}", lambda ctx, i: {"url": f"/api/hotel-groups/{1 + i % ctx['groups']}"}),
+    Scenario("GET", "/api/properties/", lambda ctx, i: {"url": "/api/properties/", "params": {"hotel_group_id": 1 + i % ctx["groups"]}}),
+    Scenario("GET", "/api/properties/{property_id}", lambda ctx, i: {"url": f"/api/properties/{1 + i % ctx['properties']}"}),
+    Scenario("GET", "/api/audits/", lambda ctx, i: {"url": "/api/audits/", "params": {"property_id": 1 + i % ctx["properties"], "limit": 50}}),
+    Scenario("GET", "/api/audits/{audit_id}", lambda ctx, i: {"url": f"/api/audits/{audit_id(ctx, i)}"}),
+    Scenario("GET", "/api/audits/{audit_id}/items", lambda ctx, i: {"url": f"/api/audits/{audit_id(ctx, i)}/items"}),
+    Scenario("GET", "/api/audits/{audit_id}/score", lambda ctx, i: {"url": f"/api/audits/{audit_id(ctx, i)}/score"}),
+    Scenario("GET", "/api/events/audits", lambda ctx, i: {"url": "/api/events/audits", "params": {"property_id": 1 + i % ctx["properties"]}},
+             stream=True),
+    Scenario("GET", "/api/ai/jobs/{job_id}", get("/api/ai/jobs/{job_id}")),
+    Scenario("GET", "/api/ai/jobs/{job_id}/events", get("/api/ai/jobs/{job_id}/events")),
+    Scenario("GET", "/api/photos/{photo_id}", get("/api/photos/{photo_id}")),
+    Scenario("GET", "/api/photos/{photo_id}/thumbnail", get("/api/photos/{photo_id}/thumbnail")),
+    Scenario("GET", "/api/reports/{audit_id}/{filename}", get("{report_url}")),
+    Scenario("GET", "/api/analytics/summary", get("/api/analytics/summary")),
+    Scenario("GET", "/api/analytics/hotel-groups", get("/api/analytics/hotel-groups")),
+    Scenario("GET", "/api/analytics/properties", lambda ctx, i: {"url": "/api/analytics/properties", "params": {"hotel_group_id": 1 + i % ctx["groups"]}}),
+    Scenario("GET", "/api/analytics/categories", get("/api/analytics/categories")),
+    Scenario("GET", "/api/analytics/trend", get("/api/analytics/trend")),
+    Scenario("GET", "/api/admin/profiles", admin("/api/admin/profiles")),
+    Scenario("GET", "/api/admin/profiles/{profile_id}", admin("/api/admin/profiles/{profile_id}")),
+    Scenario("GET", "/api/admin/slow-queries", admin("/api/admin/slow-queries")),
+
+    Scenario("POST", "/api/auth/login", lambda ctx, i: {"url": "/api/auth/login", "json": {"username": "auditor", "password": "password"}}, write=True),
+    Scenario("POST", "/api/auth/logout", get("/api/auth/logout"), write=True),
+    Scenario("POST", "/api/users/", new_user, write=True, max_requests=50),  # a bcrypt hash each
+    Scenario("PUT", "/api/users/{user_id}", lambda ctx, i: {"url": "/api/users/5", "json": {"name": f"Hotel GM {i}"}}, write=True),
+    Scenario("POST", "/api/hotel-groups/", lambda ctx, i: {"url": "/api/hotel-groups/", "json": {"name": f"Bench group {i}"}}, write=True),
+    Scenario("POST", "/api/properties/", lambda ctx, i: {"url": "/api/properties/", "json": {
+        "name": f"Bench hotel {i}", "location": "Bench City", "hotel_group_id": 1 + i % ctx["groups"]}}, write=True),
+    Scenario("POST", "/api/audits/", lambda ctx, i: {"url": "/api/audits/", "json": {
+        "property_id": 1 + i % ctx["properties"], "auditor_id": 2}}, write=True),
+    Scenario("PUT", "/api/audits/{audit_id}", lambda ctx, i: {"url": f"/api/audits/{audit_id(ctx, i)}", "json": {"reviewer_id": 3}}, write=True),
+    Scenario("POST", "/api/audits/{audit_id}/items", lambda ctx, i: {"url": f"/api/audits/{audit_id(ctx, i)}/items", "json": {
+        "audit_id": audit_id(ctx, i), "category": "Bench", "item_name": f"Bench item {i}"}}, write=True),
+    Scenario("POST", "/api/audits/{audit_id}/items:bulk", lambda ctx, i: {"url": f"/api/audits/{audit_id(ctx, i)}/items:bulk", "json": [
+        {"category": "Bench", "item_name": f"Bench item {i}-{n}", "score": n % 6} for n in range(20)]}, write=True),
+    Scenario("PUT", "/api/audits/items/{item_id}", lambda ctx, i: {"url": f"/api/audits/items/{ctx['item_ids'][i % len(ctx['item_ids'])]}",
+                                                                   "json": {"auditor_comments": f"Checked {i}"}}, write=True),
+    # Each request deletes another of the items setup_fixtures made for it
+    Scenario("DELETE", "/api/audits/items/{item_id}", lambda ctx, i: {"url": f"/api/audits/items/{next(ctx['doomed_item_ids'])}"},
+             write=True, max_requests=ITEM_DELETIONS),
+    Scenario("POST", "/api/audits/rescore", get("/api/audits/rescore"), write=True, max_requests=10),
+    Scenario("POST", "/api/ai/analyze-photo", lambda ctx, i: {"url": "/api/ai/analyze-photo", "json": {
+        "photo_id": ctx["photo_id"], "context": f"Room check {i % 50}"}}, write=True),
+    Scenario("POST", "/api/ai/analyze-photos:batch", lambda ctx, i: {"url": "/api/ai/analyze-photos:batch", "json": {
+        "audit_id": ctx["scratch_audit_id"], "photos": [{"audit_item_id": ctx["scratch_item_id"], "photo_id": ctx["photo_id"]}]}},
+        write=True, max_requests=50),
+    Scenario("POST", "/api/ai/suggest-score", lambda ctx, i: {"url": "/api/ai/suggest-score", "json": {
+        "item_name": "Room cleanliness", "description": f"Observation {i % 50}"}}, write=True),
+    Scenario("POST", "/api/ai/generate-report", lambda ctx, i: {"url": "/api/ai/generate-report", "json": {
+        "audit_id": audit_id(ctx, i), "format": "csv"}}, write=True, max_requests=50),
+    Scenario("POST", "/api/photos/", lambda ctx, i: {"url": "/api/photos/", "content": ctx["photo_bytes"][i % len(ctx["photo_bytes"])],
+                                                     "headers": {"Content-Type": "image/jpeg"}}, write=True),
+    Scenario("POST", "/api/analytics/rebuild", get("/api/analytics/rebuild"), write=True, max_requests=10),
+    Scenario("POST", "/api/admin/profile-token", admin("/api/admin/profile-token"), write=True),
+]
+
+def percentile(ordered: List[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def drive(client: httpx.AsyncClient, scenario: Scenario, ctx: Dict[str, Any], concurrency: int, total: int) -> dict:
+    latencies: List[float] = []
+    errors: Dict[Any, int] = {}
+    counter = itertools.count()
+
+    async def client_loop():
+        while (i := next(counter)) < total:
+            kwargs = scenario.request(ctx, i)
+            started = time.perf_counter()
+            try:
+                if scenario.stream:
+                    async with client.stream(scenario.method, **kwargs) as response:
+                        status = response.status_code
+                        async for _ in response.aiter_raw():
+                            break
+                else:
+                    response = await client.request(scenario.method, **kwargs)
+                    status = response.status_code
+            except httpx.TransportError:
+                status = "connection"
+            latencies.append(time.perf_counter() - started)
+            if status == "connection" or status >= 400:
+                errors[status] = errors.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    result = {
+        "requests": total,
+        "requests_per_s": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "errors": sum(errors.values()),
+    }
+    if errors:
+        result["error_statuses"] = {str(status): count for status, count in sorted(errors.items(), key=str)}
+    return result
+
+def process_tree(pid: int) -> List[int]:
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as handle:
+            children = [int(child) for child in handle.read().split()]
+    except OSError:
+        return pids
+    for child in children:
+        pids.extend(process_tree(child))
+    return pids
+
+def memory_mb(pid: int, field: str) -> float:
+    """Sum of a /proc status field (VmRSS, VmHWM) over a process and its children"""
+    total_kb = 0
+    for process in process_tree(pid):
+        try:
+            with open(f"/proc/{process}/status") as handle:
+                total_kb += next(int(line.split()[1]) for line in handle if line.startswith(field + ":"))
+        except (OSError, StopIteration):
+            continue
+    return round(total_kb / 1024, 1)
+
+def cpu_seconds(pid: int) -> float:
+    """User + system CPU time of a process and its children"""
+    ticks = 0
+    for process in process_tree(pid):
+        try:
+            with open(f"/proc/{process}/stat") as handle:
+                fields = handle.read().rsplit(")", 1)[1].split()
+            ticks += int(fields[11]) + int(fields[12])
+        except (OSError, IndexError):
+            continue
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+async def wait_until_up(url: str, attempts: int = 300):
+    async with httpx.AsyncClient() as client:
+        for _ in range(attempts):
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+async def setup_fixtures(client: httpx.AsyncClient, ctx: Dict[str, Any], workdir: str):
+    from benchmarks.image_preprocess import make_photo
+
+    login = await client.post("/api/auth/login", json={"username": "admin", "password": "password"})
+    ctx["admin_headers"] = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    ctx["photo_bytes"] = []
+    for n in range(4):
+        path = os.path.join(workdir, f"photo{n}.jpg")
+        make_photo(path, 1600, 1200, seed=n)
+        with open(path, "rb") as handle:
+            ctx["photo_bytes"].append(handle.read())
+    upload = await client.post("/api/photos/", content=ctx["photo_bytes"][0], headers={"Content-Type": "image/jpeg"})
+    ctx["photo_id"] = upload.json()["photo_id"]
+
+    audits = (await client.get("/api/audits/", params={"limit": 100})).json()
+    ctx["audit_ids"] = [audit["id"] for audit in audits]
+    items = (await client.get(f"/api/audits/{ctx['audit_ids'][0]}/items")).json()
+    ctx["item_ids"] = [item["id"] for item in items]
+
+    # Batch analysis gets an audit of its own, with one photo item
+    scratch = (await client.post("/api/audits/", json={"property_id": 1, "auditor_id": 2})).json()
+    ctx["scratch_audit_id"] = scratch["id"]
+    created = await client.post(f"/api/audits/{scratch['id']}/items:bulk",
+                                json=[{"category": "Bench", "item_name": "Photo item", "photo_url": f"/api/photos/{ctx['photo_id']}"}])
+    ctx["scratch_item_id"] = created.json()["ids"][0]
+    doomed = (await client.post("/api/audits/", json={"property_id": 1, "auditor_id": 2})).json()
+    created = await client.post(f"/api/audits/{doomed['id']}/items:bulk", json=[
+        {"category": "Bench", "item_name": f"Doomed item {n}"} for n in range(ctx["item_deletions"])])
+    ctx["doomed_item_ids"] = iter(created.json()["ids"])
+
+    job = (await client.post("/api/ai/analyze-photos:batch", json={
+        "audit_id": scratch["id"], "photos": [{"audit_item_id": ctx["scratch_item_id"], "photo_id": ctx["photo_id"]}]})).json()
+    ctx["job_id"] = job["id"]
+    report = (await client.post("/api/ai/generate-report", json={"audit_id": ctx["audit_ids"][0], "format": "csv"})).json()
+    ctx["report_url"] = report["report_url"]
+    for _ in range(300):
+        job_done = (await client.get(f"/api/ai/jobs/{ctx['job_id']}")).json()["status"] == "completed"
+        if job_done and (await client.get(ctx["report_url"])).status_code == 200:
+            break
+        await asyncio.sleep(0.1)
+    else:
+        raise RuntimeError("batch job or report did not finish")
+
+    token = (await client.post("/api/admin/profile-token", headers=ctx["admin_headers"])).json()["token"]
+    profiled = await client.get("/api/analytics/summary", headers={"X-Profile": token})
+    ctx["profile_id"] = profiled.headers["X-Profile-Id"]
+
+async def run(args, ctx: Dict[str, Any], server_pid: int, workdir: str) -> Dict[str, Any]:
+    base_url = f"http://127.0.0.1:{args.port}"
+    await wait_until_up(base_url + "/api/health")
+
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        ctx["item_deletions"] = min(args.requests, ITEM_DELETIONS) * len(args.concurrency) * args.repeat
+        await setup_fixtures(client, ctx, workdir)
+
+        spec = (await client.get("/openapi.json")).json()
+        registered = {(method.upper(), path) for path, operations in spec["paths"].items() for method in operations}
+        scenarios = {(scenario.method, scenario.route): scenario for scenario in SCENARIOS}
+        uncovered = sorted(f"{method} {path}" for method, path in registered - set(scenarios))
+        stale = sorted(f"{method} {path}" for method, path in set(scenarios) - registered)
+        if uncovered or stale:
+            raise SystemExit(f"Routes without a scenario: {uncovered}; scenarios for missing routes: {stale}")
+
+        selected = [scenario for scenario in SCENARIOS if re.search(args.routes, f"{scenario.method} {scenario.route}")]
+        results: Dict[str, Any] = {}
+        for scenario in sorted(selected, key=lambda scenario: scenario.write):
+            total = min(args.requests, scenario.max_requests or args.requests)
+            route_results = {}
+            if not scenario.write:
+                await drive(client, scenario, ctx, min(args.concurrency), min(total, 20))  # warm caches
+            for concurrency in args.concurrency:
+                # Best of --repeat runs: noise from the rest of the machine only ever slows a run down
+                runs = []
+                for _ in range(args.repeat):
+                    cpu_before = cpu_seconds(server_pid)
+                    run_result = await drive(client, scenario, ctx, concurrency, total)
+                    run_result["cpu_ms_per_request"] = round((cpu_seconds(server_pid) - cpu_before) / total * 1000, 3)
+                    runs.append(run_result)
+                best = max(runs, key=lambda run: run["requests_per_s"])
+                best["cpu_ms_per_request"] = min(run["cpu_ms_per_request"] for run in runs)
+                route_results[f"c{concurrency}"] = best
+            route_results["rss_mb"] = memory_mb(server_pid, "VmRSS")
+            results[f"{scenario.method} {scenario.route}"] = route_results
+            print(f"{scenario.method} {scenario.route}: " + ", ".join(
+                f"c{c} {route_results[f'c{c}']['requests_per_s']} rps" for c in args.concurrency), file=sys.stderr)
+    return results
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of current against baseline, as readable lines"""
+    regressions = []
+    for route, levels in current["routes"].items():
+        before_levels = baseline["routes"].get(route)
+        if before_levels is None:
+            continue
+        for level, now in levels.items():
+            before = before_levels.get(level)
+            if not isinstance(now, dict) or before is None:
+                continue
+            if now["requests_per_s"] < before["requests_per_s"] * (1 - tolerance):
+                regressions.append(f"{route} {level}: {before['requests_per_s']} -> {now['requests_per_s']} requests/s")
+            if now["p95_ms"] > before["p95_ms"] * (1 + tolerance) and now["p95_ms"] - before["p95_ms"] > 2:
+                regressions.append(f"{route} {level}: p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+            if (now["cpu_ms_per_request"] > before["cpu_ms_per_request"] * (1 + tolerance)
+                    and now["cpu_ms_per_request"] - before["cpu_ms_per_request"] > 0.5):
+                regressions.append(f"{route} {level}: server CPU {before['cpu_ms_per_request']} -> "
+                                   f"{now['cpu_ms_per_request']} ms/request")
+            # Writers contending for SQLite's lock fail in varying numbers
+            if now["errors"] > before["errors"] + max(2, before["errors"] * tolerance):
+                regressions.append(f"{route} {level}: {before['errors']} -> {now['errors']} errors")
+    if current["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"peak RSS {baseline['peak_rss_mb']} -> {current['peak_rss_mb']} MB")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--concurrency", type=lambda value: [int(level) for level in value.split(",")], default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per route and concurrency level")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per route and level; the fastest is reported")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--routes", default="", help="only routes matching this regex, e.g. 'GET /api/audits'")
+    parser.add_argument("--gemini-latency", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--port", type=int, default=8831)
+    parser.add_argument("--gemini-port", type=int, default=8832)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown, as a fraction")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--output", help="also write the results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{workdir}/suite.db",
+        GEMINI_BASE_URL=f"http://127.0.0.1:{args.gemini_port}",
+        GEMINI_API_KEY="benchmark",
+        PHOTO_STORAGE_DIR=os.path.join(workdir, "photos"),
+        REPORT_STORAGE_DIR=os.path.join(workdir, "reports"),
+        CACHE_DIR=os.path.join(workdir, "cache"),
+        WORKER_STATUS_FILE=os.path.join(workdir, "run", "workers.json"),
+    )
+    os.environ.update(env)
+    ctx: Dict[str, Any] = {"serial": itertools.count()}
+    ctx.update(seed_portfolio(**SCALES[args.scale], seed=args.seed))
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    gemini = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_gemini", "--port", str(args.gemini_port), "--latency", str(args.gemini_latency)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    server_log = open(os.path.join(workdir, "server.log"), "w")
+    print(f"Server log: {server_log.name}", file=sys.stderr)
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=server_log, stderr=subprocess.STDOUT,
+    )
+    try:
+        routes = asyncio.run(run(args, ctx, server.pid, workdir))
+        peak_rss = memory_mb(server.pid, "VmHWM")
+    finally:
+        for process in (server, gemini):
+            process.terminate()
+            process.wait()
+
+    results = {
+        "config": {
+            "scale": args.scale, "portfolio": {key: ctx[key] for key in ("groups", "properties", "audits", "items_per_audit")},
+            "concurrency": args.concurrency, "requests": args.requests, "repeat": args.repeat, "workers": args.workers,
+            "gemini_latency_s": args.gemini_latency, "routes": args.routes,
+        },
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "routes": routes,
+        "peak_rss_mb": peak_rss,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+            handle.write("\n")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --update-baseline", file=sys.stderr)
+        return
+    with open(args.baseline, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    if {**baseline["config"], "routes": ""} != {**results["config"], "routes": ""}:
+        print("Baseline was recorded with a different configuration; not comparing", file=sys.stderr)
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
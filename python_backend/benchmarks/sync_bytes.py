@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Bytes per sync of one audit's checklist: full refetch vs. ETag + updated_since
+
+Starts serve.py on a fresh database, creates an audit with --items items
+(descriptions, comments and photo links, as a worked checklist has), waits
+out SYNC_OVERLAP_SECONDS so the checklist is older than a delta reaches
+back, and measures the response bytes (status line, headers and body) a
+client pays to keep it current:
+
+    full          GET /items every time, as the client did before
+    unchanged     the same GET revalidated with If-None-Match (304)
+    delta, edit   updated_since=<X-Sync-Token> after one item is edited
+    delta, delete updated_since=<X-Sync-Token> after one item is deleted
+                  (the edited item comes again: it is within the overlap)
+
+    python -m benchmarks.sync_bytes --items 300
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import httpx
+
+from app.core.config import settings
+from benchmarks.proxy_throughput import BACKEND_DIR, wait_until_up
+
+def wire_bytes(response: httpx.Response) -> int:
+    """Bytes on the wire for a response (HTTP/1.1, uncompressed)"""
+    status_line = len(f"HTTP/1.1 {response.status_code} {response.reason_phrase}\r\n")
+    headers = sum(len(name) + len(value) + 4 for name, value in response.headers.raw)
+    return status_line + headers + 2 + len(response.content)
+
+def checklist(items: int):
+    return [
+        {
+            "category": f"Category {n % 12}",
+            "item_name": f"Checklist item {n}: bathroom fixtures and fittings are clean and in working order",
+            "description": "Inspect taps, shower head, toilet and mirrors; note limescale, chips or loose fittings.",
+            "score": n % 6,
+            "auditor_comments": "Minor limescale on the shower screen; otherwise as per brand standard.",
+            "photo_url": f"/api/photos/{n:064x}",
+            "is_compliant": n % 5 != 0,
+        }
+        for n in range(items)
+    ]
+
+async def run(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    await wait_until_up(base_url + "/api/health")
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        audit = (await client.post("/api/audits/", json={"property_id": 1, "auditor_id": 2})).json()
+        ids = (await client.post(f"/api/audits/{audit['id']}/items:bulk", json=checklist(args.items))).json()["ids"]
+        url = f"/api/audits/{audit['id']}/items"
+        await asyncio.sleep(settings.SYNC_OVERLAP_SECONDS + 1)
+
+        full = await client.get(url)
+        etag, token = full.headers["ETag"], full.headers["X-Sync-Token"]
+        unchanged = await client.get(url, headers={"If-None-Match": etag})
+
+        await client.put(f"/api/audits/items/{ids[len(ids) // 2]}", json={"score": 5, "reviewer_comments": "Rechecked"})
+        edited = await client.get(url, params={"updated_since": token})
+        token = edited.headers["X-Sync-Token"]
+
+        await client.delete(f"/api/audits/items/{ids[-1]}")
+        deleted = await client.get(url, params={"updated_since": token})
+
+    assert unchanged.status_code == 304, unchanged.status_code
+    full_bytes = wire_bytes(full)
+    results = {"items": args.items}
+    for label, response in (("full", full), ("unchanged", unchanged), ("delta_edit", edited), ("delta_delete", deleted)):
+        size = wire_bytes(response)
+        results[label] = {
+            "status": response.status_code,
+            "bytes": size,
+            "vs_full": round(size / full_bytes, 4),
+        }
+        if response.status_code == 200 and label.startswith("delta"):
+            body = response.json()
+            results[label].update(changed=len(body["items"]), deleted=len(body["deleted_ids"]))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=300)
+    parser.add_argument("--port", type=int, default=8815)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{workdir}/sync_bytes.db",
+        WORKER_STATUS_FILE=f"{workdir}/run/workers.json",
+        CACHE_DIR=f"{workdir}/cache",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--init-db", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", "1", "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
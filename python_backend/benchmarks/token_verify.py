@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Per-request cost of access-token verification
+
+Times TokenVerifier.verify for a cold token (full HMAC check and claim
+decode), a warm token (served from the verified-token LRU), a warm token
+whose user's token version is checked against the file cache backend (as
+with several workers) and, for comparison, the primary-key user lookup a
+DB-backed check would need (the verifier pays it once per user and process,
+and again after a revocation).
+
+    python -m benchmarks.token_verify --iterations 20000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+
+def per_call_us(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return round((time.perf_counter() - start) / iterations * 1e6, 2)
+
+
+async def per_await_us(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await func()
+    return round((time.perf_counter() - start) / iterations * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        from app.core.config import settings
+        from app.core.database import SessionLocal, async_engine, create_tables
+        from app.core.cache import FileCacheBackend
+        from app.core.security import TokenVerifier, create_access_token
+        from app.models.models import User
+
+        create_tables()
+        with SessionLocal() as db:
+            db.add(User(id=1, username="bench", password="x", role="auditor", name="Bench", email="bench@bench.local"))
+            db.commit()
+
+        claims = {"sub": "1", "ver": 0, "username": "bench", "role": "auditor", "name": "Bench", "email": "bench@bench.local"}
+        token = create_access_token(claims)
+        warm_verifier = TokenVerifier(settings.SECRET_KEY, settings.ALGORITHM, 1024, 60)
+        file_verifier = TokenVerifier(settings.SECRET_KEY, settings.ALGORITHM, 1024, 60, FileCacheBackend(os.path.join(tmp, "cache")))
+
+        async def cold():
+            # A fresh verifier: token decode plus the user's version from the database
+            await TokenVerifier(settings.SECRET_KEY, settings.ALGORITHM, 1, 60).verify(token)
+
+        async def run():
+            await warm_verifier.verify(token)
+            await file_verifier.verify(token)
+            results = {
+                "cold_verify_us": await per_await_us(cold, max(1, args.iterations // 10)),
+                "cached_verify_us": await per_await_us(lambda: warm_verifier.verify(token), args.iterations),
+                "cached_verify_file_backend_us": await per_await_us(lambda: file_verifier.verify(token), args.iterations),
+            }
+            await async_engine.dispose()
+            return results
+
+        results = asyncio.run(run())
+
+        def db_lookup():
+            with SessionLocal() as db:
+                db.get(User, 1)
+
+        results["db_user_lookup_us"] = per_call_us(db_lookup, max(1, args.iterations // 10))
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Requests/s on the audit list endpoint as serve.py workers are added
+
+Seeds a fresh database with audits, then for each worker count starts
+serve.py, drives GET /api/audits/ with concurrent keep-alive clients and
+reports throughput and the speedup over one worker. Scaling stops at the
+number of CPUs the machine has; the benchmark prints it alongside.
+
+    python -m benchmarks.worker_scaling --workers 1 2 4 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.proxy_throughput import drive
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def seed(database_url: str, audits: int):
+    os.environ["DATABASE_URL"] = database_url
+    import manage
+    from app.core.database import engine
+    from app.models.models import Audit
+    asyncio.run(manage.init_db())
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(Audit.__table__.insert(), [
+            {"property_id": 1 + i % 3, "auditor_id": 2, "status": "completed", "overall_score": 60 + i % 40,
+             "created_at": now - timedelta(minutes=i), "updated_at": now}
+            for i in range(audits)
+        ])
+    engine.dispose()
+
+async def measure(port: int, workers: int, args) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(300):
+            try:
+                status = (await client.get("/api/health/workers")).json()
+                if sum(w["state"] == "ready" for w in status["workers"]) >= workers:
+                    break
+            except (httpx.TransportError, ValueError, KeyError):
+                pass
+            await asyncio.sleep(0.1)
+    requests = [("GET", f"/api/audits/?property_id={1 + i % 3}&limit=50", None) for i in range(3)]
+    await drive(base_url, requests, args.concurrency, args.requests // 5)  # warm up every worker
+    return await drive(base_url, requests, args.concurrency, args.requests)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--audits", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--port", type=int, default=8831)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    database_url = f"sqlite:///{workdir}/worker_scaling.db"
+    seed(database_url, args.audits)
+    env = dict(os.environ, DATABASE_URL=database_url, WORKER_STATUS_FILE=os.path.join(workdir, "workers.json"))
+
+    results = {"cpus": os.cpu_count(), "runs": []}
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, "serve.py", "--workers", str(workers), "--port", str(args.port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+        )
+        try:
+            run = {"workers": workers, **asyncio.run(measure(args.port, workers, args))}
+        finally:
+            server.terminate()
+            server.wait()
+            time.sleep(0.5)
+        run["speedup"] = round(run["requests_per_s"] / results["runs"][0]["requests_per_s"], 2) if results["runs"] else 1.0
+        results["runs"].append(run)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,20 @@ Hotel Audit Platform - FastAPI Backend
 Main entry point for the Python FastAPI backend server
 """
 
+import json
 import os
-import uvicorn
+import sys
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.main import api_router
 from app.core.config import settings
-from app.core.database import create_tables, test_connection
+from app.core.middleware import ProfilingMiddleware, RequestMetricsMiddleware
+from app.core.cache import response_cache
+from app.core.database import pool_status, probe_database
+from app.core.metrics import registry
+from app.services.change_feed import change_feed
+from app.services.job_queue import job_queue
 import logging
 
 # Configure logging
@@ -33,32 +40,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Query-Count", "Server-Timing", "X-Profile-Id", "ETag", "X-Sync-Token"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
 
 # Include API router
 app.include_router(api_router, prefix="/api")
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup"""
-    logger.info("🗄️ Initializing database...")
-    try:
-        # Test connection
-        if test_connection():
-            logger.info("✅ Database connection successful")
-        else:
-            logger.error("❌ Database connection failed")
-            
-        # Create tables
-        create_tables()
-        logger.info("✅ Database tables initialized")
-        
-        # Seed initial data
-        await seed_initial_data()
-        logger.info("✅ Initial data seeded")
-        
-    except Exception as e:
-        logger.error(f"❌ Database initialization failed: {e}")
+    """Start the background job workers, the change event feed and metrics sharing.
+
+    Schema creation and demo data are a one-shot step (python manage.py
+    init-db), not something every worker repeats on boot.
+    """
+    await job_queue.start()
+    await change_feed.start()
+    registry.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Hand unfinished jobs back to the queue, stop the process pool and close outbound connection pools"""
+    from app.core.process_pool import cpu_pool
+    from app.services.gemini_service import gemini_service
+    await job_queue.stop()
+    await change_feed.stop()
+    cpu_pool.shutdown()
+    await gemini_service.aclose()
+    await registry.stop()
 
 @app.get("/")
 async def root():
@@ -67,68 +77,47 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "database": "connected"}
-
-async def seed_initial_data():
-    """Seed database with initial demo data"""
-    from app.core.database import SessionLocal
-    from app.models.models import User, HotelGroup, Property
-    import hashlib
-    
-    def get_password_hash_simple(password: str) -> str:
-        return hashlib.sha256(password.encode()).hexdigest()
-    
-    db = SessionLocal()
+    """Health check: runs SELECT 1 through the connection pool, 503 if that fails or times out"""
     try:
-        # Check if users already exist
-        if db.query(User).first():
-            logger.info("🔄 Initial data already exists, skipping seed")
-            return
-            
-        # Create demo users
-        users = [
-            User(username="admin", password=get_password_hash_simple("password"), role="admin", name="Admin User", email="admin@hotel.com"),
-            User(username="auditor", password=get_password_hash_simple("password"), role="auditor", name="Auditor User", email="auditor@hotel.com"),
-            User(username="reviewer", password=get_password_hash_simple("password"), role="reviewer", name="Reviewer User", email="reviewer@hotel.com"),
-            User(username="corporate", password=get_password_hash_simple("password"), role="corporate", name="Corporate User", email="corporate@hotel.com"),
-            User(username="hotel_gm", password=get_password_hash_simple("password"), role="hotel_gm", name="Hotel GM User", email="gm@hotel.com"),
-        ]
-        
-        for user in users:
-            db.add(user)
-        
-        # Create demo hotel groups
-        hotel_groups = [
-            HotelGroup(name="Luxury Hotels Inc.", description="Premium luxury hotel chain"),
-            HotelGroup(name="Budget Stay Group", description="Affordable accommodation network"),
-        ]
-        
-        for group in hotel_groups:
-            db.add(group)
-        
-        db.commit()
-        
-        # Create demo properties
-        properties = [
-            Property(name="Grand Luxury Hotel", location="New York, NY", hotel_group_id=1, manager_name="John Smith", manager_email="john@grandluxury.com"),
-            Property(name="City Center Hotel", location="Los Angeles, CA", hotel_group_id=1, manager_name="Jane Doe", manager_email="jane@citycenter.com"),
-            Property(name="Budget Inn Downtown", location="Chicago, IL", hotel_group_id=2, manager_name="Mike Johnson", manager_email="mike@budgetinn.com"),
-        ]
-        
-        for prop in properties:
-            db.add(prop)
-        
-        db.commit()
-        logger.info("✅ Demo data seeded successfully")
-        
+        latency = await probe_database(settings.HEALTH_DB_TIMEOUT_SECONDS)
     except Exception as e:
-        logger.error(f"❌ Error seeding initial data: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        logger.warning(f"Health check database probe failed: {e!r}")
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unhealthy", "database": "unavailable", "error": repr(e), "worker_pid": os.getpid()},
+        )
+    return {
+        "status": "healthy",
+        "database": "connected",
+        "database_latency_ms": round(latency * 1000, 2),
+        "pool": pool_status(),
+        "worker_pid": os.getpid(),
+    }
+
+@app.get("/api/health/workers")
+async def worker_health():
+    """Per-worker status as last reported to the serve.py master"""
+    try:
+        with open(settings.WORKER_STATUS_FILE, encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        # Not under serve.py: this process is the only worker
+        return {"master_pid": None, "workers": [{"pid": os.getpid(), "state": "running"}]}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (all workers under serve.py)"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Response cache hit/miss counters for this worker"""
+    return response_cache.stats()
 
 if __name__ == "__main__":
+    # Development server; production runs serve.py (multiple workers, no file watcher)
+    import uvicorn
+    reload = "--reload" in sys.argv
     logger.info("🚀 Starting Hotel Audit Platform FastAPI Server")
     logger.info(f"📍 Server will run on: http://0.0.0.0:8000")
     logger.info(f"📝 API Documentation: http://0.0.0.0:8000/docs")
@@ -137,7 +126,7 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        reload_dirs=["app"],
+        reload=reload,
+        reload_dirs=["app"] if reload else None,
         log_level="info"
     )
\ No newline at end of file
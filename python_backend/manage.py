@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Hotel Audit Platform - one-shot management commands
+
+    python manage.py init-db [--no-seed]   migrate the schema, seed demo data, build analytics
+    python manage.py seed                  demo users, hotel groups and properties only
+    python manage.py profile-startup       import time per module for a cold start
+    python manage.py profile-token         X-Profile header value to profile a request
+
+init-db replaces the schema and seed work the API used to repeat on every
+boot; run it once per deploy (before serve.py) or when the models change.
+It runs `alembic upgrade head`, so either can be used to migrate afterwards.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+async def seed_initial_data():
+    """Seed database with initial demo data"""
+    from app.core.database import SessionLocal
+    from app.models.models import User, HotelGroup, Property
+    from app.core.security import password_hasher
+    
+    db = SessionLocal()
+    try:
+        # Check if users already exist
+        if db.query(User).first():
+            logger.info("🔄 Initial data already exists, skipping seed")
+            return
+            
+        # Create demo users
+        demo_password = await password_hasher.hash("password")
+        users = [
+            User(username="admin", password=demo_password, role="admin", name="Admin User", email="admin@hotel.com"),
+            User(username="auditor", password=demo_password, role="auditor", name="Auditor User", email="auditor@hotel.com"),
+            User(username="reviewer", password=demo_password, role="reviewer", name="Reviewer User", email="reviewer@hotel.com"),
+            User(username="corporate", password=demo_password, role="corporate", name="Corporate User", email="corporate@hotel.com"),
+            User(username="hotel_gm", password=demo_password, role="hotel_gm", name="Hotel GM User", email="gm@hotel.com"),
+        ]
+        
+        for user in users:
+            db.add(user)
+        
+        # Create demo hotel groups
+        hotel_groups = [
+            HotelGroup(name="Luxury Hotels Inc.", description="Premium luxury hotel chain"),
+            HotelGroup(name="Budget Stay Group", description="Affordable accommodation network"),
+        ]
+        
+        for group in hotel_groups:
+            db.add(group)
+        
+        db.commit()
+        
+        # Create demo properties
+        properties = [
+            Property(name="Grand Luxury Hotel", location="New York, NY", hotel_group_id=1, manager_name="John Smith", manager_email="john@grandluxury.com"),
+            Property(name="City Center Hotel", location="Los Angeles, CA", hotel_group_id=1, manager_name="Jane Doe", manager_email="jane@citycenter.com"),
+            Property(name="Budget Inn Downtown", location="Chicago, IL", hotel_group_id=2, manager_name="Mike Johnson", manager_email="mike@budgetinn.com"),
+        ]
+        
+        for prop in properties:
+            db.add(prop)
+        
+        db.commit()
+        logger.info("✅ Demo data seeded successfully")
+        
+    except Exception as e:
+        logger.error(f"❌ Error seeding initial data: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+def migrate_db():
+    """Bring the schema to the latest migration.
+
+    A database made by create_tables() has no alembic_version; its missing
+    tables and indexes are created and it is stamped at head instead, so
+    that later upgrades do not try to create its tables again.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
+
+    from app.core.database import engine
+    from app.models.models import Base
+
+    # No alembic.ini: its logging setup would silence this script's logger
+    config = Config()
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    tables = set(inspect(engine).get_table_names())
+    if tables and "alembic_version" not in tables:
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn)
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+        command.stamp(config, "head")
+        logger.info("✅ Unversioned schema completed and stamped at the latest migration")
+    else:
+        command.upgrade(config, "head")
+
+async def init_db(seed: bool = True):
+    """Migrate the schema, seed demo data and backfill analytics rollups"""
+    from app.core.database import AsyncSessionLocal, async_engine, engine, test_connection
+    from app.services.analytics_service import backfill_if_empty
+
+    logger.info("🗄️ Initializing database...")
+    if not test_connection():
+        raise SystemExit("❌ Database connection failed")
+    logger.info("✅ Database connection successful")
+
+    migrate_db()
+    logger.info("✅ Database schema at the latest migration")
+
+    if seed:
+        await seed_initial_data()
+        logger.info("✅ Initial data seeded")
+
+    # Analytics rollups for audits that predate them
+    async with AsyncSessionLocal() as db:
+        if await backfill_if_empty(db):
+            logger.info("✅ Analytics rollups built from existing audits")
+
+    # Nothing from this one-shot run should be reused
+    await async_engine.dispose()
+    engine.dispose()
+
+def import_times(module: str = "main") -> Tuple[float, List[Tuple[str, float, float]]]:
+    """(total seconds, [(module, self s, cumulative s)]) for importing module in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header
+        rows.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    total = next(cumulative for name, _, cumulative in reversed(rows) if name == module)
+    return total, rows
+
+def profile_startup(top: int):
+    total, rows = import_times()
+    print(f"import main: {total * 1000:.0f} ms in a fresh interpreter\n")
+
+    packages = defaultdict(float)
+    for name, self_s, _ in rows:
+        packages[name.split(".")[0]] += self_s
+    print(f"{'package':<32} {'self ms':>9}")
+    for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{name:<32} {seconds * 1000:>9.1f}")
+
+    print(f"\n{'module':<56} {'self ms':>9} {'cumul. ms':>10}")
+    for name, self_s, cumulative in sorted(rows, key=lambda row: -row[2])[:top]:
+        print(f"{name:<56} {self_s * 1000:>9.1f} {cumulative * 1000:>10.1f}")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Hotel Audit Platform management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+    init = commands.add_parser("init-db", help="migrate the schema, seed demo data and build analytics rollups")
+    init.add_argument("--no-seed", action="store_true", help="skip the demo users, hotel groups and properties")
+    commands.add_parser("seed", help="seed demo users, hotel groups and properties")
+    profile = commands.add_parser("profile-startup", help="report import time per module for `import main`")
+    profile.add_argument("--top", type=int, default=25)
+    token = commands.add_parser("profile-token", help="print an X-Profile token for profiling requests")
+    token.add_argument("--minutes", type=float, default=60)
+    args = parser.parse_args(argv)
+
+    if args.command == "init-db":
+        asyncio.run(init_db(seed=not args.no_seed))
+    elif args.command == "seed":
+        asyncio.run(seed_initial_data())
+    elif args.command == "profile-startup":
+        profile_startup(args.top)
+    elif args.command == "profile-token":
+        from app.core.diagnostics import profile_token
+        print(profile_token(args.minutes * 60))
+
+if __name__ == "__main__":
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    main()
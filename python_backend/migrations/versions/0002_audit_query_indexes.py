@@ -0,0 +1,40 @@
+"""Composite indexes for the audit, item, property and user list queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_audits_created_at", "audits", ["created_at"]),
+    ("ix_audits_status_created", "audits", ["status", "created_at"]),
+    ("ix_audits_auditor_status_created", "audits", ["auditor_id", "status", "created_at"]),
+    ("ix_audits_reviewer_status_created", "audits", ["reviewer_id", "status", "created_at"]),
+    ("ix_audits_property_status_created", "audits", ["property_id", "status", "created_at"]),
+    ("ix_audit_items_audit_category", "audit_items", ["audit_id", "category"]),
+    ("ix_properties_hotel_group_name", "properties", ["hotel_group_id", "name"]),
+    ("ix_users_role_name", "users", ["role", "name"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,86 @@
+"""Analytics fact and rollup tables
+
+The tables start empty; the API fills them from existing audits on its
+first start (see analytics_service.backfill_if_empty).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _item_measures():
+    return [
+        sa.Column("items", sa.Integer(), nullable=False),
+        sa.Column("scored_items", sa.Integer(), nullable=False),
+        sa.Column("score_sum", sa.Float(), nullable=False),
+        sa.Column("compliant_items", sa.Integer(), nullable=False),
+        sa.Column("compliance_known", sa.Integer(), nullable=False),
+        sa.Column("ai_scored_items", sa.Integer(), nullable=False),
+        sa.Column("ai_score_sum", sa.Float(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "analytics_audit_facts",
+        sa.Column("audit_id", sa.Integer(), nullable=False),
+        sa.Column("hotel_group_id", sa.Integer(), nullable=False),
+        sa.Column("property_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.String(length=7), nullable=False),
+        sa.Column("overall_score", sa.Float(), nullable=True),
+        sa.Column("compliance_zone", sa.String(length=10), nullable=True),
+        sa.ForeignKeyConstraint(["audit_id"], ["audits.id"]),
+        sa.PrimaryKeyConstraint("audit_id"),
+    )
+    op.create_table(
+        "analytics_category_facts",
+        sa.Column("audit_id", sa.Integer(), nullable=False),
+        sa.Column("category", sa.String(length=100), nullable=False),
+        *_item_measures(),
+        sa.ForeignKeyConstraint(["audit_id"], ["audits.id"]),
+        sa.PrimaryKeyConstraint("audit_id", "category"),
+    )
+    op.create_table(
+        "analytics_audit_rollups",
+        sa.Column("hotel_group_id", sa.Integer(), nullable=False),
+        sa.Column("property_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.String(length=7), nullable=False),
+        sa.Column("audits", sa.Integer(), nullable=False),
+        sa.Column("scored_audits", sa.Integer(), nullable=False),
+        sa.Column("score_sum", sa.Float(), nullable=False),
+        sa.Column("green", sa.Integer(), nullable=False),
+        sa.Column("amber", sa.Integer(), nullable=False),
+        sa.Column("red", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("hotel_group_id", "property_id", "month"),
+    )
+    op.create_table(
+        "analytics_category_rollups",
+        sa.Column("hotel_group_id", sa.Integer(), nullable=False),
+        sa.Column("property_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.String(length=7), nullable=False),
+        sa.Column("category", sa.String(length=100), nullable=False),
+        *_item_measures(),
+        sa.PrimaryKeyConstraint("hotel_group_id", "property_id", "month", "category"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("analytics_category_rollups")
+    op.drop_table("analytics_audit_rollups")
+    op.drop_table("analytics_category_facts")
+    op.drop_table("analytics_audit_facts")
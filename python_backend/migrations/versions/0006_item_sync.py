@@ -0,0 +1,43 @@
+"""updated_at indexes and deleted item tombstones for delta sync
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_audits_updated_at", "audits", ["updated_at"])
+    op.create_index("ix_audit_items_audit_updated", "audit_items", ["audit_id", "updated_at"])
+    op.create_table(
+        "audit_item_tombstones",
+        sa.Column("audit_id", sa.Integer(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["audit_id"], ["audits.id"]),
+        sa.PrimaryKeyConstraint("audit_id", "item_id"),
+    )
+    op.create_index(
+        "ix_audit_item_tombstones_audit_deleted", "audit_item_tombstones", ["audit_id", "deleted_at"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_audit_item_tombstones_audit_deleted", table_name="audit_item_tombstones")
+    op.drop_table("audit_item_tombstones")
+    op.drop_index("ix_audit_items_audit_updated", table_name="audit_items")
+    op.drop_index("ix_audits_updated_at", table_name="audits")
@@ -0,0 +1,39 @@
+"""Per-user and per-property audit indexes in keyset order
+
+The 0002 indexes put status before created_at, so listing one auditor's,
+reviewer's or property's audits without a status filter sorted all of them
+for every page.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_audits_auditor_created", "audits", ["auditor_id", "created_at", "id"]),
+    ("ix_audits_reviewer_created", "audits", ["reviewer_id", "created_at", "id"]),
+    ("ix_audits_property_created", "audits", ["property_id", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,38 @@
+"""Login attempts shared by all workers, for the failed-login rate limit
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "login_attempts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(length=50), nullable=False),
+        sa.Column("attempted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_login_attempts_username_attempted", "login_attempts", ["username", "attempted_at"])
+    op.create_index("ix_login_attempts_attempted_at", "login_attempts", ["attempted_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_login_attempts_attempted_at", table_name="login_attempts")
+    op.drop_index("ix_login_attempts_username_attempted", table_name="login_attempts")
+    op.drop_table("login_attempts")
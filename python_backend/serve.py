@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Hotel Audit Platform - production launcher
+
+Runs the FastAPI app in N pre-forked uvicorn workers sharing one listening
+socket (default: one per CPU). The app, including the modules it otherwise
+imports on first use (the Gemini SDK, NumPy scoring), is imported once in the
+master before forking, so workers share it copy-on-write and start without
+import work. --init-db runs `manage.py init-db` in the master first.
+
+The master replaces workers that exit or stop heartbeating, and writes the
+state of every worker to WORKER_STATUS_FILE (served at /api/health/workers).
+
+Signals to the master:
+    SIGHUP           reload: the master re-executes itself to import the code
+                     now on disk (keeping the listening socket), then replaces
+                     each worker with a fresh one, which must be ready before
+                     the old one is drained. If the new code fails to import,
+                     the old code keeps serving.
+    SIGTERM, SIGINT  graceful shutdown (in-flight requests finish)
+    SIGTTIN/SIGTTOU  one worker more / fewer
+
+    python serve.py --workers 4 --port 8000 [--init-db]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import select
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Deque, Dict, List, Optional
+
+import uvicorn
+
+logger = logging.getLogger("serve")
+
+SCRIPT = os.path.abspath(__file__)
+# Set for a re-executed master: the listening socket and the workers it adopts
+HANDOFF_ENV = "SERVE_HANDOFF"
+
+@dataclass
+class WorkerInfo:
+    pid: int
+    generation: int
+    started_at: float
+    state: str = "starting"  # starting, ready, stopping
+    last_heartbeat: float = 0.0
+    requests: int = 0
+    connections: int = 0
+    status_fd: int = field(default=-1, repr=False)
+    buffer: bytes = field(default=b"", repr=False)
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server that reports to the master through a pipe"""
+
+    def __init__(self, config: uvicorn.Config, status_fd: int, heartbeat: float):
+        super().__init__(config)
+        self.status_fd = status_fd
+        self.heartbeat_ticks = max(1, round(heartbeat / 0.1))  # on_tick runs every 0.1 s
+        self.draining = False
+        if not config.loaded:
+            config.load()
+        app = config.loaded_app
+
+        async def drain_aware_app(scope, receive, send):
+            if scope["type"] != "http":
+                return await app(scope, receive, send)
+
+            async def send_with_close(message):
+                if self.draining and message["type"] == "http.response.start":
+                    message = {**message, "headers": [*message.get("headers", []), (b"connection", b"close")]}
+                await send(message)
+
+            await app(scope, receive, send_with_close)
+
+        config.loaded_app = drain_aware_app
+
+    def report(self, state: str):
+        message = {
+            "state": state,
+            "requests": self.server_state.total_requests,
+            "connections": len(self.server_state.connections),
+        }
+        try:
+            os.write(self.status_fd, json.dumps(message).encode() + b"\n")
+        except OSError:
+            # Master gone; stop serving rather than run unsupervised
+            self.should_exit = True
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets)
+        if self.started:
+            self.report("ready")
+
+    async def shutdown(self, sockets=None):
+        # Closing an idle keep-alive connection races with a client reusing
+        # it. Stop accepting, answer whatever arrives on open connections
+        # with Connection: close, and let uvicorn time out the rest before
+        # the usual shutdown.
+        for server in self.servers:
+            server.close()
+        self.draining = True
+        # Event streams never finish by themselves; end them so their
+        # clients reconnect (resuming by Last-Event-ID) to another worker
+        from app.services.change_feed import change_feed
+        change_feed.close_streams()
+        deadline = time.monotonic() + min(self.config.timeout_keep_alive + 0.5, self.config.timeout_graceful_shutdown or 0)
+        while self.server_state.connections and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        await super().shutdown(sockets)
+
+    async def on_tick(self, counter: int) -> bool:
+        if counter % self.heartbeat_ticks == 0 and self.started:
+            self.report("stopping" if self.should_exit else "ready")
+        return await super().on_tick(counter)
+
+class Master:
+    """Forks, supervises and replaces the uvicorn workers"""
+
+    def __init__(self, config: uvicorn.Config, workers: int):
+        from app.core.config import settings
+        self.config = config
+        self.target = workers
+        self.heartbeat = settings.WORKER_HEARTBEAT_SECONDS
+        self.timeout = settings.WORKER_TIMEOUT_SECONDS
+        self.graceful_timeout = settings.WORKER_GRACEFUL_TIMEOUT_SECONDS
+        self.status_file = settings.WORKER_STATUS_FILE
+        self.workers: Dict[int, WorkerInfo] = {}
+        self.generation = 0
+        self.restarts = 0
+        self.started_at = time.time()
+        self.stopping = False
+        self.reload_requested = False
+        # Rolling restart: old workers still to replace, and the replacement
+        # currently starting (the old one is drained once it is ready)
+        self.to_replace: Deque[int] = deque()
+        self.replacement: Optional[int] = None
+        self.draining: Dict[int, float] = {}
+        self.socket = None
+
+    # Signals only set flags; the main loop acts on them
+    def _on_exit(self, signum, frame):
+        self.stopping = True
+
+    def _on_hup(self, signum, frame):
+        self.reload_requested = True
+
+    def _on_ttin(self, signum, frame):
+        self.target += 1
+
+    def _on_ttou(self, signum, frame):
+        self.target = max(1, self.target - 1)
+
+    def _reexec(self):
+        """Replace this process with a fresh master running the code on disk.
+
+        Workers keep serving meanwhile; the listening socket and their status
+        pipes survive the exec, and the new master adopts them and replaces
+        them one by one like any rolling restart.
+        """
+        check = subprocess.run([sys.executable, "-c", "import main"], cwd=os.path.dirname(SCRIPT),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if check.returncode != 0:
+            logger.error("Reload aborted, the new code does not import:\n%s", check.stderr.strip())
+            return
+
+        self.socket.set_inheritable(True)
+        for info in self.workers.values():
+            os.set_inheritable(info.status_fd, True)
+        os.environ[HANDOFF_ENV] = json.dumps({
+            "socket": self.socket.fileno(),
+            "target": self.target,
+            "generation": self.generation + 1,
+            "restarts": self.restarts,
+            "started_at": self.started_at,
+            "workers": [
+                {**{k: v for k, v in asdict(info).items() if k != "buffer"}, "buffer": info.buffer.decode()}
+                for info in self.workers.values()
+            ],
+        })
+        # Ignored signals stay ignored across exec, until the new master
+        # installs its handlers; a second SIGHUP must not kill it meanwhile
+        for signum in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(signum, signal.SIG_IGN)
+        argv = [arg for arg in sys.argv[1:] if arg != "--init-db"]
+        logger.info("Re-executing master %s to load new code", os.getpid())
+        logging.shutdown()
+        os.execv(sys.executable, [sys.executable, SCRIPT, *argv])
+
+    def _adopt(self, handoff: dict):
+        """Take over the workers of the master this process was exec'd from"""
+        self.target = handoff["target"]
+        self.generation = handoff["generation"]
+        self.restarts = handoff["restarts"]
+        self.started_at = handoff["started_at"]
+        for worker in handoff["workers"]:
+            info = WorkerInfo(**{**worker, "buffer": worker["buffer"].encode()})
+            info.last_heartbeat = time.time()
+            os.set_inheritable(info.status_fd, False)
+            self.workers[info.pid] = info
+            if info.state == "stopping":
+                self.draining[info.pid] = time.time()
+        self.to_replace = deque(pid for pid, info in self.workers.items() if info.state != "stopping")
+        logger.info("Rolling restart of %d adopted workers (generation %d)", len(self.to_replace), self.generation)
+
+    def spawn(self) -> int:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for info in self.workers.values():
+                os.close(info.status_fd)
+            self._run_worker(write_fd)
+        os.close(write_fd)
+        os.set_blocking(read_fd, False)
+        self.workers[pid] = WorkerInfo(pid=pid, generation=self.generation, started_at=time.time(),
+                                       last_heartbeat=time.time(), status_fd=read_fd)
+        return pid
+
+    def _run_worker(self, status_fd: int):
+        for signum in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(signum, signal.SIG_IGN)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        code = 0
+        try:
+            WorkerServer(self.config, status_fd, self.heartbeat).run(sockets=[self.socket])
+        except BaseException:
+            logger.exception("Worker %s crashed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _read_status(self, info: WorkerInfo):
+        try:
+            data = os.read(info.status_fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            return
+        *lines, info.buffer = (info.buffer + data).split(b"\n")
+        for line in lines:
+            message = json.loads(line)
+            if info.state != "stopping":
+                info.state = message["state"]
+            info.requests = message["requests"]
+            info.connections = message["connections"]
+            info.last_heartbeat = time.time()
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            info = self.workers.pop(pid, None)
+            self.draining.pop(pid, None)
+            if info is None:
+                continue
+            os.close(info.status_fd)
+            if pid == self.replacement:
+                self.replacement = None
+            if info.state != "stopping" and not self.stopping:
+                self.restarts += 1
+                logger.warning("Worker %s exited unexpectedly (status %s)", pid, status)
+
+    def _stop_worker(self, pid: int):
+        info = self.workers.get(pid)
+        if info is None or pid in self.draining:
+            return
+        info.state = "stopping"
+        self.draining[pid] = time.time()
+        os.kill(pid, signal.SIGTERM)
+
+    def _supervise(self):
+        now = time.time()
+        for pid, info in list(self.workers.items()):
+            if info.state != "stopping" and now - info.last_heartbeat > self.timeout:
+                logger.warning("Worker %s missed heartbeats for %.0f s, killing it", pid, now - info.last_heartbeat)
+                info.state = "stopping"
+                os.kill(pid, signal.SIGKILL)
+        for pid, since in list(self.draining.items()):
+            if now - since > self.graceful_timeout and pid in self.workers:
+                os.kill(pid, signal.SIGKILL)
+
+        if self.reload_requested:
+            self.reload_requested = False
+            self._reexec()
+
+        # One replacement at a time: start it, wait for ready, then drain an old worker
+        if self.replacement is not None and self.workers[self.replacement].state == "ready":
+            self.replacement = None
+            while self.to_replace:
+                old = self.to_replace.popleft()
+                if old in self.workers and self.workers[old].state != "stopping":
+                    self._stop_worker(old)
+                    break
+        if self.replacement is None and self.to_replace:
+            self.replacement = self.spawn()
+
+        # Keep the worker count at target (plus the replacement during a restart)
+        wanted = self.target + (self.replacement is not None)
+        active = sorted(
+            (pid for pid, info in self.workers.items() if info.state != "stopping"),
+            key=lambda pid: self.workers[pid].started_at,
+        )
+        for _ in range(wanted - len(active)):
+            self.spawn()
+        for pid in [pid for pid in active if pid != self.replacement][:max(0, len(active) - wanted)]:
+            self._stop_worker(pid)
+
+    def write_status(self):
+        status = {
+            "master_pid": os.getpid(),
+            "started_at": self.started_at,
+            "generation": self.generation,
+            "target_workers": self.target,
+            "restarts": self.restarts,
+            "workers": [
+                {
+                    **{k: v for k, v in asdict(info).items() if k not in ("status_fd", "buffer")},
+                    "heartbeat_age": round(time.time() - info.last_heartbeat, 2),
+                }
+                for info in sorted(self.workers.values(), key=lambda info: info.started_at)
+            ],
+        }
+        directory = os.path.dirname(os.path.abspath(self.status_file))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.status_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(status, handle)
+        os.replace(tmp_path, self.status_file)
+
+    def run(self):
+        handoff = os.environ.pop(HANDOFF_ENV, None)
+        if handoff:
+            handoff = json.loads(handoff)
+            self.socket = socket.socket(fileno=handoff["socket"])
+            self.socket.set_inheritable(False)
+            self._adopt(handoff)
+        else:
+            self.socket = self.config.bind_socket()
+        signal.signal(signal.SIGTERM, self._on_exit)
+        signal.signal(signal.SIGINT, self._on_exit)
+        signal.signal(signal.SIGHUP, self._on_hup)
+        signal.signal(signal.SIGTTIN, self._on_ttin)
+        signal.signal(signal.SIGTTOU, self._on_ttou)
+        # Keep everything imported so far out of the collector, so workers'
+        # GC passes do not touch (and un-share) those pages
+        gc.freeze()
+        logger.info("Master %s serving on %s:%s with %d workers", os.getpid(), self.config.host, self.config.port, self.target)
+
+        last_status = 0.0
+        try:
+            while not self.stopping:
+                self._supervise()
+                fds = {info.status_fd: info for info in self.workers.values()}
+                try:
+                    readable, _, _ = select.select(list(fds), [], [], 0.2)
+                except InterruptedError:
+                    readable = []
+                for fd in readable:
+                    self._read_status(fds[fd])
+                self._reap()
+                if time.time() - last_status >= self.heartbeat:
+                    self.write_status()
+                    last_status = time.time()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        logger.info("Stopping %d workers", len(self.workers))
+        for pid in list(self.workers):
+            self._stop_worker(pid)
+        deadline = time.time() + self.graceful_timeout
+        while self.workers and time.time() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGKILL)
+        while self.workers:
+            self._reap()
+            time.sleep(0.05)
+        self.socket.close()
+        try:
+            os.remove(self.status_file)
+        except FileNotFoundError:
+            pass
+
+def preload(workers: int, init_db: bool = False):
+    """Import the app (and its lazily imported dependencies) in the master"""
+    from app.core.config import settings
+    if workers > 1:
+        # settings is already loaded, so shared defaults go on it directly;
+        # values from the environment win. Invalidations must reach every
+        # worker's response cache, and /metrics and /api/admin must see every
+        # worker. Each worker starts its own render pool: split the CPUs
+        # between them rather than give every worker one process per CPU.
+        if "CACHE_BACKEND" not in os.environ:
+            settings.CACHE_BACKEND = "file"
+        if "PROCESS_POOL_WORKERS" not in os.environ:
+            settings.PROCESS_POOL_WORKERS = max(1, (os.cpu_count() or 1) // workers)
+        if "METRICS_DIR" not in os.environ:
+            settings.METRICS_DIR = os.path.join(os.path.dirname(settings.WORKER_STATUS_FILE), "metrics")
+        if "DIAGNOSTICS_DIR" not in os.environ:
+            settings.DIAGNOSTICS_DIR = os.path.join(os.path.dirname(settings.WORKER_STATUS_FILE), "diagnostics")
+    if settings.METRICS_DIR and HANDOFF_ENV not in os.environ:
+        # Counters restart with the server; drop the previous run's snapshots
+        shutil.rmtree(settings.METRICS_DIR, ignore_errors=True)
+    if init_db:
+        import manage
+        asyncio.run(manage.init_db())
+    import main
+    import app.services.scoring  # noqa: F401
+    from app.services.gemini_service import gemini_service
+    if gemini_service.backend is not None:
+        gemini_service.backend.load()
+    return main.app
+
+def main(argv: Optional[List[str]] = None):
+    from app.core.config import settings
+    parser = argparse.ArgumentParser(description="Run the API in pre-forked uvicorn workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY or os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--init-db", action="store_true", help="create tables and seed demo data before starting")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+
+    app = preload(args.workers, args.init_db)
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=int(settings.WORKER_GRACEFUL_TIMEOUT_SECONDS),
+    )
+    Master(config, args.workers).run()
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.getcwd())
+    main()
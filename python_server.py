@@ -24,11 +24,10 @@ def start_python_server():
     try:
         subprocess.run([
             sys.executable, 
-            "-m", "uvicorn", 
-            "main:app", 
+            "serve.py", 
             "--host", "0.0.0.0", 
-            "--port", "5000", 
-            "--reload"
+            "--port", "5000",
+            "--init-db"
         ], check=True)
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
@@ -19,14 +19,7 @@ if __name__ == "__main__":
     # Change to python_backend directory
     os.chdir('python_backend')
     
-    # Import and run the main app
-    from main import app
-    import uvicorn
+    # Pre-forked workers, one per CPU (see python_backend/serve.py)
+    from serve import main
     
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=5000,
-        reload=False,
-        log_level="info"
-    )
\ No newline at end of file
+    main(["--host", "0.0.0.0", "--port", "5000", "--init-db"])
\ No newline at end of file
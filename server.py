@@ -1,110 +1,323 @@
 #!/usr/bin/env python3
 """
-Simple HTTP server to serve React frontend and proxy API calls to Python backend
+HTTP server that serves the React frontend and proxies API calls to the Python backend
 Pure Python architecture - no Express/Node.js dependencies
+
+Runs on asyncio (uvicorn + Starlette), so slow backend calls do not hold up
+other requests. API calls of every method are forwarded over a pool of
+keep-alive connections, with request and response bodies streamed through
+rather than buffered (uploads, NDJSON exports and server-sent events work
+as they do against the backend directly). The frontend build is indexed
+into memory at startup and served precompressed (see StaticSite).
 """
-import http.server
-import urllib.request
-import urllib.parse
-import json
+import argparse
+import email.utils
+import gzip
+import hashlib
+import mimetypes
 import os
-import sys
+import re
 import subprocess
-import threading
+import sys
 import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+import uvicorn
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+
+def default_static_dir() -> str:
+    """The Vite build if there is one, else the source tree (as before)"""
+    build = os.path.join(ROOT, "dist", "public")
+    return build if os.path.isdir(build) else os.path.join(ROOT, "client")
+
+STATIC_DIR = os.getenv("STATIC_DIR") or default_static_dir()
+PROXY_MAX_CONNECTIONS = int(os.getenv("PROXY_MAX_CONNECTIONS", "100"))
+
+# Connection-level headers are between each client and this proxy only
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "host",
+}
+
+# Vite writes content-hashed bundles (index-DaNcar97.js) under /assets, so
+# their URLs change whenever their content does
+HASHED_ASSET = re.compile(r"^assets/.+[-.][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+COMPRESSIBLE_TYPES = (
+    "text/", "application/javascript", "application/json", "application/xml", "application/manifest+json",
+    "image/svg+xml", "application/wasm", "font/ttf", "font/otf",
+)
+MIN_COMPRESS_SIZE = 512
+# Preferred first when the client accepts several
+ENCODINGS = ("br", "gzip")
+
+class ApiProxy:
+    """Forwards requests to the backend over a shared keep-alive pool"""
 
-class ProxyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory="client", **kwargs)
-    
-    def do_GET(self):
-        if self.path.startswith('/api/'):
-            self.proxy_to_backend()
-        else:
-            # Serve React frontend files
-            if self.path == '/':
-                self.path = '/index.html'
-            elif not self.path.startswith('/src/') and not '.' in os.path.basename(self.path):
-                # SPA routing - serve index.html for routes
-                self.path = '/index.html'
-            super().do_GET()
-    
-    def do_POST(self):
-        if self.path.startswith('/api/'):
-            self.proxy_to_backend()
-        else:
-            super().do_POST()
-    
-    def proxy_to_backend(self):
-        """Proxy API requests to Python FastAPI backend"""
+    def __init__(self, backend_url: str, max_connections: int):
+        self.backend_url = backend_url.rstrip("/")
+        self.max_connections = max_connections
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.backend_url,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            # No read timeout: event streams (job progress, audit changes) stay open
+            timeout=httpx.Timeout(connect=5.0, read=None, write=30.0, pool=30.0),
+        )
+
+    async def stop(self):
+        if self.client is not None:
+            await self.client.aclose()
+
+    @staticmethod
+    async def _body(request: Request) -> AsyncIterator[bytes]:
+        async for chunk in request.stream():
+            if chunk:
+                yield chunk
+
+    async def handle(self, request: Request) -> Response:
+        headers = [(name, value) for name, value in request.headers.items() if name.lower() not in HOP_BY_HOP]
+        client_host = request.client.host if request.client else ""
+        forwarded_for = request.headers.get("x-forwarded-for")
+        headers += [
+            ("x-forwarded-for", f"{forwarded_for}, {client_host}" if forwarded_for else client_host),
+            ("x-forwarded-proto", request.url.scheme),
+            ("x-forwarded-host", request.headers.get("host", "")),
+        ]
+        has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+
+        # Path and query exactly as received, percent-encoding included
+        target = request.scope["raw_path"].decode("latin-1")
+        if request.scope["query_string"]:
+            target += "?" + request.scope["query_string"].decode("latin-1")
+        upstream = self.client.build_request(
+            request.method,
+            target,
+            headers=headers,
+            content=self._body(request) if has_body else None,
+        )
         try:
-            # Read request body for POST requests
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length) if content_length > 0 else b''
-            
-            # Build backend URL
-            backend_url = f"http://localhost:8000{self.path}"
-            
-            # Create request
-            req = urllib.request.Request(
-                backend_url,
-                data=body if body else None,
-                headers={'Content-Type': 'application/json'}
-            )
-            req.get_method = lambda: self.command
-            
-            # Send request to backend
-            with urllib.request.urlopen(req) as response:
-                # Send response back to client
-                self.send_response(response.getcode())
-                for header, value in response.headers.items():
-                    if header.lower() not in ['connection', 'transfer-encoding']:
-                        self.send_header(header, value)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                
-                # Stream response body
-                while True:
-                    chunk = response.read(8192)
-                    if not chunk:
-                        break
-                    self.wfile.write(chunk)
-                    
-        except Exception as e:
-            print(f"Proxy error: {e}")
-            self.send_error(502, f"Backend proxy error: {e}")
+            response = await self.client.send(upstream, stream=True)
+        except httpx.TransportError as e:
+            print(f"Proxy error: {e!r}")
+            return JSONResponse({"detail": f"Backend proxy error: {e}"}, status_code=502)
+
+        # Raw bytes: a compressed body stays compressed, with its headers intact
+        proxied = StreamingResponse(
+            response.aiter_raw(),
+            status_code=response.status_code,
+            background=BackgroundTask(response.aclose),
+        )
+        # Header by header, so repeated ones (Set-Cookie) survive
+        proxied.raw_headers = [
+            (name, value) for name, value in response.headers.raw if name.lower().decode("latin-1") not in HOP_BY_HOP
+        ]
+        if "access-control-allow-origin" not in response.headers:
+            proxied.raw_headers.append((b"access-control-allow-origin", b"*"))
+        return proxied
+
+@dataclass
+class StaticAsset:
+    """One file of the build, with its precompressed variants"""
+    media_type: str
+    cache_control: str
+    last_modified: str
+    # encoding ("identity", "gzip", "br") -> (body, etag)
+    variants: Dict[str, Tuple[bytes, str]] = field(default_factory=dict)
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+class StaticSite:
+    """Serves the frontend build from an in-memory manifest.
+
+    Every file is read, hashed and compressed once at startup (load());
+    requests are then a dict lookup. Each file carries gzip and, with the
+    brotli package installed, br variants chosen by Accept-Encoding, and a
+    strong ETag per variant. .gz/.br files already in the build are used
+    instead of compressing again. Restart to pick up a new build.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = os.path.realpath(directory)
+        self.assets: Dict[str, StaticAsset] = {}
+
+    def load(self) -> "StaticSite":
+        assets = {}
+        for dirpath, dirnames, filenames in os.walk(self.directory):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            for filename in filenames:
+                if filename.startswith(".") or filename.endswith((".gz", ".br")):
+                    continue
+                path = os.path.join(dirpath, filename)
+                url_path = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                assets[url_path] = self._index(path, url_path)
+        self.assets = assets
+        return self
+
+    def _index(self, path: str, url_path: str) -> StaticAsset:
+        with open(path, "rb") as handle:
+            body = handle.read()
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        asset = StaticAsset(
+            media_type=media_type,
+            cache_control=IMMUTABLE if HASHED_ASSET.match(url_path) else REVALIDATE,
+            last_modified=email.utils.formatdate(os.stat(path).st_mtime, usegmt=True),
+        )
+        digest = hashlib.sha256(body).hexdigest()[:20]
+        asset.variants["identity"] = (body, f'"{digest}"')
+        if len(body) < MIN_COMPRESS_SIZE or not media_type.startswith(COMPRESSIBLE_TYPES):
+            return asset
+
+        for encoding, suffix, compress in (
+            ("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+            ("br", ".br", brotli and (lambda data: brotli.compress(data, quality=11))),
+        ):
+            if os.path.isfile(path + suffix):
+                with open(path + suffix, "rb") as handle:
+                    compressed = handle.read()
+            elif compress:
+                compressed = compress(body)
+            else:
+                continue
+            if len(compressed) < len(body):
+                asset.variants[encoding] = (compressed, f'"{digest}-{encoding}"')
+        return asset
+
+    def _lookup(self, url_path: str) -> Optional[StaticAsset]:
+        key = url_path.lstrip("/")
+        asset = self.assets.get(key or "index.html")
+        if asset is None and (not key or key.endswith("/")):
+            asset = self.assets.get(key + "index.html")
+        if asset is None and not url_path.startswith("/src/") and "." not in os.path.basename(url_path):
+            # SPA routing - serve index.html for client-side routes
+            asset = self.assets.get("index.html")
+        return asset
+
+    async def handle(self, request: Request) -> Response:
+        if request.method not in ("GET", "HEAD"):
+            return PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        asset = self._lookup(request.url.path)
+        if asset is None:
+            return PlainTextResponse("Not Found", status_code=404)
+
+        encoding = "identity"
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        for candidate in ENCODINGS:
+            if candidate in asset.variants and accepted.get(candidate, 0) > 0:
+                encoding = candidate
+                break
+        body, etag = asset.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": asset.cache_control, "Last-Modified": asset.last_modified}
+        if len(asset.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if etag in tags or "*" in tags:
+                return Response(status_code=304, headers=headers)
+        elif request.headers.get("if-modified-since") == asset.last_modified:
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(body, headers=headers, media_type=asset.media_type)
+
+ALL_METHODS = ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+
+def build_app(backend_url: str = BACKEND_URL, static_dir: str = STATIC_DIR,
+              max_connections: int = PROXY_MAX_CONNECTIONS) -> Starlette:
+    proxy = ApiProxy(backend_url, max_connections)
+    site = StaticSite(static_dir)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        site.load()
+        await proxy.start()
+        try:
+            yield
+        finally:
+            await proxy.stop()
+
+    return Starlette(
+        routes=[
+            Route("/api/{path:path}", proxy.handle, methods=ALL_METHODS),
+            Route("/{path:path}", site.handle, methods=ALL_METHODS),
+        ],
+        lifespan=lifespan,
+    )
 
 def start_python_backend():
     """Start the Python FastAPI backend server"""
     print("🐍 Starting Python FastAPI backend server...")
-    os.chdir('python_backend')
-    subprocess.Popen([sys.executable, 'main.py'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    os.chdir('..')
+    # Output is inherited: an unread pipe would eventually block the backend
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--port", "8000", "--init-db"], cwd=os.path.join(ROOT, "python_backend"),
+    )
     time.sleep(3)  # Give backend time to start
+    return process
 
-def start_frontend_server():
+def start_frontend_server(host: str, port: int, backend_url: str, static_dir: str):
     """Start the frontend proxy server"""
     print("🌐 Starting frontend server with API proxy...")
-    server = http.server.HTTPServer(('0.0.0.0', 5000), ProxyHTTPRequestHandler)
-    print("✅ Server running on http://0.0.0.0:5000")
-    print("📱 Frontend: http://0.0.0.0:5000")
-    print("🔗 API Proxy: http://0.0.0.0:5000/api/* -> http://localhost:8000/api/*")
-    server.serve_forever()
+    print(f"✅ Server running on http://{host}:{port}")
+    print(f"📱 Frontend: http://{host}:{port} (from {static_dir})")
+    print(f"🔗 API Proxy: http://{host}:{port}/api/* -> {backend_url}/api/*")
+    uvicorn.run(build_app(backend_url, static_dir), host=host, port=port, log_level="warning")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the frontend and proxy /api to the backend")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--backend-url", default=BACKEND_URL)
+    parser.add_argument("--static-dir", default=STATIC_DIR)
+    parser.add_argument("--no-backend", action="store_true", help="proxy to a backend that is already running")
+    args = parser.parse_args()
+
     print("🚀 Hotel Audit Platform - Pure Python Architecture")
     print("=" * 55)
     print("🗄️ Database: SQLite")
     print("🐍 Backend: Python FastAPI")
     print("⚛️  Frontend: React TypeScript")
-    print("🌐 Server: Python HTTP Server")
-    
-    # Start backend in separate thread
-    backend_thread = threading.Thread(target=start_python_backend, daemon=True)
-    backend_thread.start()
-    
+    print("🌐 Server: Python asyncio proxy (uvicorn)")
+
+    backend = None if args.no_backend else start_python_backend()
+
     # Start frontend server
     try:
-        start_frontend_server()
+        start_frontend_server(args.host, args.port, args.backend_url, args.static_dir)
     except KeyboardInterrupt:
-        print("\n🛑 Server stopped by user")
\ No newline at end of file
+        print("\n🛑 Server stopped by user")
+    finally:
+        if backend is not None:
+            backend.terminate()
@@ -7,4 +7,4 @@ echo "🌐 Server will run on: http://0.0.0.0:5000"
 echo "📝 API Documentation: http://0.0.0.0:5000/docs"
 
 cd python_backend
-python main.py
\ No newline at end of file
+python serve.py --init-db
\ No newline at end of file